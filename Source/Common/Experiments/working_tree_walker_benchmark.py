@@ -0,0 +1,83 @@
+#
+#   working_tree_walker_benchmark.py <scratch-folder> [<num-files>...]
+#
+#   compare the pathlib walk that the projects used with the
+#   serial and parallel scandir walks of wb_working_tree_walker
+#
+#   a tree of each size is created in the scratch folder the first
+#   time it is needed. The default sizes are 10k, 100k and 1M files.
+#
+import sys
+import time
+import pathlib
+
+import wb_working_tree_walker
+
+files_per_folder = 20
+folders_per_folder = 8
+
+scratch = pathlib.Path( sys.argv[1] )
+all_num_files = [int(n) for n in sys.argv[2:]] or [10000, 100000, 1000000]
+
+def makeTree( root, num_files ):
+    if (root / 'done').exists():
+        return
+
+    all_folders = [root]
+    made = 0
+    while made < num_files:
+        folder = all_folders.pop( 0 )
+        folder.mkdir( parents=True, exist_ok=True )
+        for index in range( files_per_folder ):
+            (folder / ('file%d.txt' % (index,))).write_bytes( b'' )
+            made += 1
+
+        for index in range( folders_per_folder ):
+            all_folders.append( folder / ('folder%d' % (index,)) )
+
+    (root / '.git').mkdir( exist_ok=True )
+    (root / 'done').write_bytes( b'' )
+
+def walkPathlib( root ):
+    # the walk the projects used before wb_working_tree_walker
+    all_disk_paths = {}
+    git_dir = root / '.git'
+
+    all_folders = set( [root] )
+    while len(all_folders) > 0:
+        folder = all_folders.pop()
+        folder.stat()
+
+        for abs_path in folder.iterdir():
+            repo_relative = abs_path.relative_to( root )
+            if abs_path.is_dir():
+                if abs_path != git_dir:
+                    all_folders.add( abs_path )
+                    all_disk_paths[ repo_relative ] = True
+
+            else:
+                all_disk_paths[ repo_relative ] = False
+
+    return len(all_disk_paths)
+
+def walkScandir( root, max_workers ):
+    num_paths = 0
+    for walked in wb_working_tree_walker.walkWorkingTree( root, max_workers=max_workers ):
+        num_paths += len(walked.all_file_names) + len(walked.all_folder_names)
+
+    return num_paths
+
+def bench( title, fn ):
+    start = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - start
+    print( '    %-20s %8.3fs  paths %d' % (title, elapsed, result) )
+
+for num_files in all_num_files:
+    root = scratch / ('tree-%d' % (num_files,))
+    makeTree( root, num_files )
+
+    print( '%d files' % (num_files,) )
+    bench( 'pathlib', lambda: walkPathlib( root ) )
+    for max_workers in (1, 2, 4, 8, 16):
+        bench( 'scandir workers %d' % (max_workers,), lambda: walkScandir( root, max_workers ) )
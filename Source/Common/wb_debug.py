@@ -65,6 +65,7 @@ class WbDebug:
         self._debugTreeModel = self.addDebugOption( 'TREE MODEL' )
         self._debugTableModel = self.addDebugOption( 'TABLE MODEL' )
         self._debugDiff = self.addDebugOption( 'DIFF' )
+        self._debugWatcher = self.addDebugOption( 'WATCHER' )
 
     def setDebug( self, str_options ):
         for option in [s.strip().lower() for s in str_options.split(',')]:
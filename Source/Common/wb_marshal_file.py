@@ -0,0 +1,59 @@
+'''
+ ====================================================================
+ Copyright (c) 2016 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_marshal_file.py
+
+    read and write the files that the workbench keeps
+    the data it has worked out in
+
+'''
+import os
+import marshal
+import zlib
+
+#
+#   A marshal file is the magic followed by the zlib compressed
+#   marshal of data. The data must only hold str, int, bytes, bool,
+#   None, tuple, list and dict values so that marshal can save it.
+#
+def writeMarshalFile( filename, magic, data ):
+    contents = magic + zlib.compress( marshal.dumps( data ), 1 )
+
+    # replace the old file in one step so that a reader never
+    # sees a partly written file
+    filename.parent.mkdir( parents=True, exist_ok=True )
+    tmp_filename = filename.with_suffix( '.tmp' )
+    tmp_filename.write_bytes( contents )
+    os.replace( str(tmp_filename), str(filename) )
+
+def readMarshalFile( filename, magic ):
+    # returns None when the file is missing or is not a marshal file
+    try:
+        contents = filename.read_bytes()
+
+    except OSError:
+        return None
+
+    if not contents.startswith( magic ):
+        return None
+
+    try:
+        return marshal.loads( zlib.decompress( contents[len(magic):] ) )
+
+    except (zlib.error, ValueError, EOFError, TypeError):
+        return None
+
+# the stat of path that changes when path is written
+def statKey( path ):
+    try:
+        st = os.stat( str(path) )
+        return (st.st_mtime_ns, st.st_size)
+
+    except OSError:
+        return None
@@ -0,0 +1,201 @@
+'''
+ ====================================================================
+ Copyright (c) 2016 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_path_index.py
+
+    index of the paths of a project by folder that the
+    project tree nodes are created from when they are needed
+
+'''
+import pathlib
+
+def stateHasChanges( file_state ):
+    return file_state.getStagedAbbreviatedStatus() != '' or file_state.getUnstagedAbbreviatedStatus() != ''
+
+#
+#   PathIndex holds for each folder the paths in the folder and the
+#   names of the sub folders that have paths below them. It also keeps
+#   the number of changed paths below each folder.
+#
+#   The foreground uses an index while the background makes the next
+#   one so an index is not changed once it is in use. copy() shares the
+#   folders with the original and a folder is copied when it is first
+#   changed.
+#
+class PathIndex:
+    def __init__( self ):
+        # folder -> {name: path}
+        self.__all_children = {}
+        # folder -> set of sub folder names
+        self.__all_sub_folder_names = {}
+        # folders that are shared with another index
+        self.__all_shared_folders = set()
+
+        self.__all_changed_paths = set()
+        # folder -> number of changed paths below the folder
+        self.__all_changed_counts = {}
+        self.__changes_shared = False
+
+        self.__addFolder( pathlib.Path( '.' ) )
+
+    def __repr__( self ):
+        return '<PathIndex: folders %d changed %d>' % (len(self.__all_children), len(self.__all_changed_paths))
+
+    def copy( self ):
+        index = PathIndex()
+        index.__all_children = dict( self.__all_children )
+        index.__all_sub_folder_names = dict( self.__all_sub_folder_names )
+        index.__all_shared_folders = set( self.__all_children )
+
+        index.__all_changed_paths = self.__all_changed_paths
+        index.__all_changed_counts = self.__all_changed_counts
+        index.__changes_shared = True
+        return index
+
+    #------------------------------------------------------------
+    def hasFolder( self, folder ):
+        return folder in self.__all_children
+
+    def allChildNames( self, folder ):
+        return self.__all_children.get( folder, {} ).keys()
+
+    def childPath( self, folder, name ):
+        return self.__all_children[ folder ][ name ]
+
+    def allSubFolderNames( self, folder ):
+        return self.__all_sub_folder_names.get( folder, set() )
+
+    def allPaths( self ):
+        for all_paths in self.__all_children.values():
+            yield from all_paths.values()
+
+    def allPathsBelow( self, folder ):
+        all_paths = list( self.__all_children.get( folder, {} ).values() )
+        for name in self.allSubFolderNames( folder ):
+            all_paths.extend( self.allPathsBelow( folder / name ) )
+
+        return all_paths
+
+    def numChangedPaths( self, folder ):
+        return self.__all_changed_counts.get( folder, 0 )
+
+    #------------------------------------------------------------
+    def addPath( self, path, is_changed=False ):
+        folder = path.parent
+        if folder not in self.__all_children:
+            self.__addFolder( folder )
+
+        elif folder in self.__all_shared_folders:
+            self.__ownFolder( folder )
+
+        self.__all_children[ folder ][ path.name ] = path
+
+        self.setChanged( path, is_changed )
+
+    def addFolder( self, folder ):
+        if folder not in self.__all_children:
+            self.__addFolder( folder )
+
+    def removePath( self, path ):
+        self.setChanged( path, False )
+
+        folder = path.parent
+        if folder not in self.__all_children:
+            return
+
+        if folder in self.__all_shared_folders:
+            self.__ownFolder( folder )
+
+        self.__all_children[ folder ].pop( path.name, None )
+
+        # remove the folders that no longer have any paths below them
+        while( folder != pathlib.Path( '.' )
+        and len(self.__all_children[ folder ]) == 0
+        and len(self.__all_sub_folder_names[ folder ]) == 0 ):
+            del self.__all_children[ folder ]
+            del self.__all_sub_folder_names[ folder ]
+            self.__all_shared_folders.discard( folder )
+
+            parent = folder.parent
+            if parent in self.__all_shared_folders:
+                self.__ownFolder( parent )
+
+            self.__all_sub_folder_names[ parent ].discard( folder.name )
+            folder = parent
+
+    def removeFolder( self, folder ):
+        # remove folder and every path below it
+        self.setChanged( folder, False )
+
+        for name in list( self.allSubFolderNames( folder ) ):
+            self.removeFolder( folder / name )
+
+        for path in list( self.__all_children.get( folder, {} ).values() ):
+            self.removePath( path )
+
+        # removing the last path may have removed the folder
+        if folder == pathlib.Path( '.' ) or folder not in self.__all_children:
+            return
+
+        del self.__all_children[ folder ]
+        del self.__all_sub_folder_names[ folder ]
+        self.__all_shared_folders.discard( folder )
+
+        parent = folder.parent
+        if parent in self.__all_shared_folders:
+            self.__ownFolder( parent )
+
+        self.__all_sub_folder_names[ parent ].discard( folder.name )
+
+    def setChanged( self, path, is_changed ):
+        if is_changed == (path in self.__all_changed_paths):
+            return
+
+        if self.__changes_shared:
+            self.__all_changed_paths = set( self.__all_changed_paths )
+            self.__all_changed_counts = dict( self.__all_changed_counts )
+            self.__changes_shared = False
+
+        if is_changed:
+            self.__all_changed_paths.add( path )
+            delta = 1
+
+        else:
+            self.__all_changed_paths.discard( path )
+            delta = -1
+
+        for folder in path.parents:
+            count = self.__all_changed_counts.get( folder, 0 ) + delta
+            if count == 0:
+                del self.__all_changed_counts[ folder ]
+
+            else:
+                self.__all_changed_counts[ folder ] = count
+
+    #------------------------------------------------------------
+    def __addFolder( self, folder ):
+        self.__all_children[ folder ] = {}
+        self.__all_sub_folder_names[ folder ] = set()
+
+        if folder == pathlib.Path( '.' ):
+            return
+
+        parent = folder.parent
+        if parent not in self.__all_children:
+            self.__addFolder( parent )
+
+        elif parent in self.__all_shared_folders:
+            self.__ownFolder( parent )
+
+        self.__all_sub_folder_names[ parent ].add( folder.name )
+
+    def __ownFolder( self, folder ):
+        self.__all_children[ folder ] = dict( self.__all_children[ folder ] )
+        self.__all_sub_folder_names[ folder ] = set( self.__all_sub_folder_names[ folder ] )
+        self.__all_shared_folders.discard( folder )
@@ -51,6 +51,15 @@ def getLastCheckinMessageFilename():
 def getLastLockMessageFilename():
     return getPreferencesDir() / 'lock_message.txt'
 
+def getStatusCacheDir():
+    return getPreferencesDir() / 'status_cache'
+
+def getTagIndexDir():
+    return getPreferencesDir() / 'tag_index'
+
+def getCommitCacheDir():
+    return getPreferencesDir() / 'commit_cache'
+
 def setupPlatform( all_name_parts, argv0 ):
     setupPlatformSpecific( all_name_parts, argv0 )
 
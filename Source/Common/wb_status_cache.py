@@ -0,0 +1,280 @@
+'''
+ ====================================================================
+ Copyright (c) 2016 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_status_cache.py
+
+    save the last status of a project so that it can be shown
+    at startup while the status is recalculated
+
+'''
+import os
+import marshal
+import hashlib
+import pathlib
+
+import wb_platform_specific
+import wb_marshal_file
+import wb_path_index
+
+# change when the layout of the saved status changes
+status_cache_version = 1
+status_cache_magic = b'WBSTATUS'
+
+#
+#   A status cache file is a marshal file of (header, status)
+#   where the header is
+#
+#       (status_cache_version, marshal.version, scm_type, fingerprint)
+#
+#   The fingerprint is made by the project from the SCM metadata,
+#   git index and HEAD, svn wc.db or hg dirstate. When the metadata
+#   has changed since the cache was saved the cache is not used.
+#
+def statusCacheFilename( prefs_project ):
+    key = '%s:%s' % (prefs_project.scm_type, prefs_project.path)
+    name = '%s.status' % (hashlib.sha1( key.encode( 'utf-8' ) ).hexdigest(),)
+    return wb_platform_specific.getStatusCacheDir() / name
+
+def writeStatusCache( prefs_project, fingerprint, status ):
+    header = (status_cache_version, marshal.version, prefs_project.scm_type, fingerprint)
+    wb_marshal_file.writeMarshalFile( statusCacheFilename( prefs_project ), status_cache_magic, (header, status) )
+
+def readStatusCache( prefs_project, fingerprint ):
+    # returns None when there is no cache that matches fingerprint
+    data = wb_marshal_file.readMarshalFile( statusCacheFilename( prefs_project ), status_cache_magic )
+    if data is None:
+        return None
+
+    try:
+        header, status = data
+
+    except (ValueError, TypeError):
+        return None
+
+    if header != (status_cache_version, marshal.version, prefs_project.scm_type, fingerprint):
+        return None
+
+    return status
+
+def deleteStatusCache( prefs_project ):
+    try:
+        statusCacheFilename( prefs_project ).unlink()
+
+    except OSError:
+        pass
+
+#
+#   the paths are saved grouped by folder so that the folder
+#   path is saved once and not for each path in it
+#
+def allPathsByFolder( all_file_state, cacheRecord ):
+    all_folders = {}
+    for path, file_state in all_file_state.items():
+        all_folders.setdefault( path.parent, [] ).append( (path.name, cacheRecord( file_state )) )
+
+    return [(str(folder), all_entries) for folder, all_entries in all_folders.items()]
+
+def allPathsFromFolders( all_folders ):
+    for folder, all_entries in all_folders:
+        folder = pathlib.Path( folder )
+        for name, record in all_entries:
+            yield folder / name, record
+
+def parentFolder( folder ):
+    # the parent of a folder as saved in the cache, None for the root
+    if folder == '.':
+        return None
+
+    parent, _, name = folder.rpartition( os.sep )
+    return parent if parent != '' else '.'
+
+#
+#   CachedStatus is the status read from a status cache. The folder and
+#   name strings of the cache are kept and a path and its file state are
+#   only made when the path is looked at, which lets the saved status be
+#   shown without making a Path for every file in the project.
+#
+#   It has the same look ups as a PathIndex so that the project tree nodes
+#   can be used with it. fileStates() is used in place of all_file_state.
+#
+#   recordInfo( folder, name, record ) returns (is_dir, is_changed, can_commit)
+#   and newFileState( path, record ) makes the file state of path.
+#   When folders_are_files a folder is also listed as a file of its parent.
+#
+class CachedStatus:
+    def __init__( self, all_folders, recordInfo, newFileState, folders_are_files ):
+        self.__newFileState = newFileState
+
+        # folder -> {name: record}
+        self.__all_records = {}
+        # folder -> names of the files listed in the folder
+        self.__all_file_names = {}
+        # folder -> set of sub folder names
+        self.__all_sub_folder_names = {'.': set()}
+        # folder -> number of changed paths below the folder
+        self.__all_changed_counts = {}
+
+        self.num_paths = 0
+        self.num_can_commit = 0
+
+        for folder, all_entries in all_folders:
+            self.__addFolder( folder )
+            all_records = self.__all_records.setdefault( folder, {} )
+            all_file_names = self.__all_file_names.setdefault( folder, [] )
+
+            for name, record in all_entries:
+                all_records[ name ] = record
+                self.num_paths += 1
+
+                is_dir, is_changed, can_commit = recordInfo( folder, name, record )
+                if name == '':
+                    # the root folder
+                    pass
+
+                elif is_dir and not folders_are_files:
+                    self.__addFolder( os.path.join( folder, name ) if folder != '.' else name )
+
+                else:
+                    all_file_names.append( name )
+
+                if is_changed:
+                    self.__addChanged( folder )
+
+                if can_commit:
+                    self.num_can_commit += 1
+
+    def __repr__( self ):
+        return '<CachedStatus: folders %d paths %d>' % (len(self.__all_sub_folder_names), self.num_paths)
+
+    def __addFolder( self, folder ):
+        while folder not in self.__all_sub_folder_names:
+            self.__all_sub_folder_names[ folder ] = set()
+            parent = parentFolder( folder )
+            self.__all_sub_folder_names.setdefault( parent, set() ).add( folder.rpartition( os.sep )[2] )
+            folder = parent
+
+    def __addChanged( self, folder ):
+        while folder is not None:
+            self.__all_changed_counts[ folder ] = self.__all_changed_counts.get( folder, 0 ) + 1
+            folder = parentFolder( folder )
+
+    #------------------------------------------------------------
+    def hasFolder( self, folder ):
+        return str(folder) in self.__all_sub_folder_names
+
+    def allChildNames( self, folder ):
+        return self.__all_file_names.get( str(folder), [] )
+
+    def childPath( self, folder, name ):
+        return folder / name
+
+    def allSubFolderNames( self, folder ):
+        return self.__all_sub_folder_names.get( str(folder), set() )
+
+    def allPaths( self ):
+        for folder, all_names in self.__all_file_names.items():
+            folder = pathlib.Path( folder )
+            for name in all_names:
+                yield folder / name
+
+    def allPathsBelow( self, folder ):
+        all_paths = [folder / name for name in self.allChildNames( folder )]
+        for name in self.allSubFolderNames( folder ):
+            all_paths.extend( self.allPathsBelow( folder / name ) )
+
+        return all_paths
+
+    def numChangedPaths( self, folder ):
+        return self.__all_changed_counts.get( str(folder), 0 )
+
+    #------------------------------------------------------------
+    def record( self, path ):
+        # returns None when path is not in the cache
+        return self.__all_records.get( str(path.parent), {} ).get( path.name )
+
+    def fileStates( self ):
+        return CachedFileStates( self, self.__newFileState )
+
+    def allFileStates( self ):
+        # the file state of every path for when the status is updated
+        all_file_state = {}
+        for folder, all_records in self.__all_records.items():
+            folder = pathlib.Path( folder )
+            for name, record in all_records.items():
+                filepath = folder / name
+                all_file_state[ filepath ] = self.__newFileState( filepath, record )
+
+        return all_file_state
+
+#
+#   CachedFileStates makes the file state of a path of a CachedStatus
+#   when it is first looked up
+#
+class CachedFileStates:
+    def __init__( self, cached_status, newFileState ):
+        self.__cached_status = cached_status
+        self.__newFileState = newFileState
+        self.__all_file_state = {}
+
+    def __len__( self ):
+        return self.__cached_status.num_paths
+
+    def __contains__( self, path ):
+        return path in self.__all_file_state or self.__cached_status.record( path ) is not None
+
+    def __getitem__( self, path ):
+        file_state = self.__all_file_state.get( path )
+        if file_state is None:
+            record = self.__cached_status.record( path )
+            if record is None:
+                raise KeyError( path )
+
+            file_state = self.__newFileState( path, record )
+            self.__all_file_state[ path ] = file_state
+
+        return file_state
+
+    def get( self, path, default=None ):
+        if path not in self:
+            return default
+
+        return self[ path ]
+
+    def __iter__( self ):
+        return iter( self.keys() )
+
+    def keys( self ):
+        return [filepath for filepath, file_state in self.items()]
+
+    def values( self ):
+        return [file_state for filepath, file_state in self.items()]
+
+    def items( self ):
+        all_file_state = self.__cached_status.allFileStates()
+        all_file_state.update( self.__all_file_state )
+        return list( all_file_state.items() )
+
+#
+#   recordInfo for the records of file states that save themselves
+#   with _statusCacheRecord(). Most records are the same so the answer
+#   for each record is only worked out once.
+#
+def fileStateRecordInfo( newFileState ):
+    all_record_info = {}
+
+    def recordInfo( folder, name, record ):
+        info = all_record_info.get( record )
+        if info is None:
+            file_state = newFileState( None, record )
+            info = (file_state.isDir(), wb_path_index.stateHasChanges( file_state ), file_state.canCommit())
+            all_record_info[ record ] = info
+
+        return info
+
+    return recordInfo
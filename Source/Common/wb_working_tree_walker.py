@@ -0,0 +1,144 @@
+'''
+ ====================================================================
+ Copyright (c) 2016 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_working_tree_walker.py
+
+    Walk a working tree using os.scandir with the folders
+    scanned in parallel on a pool of threads
+
+'''
+import os
+import sys
+import queue
+import concurrent.futures
+
+# the SCM metadata folders are never part of the working tree
+all_scm_metadata_folder_names = ('.git', '.svn', '.hg')
+
+# with the folders in the OS cache a pool of threads is slower than
+# a serial walk as the threads contend for the GIL. A pool helps when
+# each folder read waits on a slow disk or a network file system.
+default_max_workers = 1
+
+#
+#   WalkedFolder is the result of scanning one folder
+#
+#   path             - folder path relative to the root, '.' for the root
+#   mtime_ns         - mtime of the folder read before its entries
+#   all_file_names   - names of the files and symlinks in the folder
+#   all_folder_names - names of the sub folders that are walked
+#
+#   The names are interned as the same names, __init__.py, Makefile etc,
+#   appear in many folders and are held in the paths for every file.
+#
+class WalkedFolder:
+    __slots__ = ('path', 'mtime_ns', 'all_file_names', 'all_folder_names')
+
+    def __init__( self, path, mtime_ns ):
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.all_file_names = []
+        self.all_folder_names = []
+
+    def __repr__( self ):
+        return '<WalkedFolder: %s files %d folders %d>' % (self.path, len(self.all_file_names), len(self.all_folder_names))
+
+def joinRelativePath( folder, name ):
+    if folder == '.':
+        return name
+
+    return folder + os.sep + name
+
+def scanFolder( root, folder, all_pruned_names=all_scm_metadata_folder_names ):
+    abs_folder = os.path.join( root, folder )
+
+    try:
+        # stat before reading so that a change during the scan
+        # leaves the folder looking changed
+        walked = WalkedFolder( folder, os.stat( abs_folder ).st_mtime_ns )
+
+        with os.scandir( abs_folder ) as all_dir_entries:
+            for dir_entry in all_dir_entries:
+                # the type comes from the folder read, symlinks
+                # are not followed so that loops are impossible
+                if dir_entry.is_dir( follow_symlinks=False ):
+                    if dir_entry.name not in all_pruned_names:
+                        walked.all_folder_names.append( sys.intern( dir_entry.name ) )
+
+                else:
+                    walked.all_file_names.append( sys.intern( dir_entry.name ) )
+
+    except OSError:
+        # the folder has been removed or cannot be read
+        return None
+
+    return walked
+
+#
+#   walkWorkingTree yields a WalkedFolder for folder and every
+#   folder below it in no particular order.
+#
+#   folder is relative to root. all_skip_names are folder names
+#   that are pruned from the walk in addition to the SCM metadata
+#   folders.
+#
+def walkWorkingTree( root, folder='.', all_skip_names=(), max_workers=default_max_workers ):
+    root = str(root)
+    folder = str(folder)
+
+    all_pruned_names = set( all_scm_metadata_folder_names )
+    all_pruned_names.update( all_skip_names )
+
+    if max_workers <= 1:
+        yield from _walkSerial( root, folder, all_pruned_names )
+
+    else:
+        yield from _walkParallel( root, folder, all_pruned_names, max_workers )
+
+def _walkSerial( root, folder, all_pruned_names ):
+    all_folders = [folder]
+    while len(all_folders) > 0:
+        walked = scanFolder( root, all_folders.pop(), all_pruned_names )
+        if walked is None:
+            continue
+
+        for name in walked.all_folder_names:
+            all_folders.append( joinRelativePath( walked.path, name ) )
+
+        yield walked
+
+def _walkParallel( root, folder, all_pruned_names, max_workers ):
+    all_results = queue.Queue()
+
+    def scanFolderTask( folder ):
+        try:
+            all_results.put( (scanFolder( root, folder, all_pruned_names ), None) )
+
+        except Exception as e:
+            all_results.put( (None, e) )
+
+    with concurrent.futures.ThreadPoolExecutor( max_workers ) as executor:
+        executor.submit( scanFolderTask, folder )
+        num_outstanding = 1
+
+        while num_outstanding > 0:
+            walked, error = all_results.get()
+            num_outstanding -= 1
+
+            if error is not None:
+                raise error
+
+            if walked is None:
+                continue
+
+            for name in walked.all_folder_names:
+                executor.submit( scanFolderTask, joinRelativePath( walked.path, name ) )
+                num_outstanding += 1
+
+            yield walked
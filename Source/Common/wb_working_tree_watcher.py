@@ -0,0 +1,345 @@
+'''
+ ====================================================================
+ Copyright (c) 2016 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_working_tree_watcher.py
+
+    Watch a working tree for changes using Linux inotify
+    and collect the paths that have changed
+
+'''
+import os
+import sys
+import errno
+import select
+import struct
+import pathlib
+import threading
+
+import ctypes
+import ctypes.util
+
+IN_MODIFY       = 0x00000002
+IN_ATTRIB       = 0x00000004
+IN_CLOSE_WRITE  = 0x00000008
+IN_MOVED_FROM   = 0x00000040
+IN_MOVED_TO     = 0x00000080
+IN_CREATE       = 0x00000100
+IN_DELETE       = 0x00000200
+IN_DELETE_SELF  = 0x00000400
+IN_MOVE_SELF    = 0x00000800
+IN_Q_OVERFLOW   = 0x00004000
+IN_IGNORED      = 0x00008000
+IN_ONLYDIR      = 0x01000000
+IN_ISDIR        = 0x40000000
+
+IN_NONBLOCK     = 0o4000
+IN_CLOEXEC      = 0o2000000
+
+tree_watch_mask = (IN_MODIFY|IN_ATTRIB|IN_CLOSE_WRITE|IN_MOVED_FROM|IN_MOVED_TO
+                  |IN_CREATE|IN_DELETE|IN_DELETE_SELF|IN_MOVE_SELF|IN_ONLYDIR)
+metadata_watch_mask = IN_MODIFY|IN_CLOSE_WRITE|IN_MOVED_TO|IN_CREATE|IN_DELETE|IN_ONLYDIR
+
+entries_changed_mask = IN_CREATE|IN_DELETE|IN_MOVED_FROM|IN_MOVED_TO
+
+inotify_event_header = struct.Struct( 'iIII' )
+
+# once this many paths are dirty it is cheaper to rescan everything
+max_dirty_paths = 10000
+
+all_scm_metadata_folder_names = ('.git', '.svn', '.hg')
+
+_libc_dll = None
+
+def _libc():
+    global _libc_dll
+    if _libc_dll is None:
+        _libc_dll = ctypes.CDLL( ctypes.util.find_library( 'c' ), use_errno=True )
+
+    return _libc_dll
+
+def createWorkingTreeWatcher( app, root, all_metadata_files, changed_callback ):
+    # only Linux has inotify, other platforms keep using full scans
+    if not sys.platform.startswith( 'linux' ):
+        return None
+
+    try:
+        libc = _libc()
+        libc.inotify_init1
+        libc.inotify_add_watch
+        libc.inotify_rm_watch
+
+    except (OSError, AttributeError):
+        return None
+
+    watcher = WorkingTreeWatcher( app, root, all_metadata_files, changed_callback )
+    watcher.start()
+    return watcher
+
+#
+#   What has changed in the working tree since the last call to takeChanges()
+#
+#   all_dirty_paths   - relative paths of files and folders that changed
+#   all_dirty_folders - relative paths of folders that had entries added or removed
+#   metadata_changed  - one of the SCM metadata files changed
+#   full_scan_needed  - events have been lost and only a full scan is reliable
+#
+class WorkingTreeChanges:
+    def __init__( self ):
+        self.all_dirty_paths = set()
+        self.all_dirty_folders = set()
+        self.metadata_changed = False
+        self.full_scan_needed = False
+
+    def __repr__( self ):
+        return ('<WorkingTreeChanges: paths %d, folders %d, metadata %r, full %r>' %
+                (len(self.all_dirty_paths), len(self.all_dirty_folders), self.metadata_changed, self.full_scan_needed))
+
+    def isEmpty( self ):
+        return (len(self.all_dirty_paths) == 0
+            and len(self.all_dirty_folders) == 0
+            and not self.metadata_changed
+            and not self.full_scan_needed)
+
+class WorkingTreeWatcher(threading.Thread):
+    def __init__( self, app, root, all_metadata_files, changed_callback ):
+        threading.Thread.__init__( self )
+        self.setDaemon( 1 )
+
+        self.app = app
+        self._debug = self.app._debug_options._debugWatcher
+
+        self.root = pathlib.Path( root )
+        self.changed_callback = changed_callback
+
+        # metadata files are watched through the folder that contains them
+        # as git and hg replace the files by renaming a new file over them
+        self.all_metadata_names_by_folder = {}
+        for filename in all_metadata_files:
+            filename = pathlib.Path( filename )
+            self.all_metadata_names_by_folder.setdefault( filename.parent, set() ).add( filename.name )
+
+        self.__lock = threading.Lock()
+        self.__changes = WorkingTreeChanges()
+        self.__active = True
+        # until all the folders are watched changes can be missed
+        self.__ready = False
+
+        self.__fd = None
+        self.__all_paths_by_wd = {}
+        self.__all_wds_by_path = {}
+        self.__all_metadata_wds = {}
+
+        # the wake pipe is closed by __closeWakePipe() when run() finishes
+        self.__wake_read_fd, self.__wake_write_fd = os.pipe()
+        self.__closed = False
+
+    def __repr__( self ):
+        return '<WorkingTreeWatcher: %s watches %d>' % (self.root, len(self.__all_paths_by_wd))
+
+    def isActive( self ):
+        return self.__active
+
+    def takeChanges( self ):
+        with self.__lock:
+            changes = self.__changes
+            self.__changes = WorkingTreeChanges()
+            if not self.__active or not self.__ready:
+                changes.full_scan_needed = True
+
+        self._debug( 'takeChanges() %r' % (changes,) )
+        return changes
+
+    def stop( self ):
+        self.__active = False
+        with self.__lock:
+            # once the watcher thread has finished the fd may have been reused
+            if not self.__closed:
+                os.write( self.__wake_write_fd, b'x' )
+
+    #------------------------------------------------------------
+    def run( self ):
+        libc = _libc()
+        self.__fd = libc.inotify_init1( IN_NONBLOCK|IN_CLOEXEC )
+        if self.__fd < 0:
+            self.__closeWakePipe()
+            self.__fallbackToFullScans( 'inotify_init1 failed - %s' % (os.strerror( ctypes.get_errno() ),) )
+            return
+
+        try:
+            for folder, all_names in self.all_metadata_names_by_folder.items():
+                wd = self.__addWatch( self.root / folder, metadata_watch_mask )
+                if wd is None:
+                    return
+
+                if wd >= 0:
+                    self.__all_metadata_wds[ wd ] = all_names
+
+            if not self.__watchFolderTree( pathlib.Path( '.' ) ):
+                return
+
+            with self.__lock:
+                self.__ready = True
+
+            self._debug( 'run() watching %d folders in %s' % (len(self.__all_paths_by_wd), self.root) )
+
+            while self.__active:
+                all_ready, _, _ = select.select( [self.__fd, self.__wake_read_fd], [], [] )
+                if self.__fd in all_ready:
+                    self.__readEvents()
+
+        finally:
+            os.close( self.__fd )
+            self.__closeWakePipe()
+
+    def __closeWakePipe( self ):
+        with self.__lock:
+            self.__closed = True
+            os.close( self.__wake_read_fd )
+            os.close( self.__wake_write_fd )
+
+    def __readEvents( self ):
+        any_changes = False
+
+        while self.__active:
+            try:
+                buf = os.read( self.__fd, 64*1024 )
+
+            except BlockingIOError:
+                break
+
+            offset = 0
+            while offset < len(buf):
+                wd, mask, cookie, name_len = inotify_event_header.unpack_from( buf, offset )
+                offset += inotify_event_header.size
+                name = os.fsdecode( buf[offset:offset+name_len].rstrip( b'\0' ) )
+                offset += name_len
+
+                if self.__handleEvent( wd, mask, name ):
+                    any_changes = True
+
+        if any_changes:
+            self.changed_callback()
+
+    def __handleEvent( self, wd, mask, name ):
+        if mask&IN_Q_OVERFLOW:
+            self._debug( 'event queue overflow' )
+            with self.__lock:
+                self.__changes.full_scan_needed = True
+            return True
+
+        if mask&IN_IGNORED:
+            self.__forgetWatch( wd )
+            return False
+
+        if wd in self.__all_metadata_wds:
+            if name not in self.__all_metadata_wds[ wd ]:
+                return False
+
+            with self.__lock:
+                self.__changes.metadata_changed = True
+            return True
+
+        if wd not in self.__all_paths_by_wd:
+            return False
+
+        folder = self.__all_paths_by_wd[ wd ]
+
+        if mask&(IN_DELETE_SELF|IN_MOVE_SELF):
+            # the parent folder reports the change
+            return False
+
+        if folder == pathlib.Path( '.' ) and name in all_scm_metadata_folder_names:
+            return False
+
+        path = folder / name
+
+        if mask&IN_ISDIR:
+            if mask&(IN_MOVED_FROM|IN_DELETE):
+                self.__unwatchFolderTree( path )
+
+            elif mask&(IN_MOVED_TO|IN_CREATE):
+                if not self.__watchFolderTree( path ):
+                    return True
+
+        with self.__lock:
+            if self.__changes.full_scan_needed:
+                return True
+
+            self.__changes.all_dirty_paths.add( path )
+            if mask&entries_changed_mask:
+                self.__changes.all_dirty_folders.add( folder )
+
+            if len(self.__changes.all_dirty_paths) > max_dirty_paths:
+                self.__changes.full_scan_needed = True
+
+        return True
+
+    def __watchFolderTree( self, folder ):
+        all_folders = [folder]
+        while len(all_folders) > 0:
+            folder = all_folders.pop()
+
+            if self.__addWatch( self.root / folder, tree_watch_mask, folder ) is None:
+                return False
+
+            try:
+                for dirent in os.scandir( str( self.root / folder ) ):
+                    if dirent.is_dir( follow_symlinks=False ):
+                        if folder == pathlib.Path( '.' ) and dirent.name in all_scm_metadata_folder_names:
+                            continue
+
+                        all_folders.append( folder / dirent.name )
+
+            except OSError:
+                # folder removed while being watched
+                pass
+
+        return True
+
+    def __unwatchFolderTree( self, folder ):
+        libc = _libc()
+        for path in list( self.__all_wds_by_path ):
+            if path == folder or folder in path.parents:
+                wd = self.__all_wds_by_path[ path ]
+                libc.inotify_rm_watch( self.__fd, wd )
+                self.__forgetWatch( wd )
+
+    def __addWatch( self, abs_path, mask, path=None ):
+        wd = _libc().inotify_add_watch( self.__fd, os.fsencode( str(abs_path) ), mask )
+        if wd < 0:
+            err = ctypes.get_errno()
+            if err == errno.ENOSPC:
+                self.__fallbackToFullScans( 'inotify watch limit reached for %s - using full scans' % (self.root,) )
+                return None
+
+            # the folder may have been removed already
+            self._debug( 'inotify_add_watch( %s ) failed - %s' % (abs_path, os.strerror( err )) )
+            return wd
+
+        if path is not None:
+            self.__all_paths_by_wd[ wd ] = path
+            self.__all_wds_by_path[ path ] = wd
+
+        return wd
+
+    def __forgetWatch( self, wd ):
+        path = self.__all_paths_by_wd.pop( wd, None )
+        if path is not None and self.__all_wds_by_path.get( path ) == wd:
+            del self.__all_wds_by_path[ path ]
+
+        self.__all_metadata_wds.pop( wd, None )
+
+    def __fallbackToFullScans( self, reason ):
+        self.app.log.info( reason )
+
+        with self.__lock:
+            self.__active = False
+            self.__changes.full_scan_needed = True
+
+        self.changed_callback()
@@ -0,0 +1,73 @@
+#
+#   git_changes_benchmark.py <repo> [<num-commits>] [<shard-size>] [<repeat>]
+#
+#   compare finding the changes of the last num-commits commits
+#   with one git diff-tree against the worker processes for
+#   each number of workers up to the number of cores
+#
+#   the pool is started before the timing as the app keeps one
+#   pool for all the log pages
+#
+#   this has only been run on a machine with one core, where the
+#   workers are slower than one git diff-tree. The speedup with
+#   more cores is unmeasured, which is why GitProject leaves
+#   change_worker_processes at 0
+#
+#   the work is only in __main__ as the worker processes are
+#   started with spawn, which imports this script
+#
+import os
+import sys
+import time
+
+import git
+
+import wb_git_diff_tree
+
+def allCommits( repo, num_commits ):
+    all_commits = []
+    for line in repo.git.log( '--format=%H %P', '-n', str(num_commits) ).split( '\n' ):
+        all_ids = line.split()
+        all_commits.append( (all_ids[0], all_ids[1] if len(all_ids) > 1 else None) )
+
+    return all_commits
+
+def countChanges( all_changes ):
+    return sum( len(changes.all_added) + len(changes.all_deleted) + len(changes.all_renamed) + len(changes.all_modified)
+                for changes in all_changes )
+
+def bench( title, repeat, fn ):
+    all_times = []
+    for _ in range( repeat ):
+        start = time.perf_counter()
+        result = fn()
+        all_times.append( time.perf_counter() - start )
+
+    print( '%-20s best %8.3fs  worst %8.3fs  changes %r' % (title, min(all_times), max(all_times), result) )
+    return min(all_times)
+
+def main( argv ):
+    repo = git.Repo( argv[1] )
+    num_commits = int( argv[2] ) if len(argv) > 2 else 5000
+    shard_size = int( argv[3] ) if len(argv) > 3 else 250
+    repeat = int( argv[4] ) if len(argv) > 4 else 3
+
+    all_commits = allCommits( repo, num_commits )
+    print( '%d commits shard size %d cores %d' % (len(all_commits), shard_size, os.cpu_count()) )
+
+    serial = bench( 'diff-tree', repeat,
+                lambda: countChanges( wb_git_diff_tree.gitCommitChanges( repo, all_commits ) ) )
+
+    num_workers = 1
+    while num_workers <= os.cpu_count():
+        pool = wb_git_diff_tree.ChangeWorkerPool()
+        executor = pool.executor( num_workers )
+        parallel = bench( '%d workers' % (num_workers,), repeat,
+                lambda: countChanges( wb_git_diff_tree.gitCommitChangesInParallel( executor, repo, all_commits, shard_size ) ) )
+        pool.shutdown()
+        print( 'speedup %.1fx' % (serial / parallel,) )
+
+        num_workers *= 2
+
+if __name__ == '__main__':
+    main( sys.argv )
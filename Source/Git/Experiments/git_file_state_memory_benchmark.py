@@ -0,0 +1,62 @@
+#
+#   git_file_state_memory_benchmark.py <repo>
+#
+#   report the memory used by the GitProject file states
+#   and trees as bytes per file
+#
+import sys
+import gc
+import pathlib
+import builtins
+import tracemalloc
+
+builtins.T_ = lambda s: s
+
+import wb_git_project
+
+class FakeDebug:
+    def __call__( self, msg ):
+        pass
+
+    def isEnabled( self ):
+        return False
+
+class FakeDebugOptions:
+    def __getattr__( self, name ):
+        return FakeDebug()
+
+class FakeLog:
+    def error( self, msg ):
+        print( 'Error: %s' % (msg,) )
+
+    def info( self, msg ):
+        pass
+
+class FakeApp:
+    def __init__( self ):
+        self._debug_options = FakeDebugOptions()
+        self.log = FakeLog()
+
+class FakePrefs:
+    def __init__( self, path ):
+        self.name = 'TestRepo'
+        self.path = pathlib.Path( path )
+
+proj = wb_git_project.GitProject( FakeApp(), FakePrefs( sys.argv[1] ), None )
+
+gc.collect()
+tracemalloc.start()
+before = tracemalloc.get_traced_memory()[0]
+
+proj.updateState()
+
+gc.collect()
+after = tracemalloc.get_traced_memory()[0]
+tracemalloc.stop()
+
+num_files = len(proj.all_file_state)
+num_tracked = len([state for state in proj.all_file_state.values() if state.isControlled()])
+
+print( 'files %d tracked %d' % (num_files, num_tracked) )
+print( 'total %.1f MiB' % ((after - before) / (1024*1024),) )
+print( 'bytes per file %.0f' % ((after - before) / num_files,) )
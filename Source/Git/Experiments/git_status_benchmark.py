@@ -0,0 +1,81 @@
+#
+#   git_status_benchmark.py <repo> [<repeat>]
+#
+#   compare the GitPython index diff status with
+#   the single pass git status --porcelain=v2 engine
+#
+#   the untracked cache status is only faster when the
+#   repo has core.untrackedCache set to true
+#
+import sys
+import time
+
+import git
+import git.index
+
+import wb_git_status
+
+repo = git.Repo( sys.argv[1] )
+repeat = int( sys.argv[2] ) if len(sys.argv) > 2 else 3
+
+def statusGitPython():
+    index = git.index.IndexFile( repo )
+    head_vs_index = index.diff( repo.head.commit )
+    index_vs_working = index.diff( None )
+    untracked_files = repo.untracked_files
+
+    num_entries = len( index.entries )
+    return num_entries, len(head_vs_index), len(index_vs_working), len(untracked_files)
+
+def statusPorcelainV2():
+    num_records = 0
+    num_staged = 0
+    num_unstaged = 0
+    num_untracked = 0
+
+    for record in wb_git_status.gitStatusPorcelainV2( repo ):
+        num_records += 1
+        if record.kind == '?':
+            num_untracked += 1
+
+        elif record.kind in ('1', '2', 'u'):
+            if record.stagedStatus() != '.':
+                num_staged += 1
+            if record.unstagedStatus() != '.':
+                num_unstaged += 1
+
+    return num_records, num_staged, num_unstaged, num_untracked
+
+def statusUntrackedCache():
+    # git status cannot use the untracked cache with --ignored
+    # so the ignored files are found from git ls-files
+    num_index_paths = sum( 1 for path in wb_git_status.gitLsFiles( repo ) )
+
+    num_records = 0
+    for record in wb_git_status.gitStatusPorcelainV2( repo, ignored=False, untracked_cache=True ):
+        num_records += 1
+
+    return num_index_paths, num_records
+
+def bench( title, fn ):
+    all_times = []
+    for _ in range( repeat ):
+        start = time.perf_counter()
+        result = fn()
+        all_times.append( time.perf_counter() - start )
+
+    print( '%-20s best %8.3fs  worst %8.3fs  counts %r' % (title, min(all_times), max(all_times), result) )
+    return min(all_times)
+
+old = bench( 'GitPython', statusGitPython )
+new = bench( 'porcelain v2', statusPorcelainV2 )
+print( 'speedup %.1fx' % (old / new,) )
+
+try:
+    untracked_cache = repo.git.config( '--get', 'core.untrackedCache' )
+
+except git.exc.GitCommandError:
+    untracked_cache = 'not set'
+
+cached = bench( 'untracked cache', statusUntrackedCache )
+print( 'core.untrackedCache %s speedup %.1fx' % (untracked_cache, new / cached) )
@@ -0,0 +1,306 @@
+'''
+ ====================================================================
+ Copyright (c) 2016 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_git_commit_cache.py
+
+    keep the commits of a repo in an sqlite database so that
+    the log history only needs git for the commits made since
+    the database was last updated
+
+'''
+import os
+import heapq
+import itertools
+import sqlite3
+import hashlib
+import datetime
+import tempfile
+
+import wb_platform_specific
+
+import wb_git_status
+
+# change when the tables of the database change
+commit_cache_version = 1
+
+# seconds to wait for another process to finish with the database
+commit_cache_timeout = 5.0
+
+# the number of commits inserted into the database at a time
+commit_insert_batch_size = 1000
+
+# the fields of each commit output by git log -z, each field is NUL terminated
+commit_log_format = '%H%x00%P%x00%an%x00%ae%x00%ct%x00%cI%x00%B'
+num_commit_log_fields = 7
+
+all_create_tables = (
+    'CREATE TABLE commits ('
+    ' commit_id TEXT PRIMARY KEY,'
+    ' parent_ids TEXT,'
+    ' author_name TEXT,'
+    ' author_email TEXT,'
+    ' committed_time INTEGER,'
+    ' committed_tz_offset INTEGER,'
+    ' message TEXT,'
+    ' changes_known INTEGER)',
+    'CREATE TABLE changes ('
+    ' commit_id TEXT,'
+    ' action TEXT,'
+    ' path TEXT,'
+    ' old_path TEXT)',
+    'CREATE INDEX changes_commit_id ON changes (commit_id)',
+    # the refs whose commits, and all their parents, are in the database
+    'CREATE TABLE tips ('
+    ' ref_id TEXT PRIMARY KEY)',
+    )
+
+class GitCommitRecord:
+    __slots__ = ('commit_id', 'parent_ids', 'author_name', 'author_email', 'committed_time', 'committed_tz_offset', 'message')
+
+    def __init__( self, commit_id, parent_ids, author_name, author_email, committed_time, committed_tz_offset, message ):
+        self.commit_id = commit_id
+        self.parent_ids = parent_ids
+        self.author_name = author_name
+        self.author_email = author_email
+        self.committed_time = committed_time
+        self.committed_tz_offset = committed_tz_offset
+        self.message = message
+
+    def __repr__( self ):
+        return '<GitCommitRecord: %s>' % (self.commit_id,)
+
+    def committedDatetime( self ):
+        tz = datetime.timezone( datetime.timedelta( seconds=self.committed_tz_offset ) )
+        return datetime.datetime.fromtimestamp( self.committed_time, tz )
+
+def commitCacheFilename( git_dir ):
+    name = '%s.db' % (hashlib.sha1( os.path.abspath( git_dir ).encode( 'utf-8' ) ).hexdigest(),)
+    return wb_platform_specific.getCommitCacheDir() / name
+
+def tzOffsetFromIsoDate( iso_date ):
+    # iso_date ends in +hh:mm or -hh:mm
+    sign = -1 if iso_date[-6] == '-' else 1
+    return sign * (int( iso_date[-5:-3] )*3600 + int( iso_date[-2:] )*60)
+
+#
+#   GitCommitCache holds the commits of all the refs of a repo. update()
+#   logs the commits of the refs that have changed, stopping at the refs
+#   that were logged before, so a repo is only logged in full once.
+#
+#   The parents and commit time of every commit are kept in memory so
+#   that the commits of the log history are found without git. Only the
+#   commits that are shown are read from the database.
+#
+#   When the database cannot be opened the commits are kept in
+#   memory, for as long as the project is open.
+#
+#   A GitCommitCache is used from the background thread.
+#
+class GitCommitCache:
+    def __init__( self, repo ):
+        self.__repo = repo
+        self.__filename = commitCacheFilename( repo.git_dir )
+
+        self.__connection = None
+
+        # commit id -> (committed time, parent ids)
+        self.__all_commit_graph = None
+        self.__all_tips = None
+
+    def __repr__( self ):
+        return '<GitCommitCache: %s>' % (self.__filename,)
+
+    def close( self ):
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
+
+    def update( self ):
+        all_tips = set( self.__repo.git.rev_parse( 'HEAD', '--branches', '--tags', '--remotes' ).split() )
+
+        self.__loadGraph()
+
+        all_new_tips = all_tips - self.__all_tips
+        if len(all_new_tips) > 0:
+            # only the commits that are not parents of the old tips
+            all_revs = sorted( all_new_tips )
+            all_revs.extend( ['^%s' % (ref_id,) for ref_id in sorted( self.__all_tips )] )
+
+            self.__logCommits( all_revs )
+
+        if all_tips != self.__all_tips:
+            # the parents of every tip are in the database
+            with self.__connection:
+                self.__connection.execute( 'DELETE FROM tips' )
+                self.__connection.executemany( 'INSERT INTO tips VALUES (?)', [(ref_id,) for ref_id in all_tips] )
+
+            self.__all_tips = all_tips
+
+    def allCommitIds( self, commit_id, limit=None, since=None, until=None, stop_commit_id=None ):
+        return list( itertools.islice( self.iterCommitIds( commit_id, since, until, stop_commit_id ), limit ) )
+
+    def iterCommitIds( self, commit_id, since=None, until=None, stop_commit_id=None ):
+        # yields the ids of commit_id and its parents newest first, like git log.
+        # since and until are times in seconds. The parents of the commits
+        # before since are not looked at.
+        all_pending = [(-self.__all_commit_graph[ commit_id ][0], commit_id)]
+        all_seen = {commit_id}
+        while len(all_pending) > 0:
+            neg_time, commit_id = heapq.heappop( all_pending )
+            if commit_id == stop_commit_id:
+                break
+
+            if since is not None and -neg_time < since:
+                continue
+
+            if until is None or -neg_time <= until:
+                yield commit_id
+
+            for parent_id in self.__all_commit_graph[ commit_id ][1]:
+                # the parents of a shallow clone are not in the repo
+                if parent_id not in all_seen and parent_id in self.__all_commit_graph:
+                    all_seen.add( parent_id )
+                    heapq.heappush( all_pending, (-self.__all_commit_graph[ parent_id ][0], parent_id) )
+
+    def iterFilteredCommitIds( self, all_commit_ids, since=None, until=None ):
+        # yields the all_commit_ids that were committed between since and until
+        for commit_id in all_commit_ids:
+            committed_time = self.__all_commit_graph[ commit_id ][0]
+            if( (since is None or committed_time >= since)
+            and (until is None or committed_time <= until) ):
+                yield commit_id
+
+    def commitRecords( self, all_commit_ids ):
+        # returns commit id -> GitCommitRecord
+        all_missing_ids = [commit_id for commit_id in all_commit_ids if commit_id not in self.__all_commit_graph]
+        if len(all_missing_ids) > 0:
+            # commits that are not on any ref
+            self.__logCommits( all_missing_ids, '--no-walk' )
+
+        all_records = {}
+        cursor = self.__connection.cursor()
+        for commit_id in all_commit_ids:
+            row = cursor.execute( 'SELECT commit_id, parent_ids, author_name, author_email, committed_time, committed_tz_offset, message'
+                                  ' FROM commits WHERE commit_id = ?', (commit_id,) ).fetchone()
+            if row is not None:
+                all_records[ commit_id ] = GitCommitRecord( row[0], tuple( row[1].split() ), *row[2:] )
+
+        return all_records
+
+    def fileChanges( self, all_commit_ids ):
+        # returns commit id -> [(action, path, old path)]
+        # for the commits that have had their changes saved
+        all_changes = {}
+        cursor = self.__connection.cursor()
+        for commit_id in all_commit_ids:
+            row = cursor.execute( 'SELECT changes_known FROM commits WHERE commit_id = ?', (commit_id,) ).fetchone()
+            if row is None or not row[0]:
+                continue
+
+            all_changes[ commit_id ] = list( cursor.execute( 'SELECT action, path, old_path FROM changes WHERE commit_id = ?', (commit_id,) ) )
+
+        return all_changes
+
+    def setFileChanges( self, all_changes ):
+        # all_changes is commit id -> [(action, path, old path)]
+        with self.__connection:
+            for commit_id, all_commit_changes in all_changes.items():
+                self.__connection.execute( 'DELETE FROM changes WHERE commit_id = ?', (commit_id,) )
+                self.__connection.executemany( 'INSERT INTO changes VALUES (?, ?, ?, ?)',
+                    [(commit_id, action, path, old_path) for action, path, old_path in all_commit_changes] )
+                self.__connection.execute( 'UPDATE commits SET changes_known = 1 WHERE commit_id = ?', (commit_id,) )
+
+    #------------------------------------------------------------
+    def __connect( self ):
+        try:
+            self.__filename.parent.mkdir( parents=True, exist_ok=True )
+            connection = sqlite3.connect( str(self.__filename), timeout=commit_cache_timeout, check_same_thread=False )
+
+            version, = connection.execute( 'PRAGMA user_version' ).fetchone()
+            if version != commit_cache_version:
+                # made by another version, start again
+                connection.close()
+                os.remove( str(self.__filename) )
+                connection = sqlite3.connect( str(self.__filename), timeout=commit_cache_timeout, check_same_thread=False )
+                self.__createTables( connection )
+
+            return connection
+
+        except (sqlite3.Error, OSError):
+            connection = sqlite3.connect( ':memory:', check_same_thread=False )
+            self.__createTables( connection )
+            return connection
+
+    def __createTables( self, connection ):
+        with connection:
+            for create_table in all_create_tables:
+                connection.execute( create_table )
+
+            connection.execute( 'PRAGMA user_version = %d' % (commit_cache_version,) )
+
+    def __loadGraph( self ):
+        if self.__all_commit_graph is not None:
+            return
+
+        self.__connection = self.__connect()
+
+        all_commit_graph = {}
+        for commit_id, committed_time, parent_ids in self.__connection.execute( 'SELECT commit_id, committed_time, parent_ids FROM commits' ):
+            all_commit_graph[ commit_id ] = (committed_time, tuple( parent_ids.split() ))
+
+        self.__all_commit_graph = all_commit_graph
+        self.__all_tips = set( ref_id for ref_id, in self.__connection.execute( 'SELECT ref_id FROM tips' ) )
+
+    def __logCommits( self, all_revs, *options ):
+        # the revs are given on stdin as there can be too many for a command line
+        with tempfile.TemporaryFile() as revs_file:
+            revs_file.write( ('\n'.join( all_revs ) + '\n').encode( 'utf-8' ) )
+            revs_file.seek( 0 )
+
+            proc = self.__repo.git.log( '-z', '--format=' + commit_log_format, '--stdin', *options,
+                                        as_process=True, istream=revs_file )
+
+            all_rows = []
+            for all_fields in parseCommitLog( wb_git_status.allChunks( proc ) ):
+                commit_id, parent_ids, author_name, author_email, committed_time, committed_date, message = all_fields
+
+                committed_time = int( committed_time )
+                all_rows.append( (commit_id, parent_ids, author_name, author_email,
+                                    committed_time, tzOffsetFromIsoDate( committed_date ), message) )
+                self.__all_commit_graph[ commit_id ] = (committed_time, tuple( parent_ids.split() ))
+
+                if len(all_rows) >= commit_insert_batch_size:
+                    self.__insertCommits( all_rows )
+                    all_rows = []
+
+            self.__insertCommits( all_rows )
+
+            # raises GitCommandError if git log failed
+            proc.wait()
+
+    def __insertCommits( self, all_rows ):
+        with self.__connection:
+            self.__connection.executemany( 'INSERT OR IGNORE INTO commits VALUES (?, ?, ?, ?, ?, ?, ?, 0)', all_rows )
+
+def parseCommitLog( all_chunks ):
+    # yields the num_commit_log_fields fields of each commit
+    partial_field = b''
+    all_commit_fields = []
+
+    for chunk in all_chunks:
+        all_fields = (partial_field + chunk).split( b'\0' )
+        partial_field = all_fields.pop()
+
+        for field in all_fields:
+            all_commit_fields.append( field.decode( 'utf-8', 'replace' ) )
+            if len(all_commit_fields) == num_commit_log_fields:
+                yield all_commit_fields
+                all_commit_fields = []
+
+    assert partial_field == b'' and len(all_commit_fields) == 0, 'git log output truncated'
@@ -0,0 +1,223 @@
+'''
+ ====================================================================
+ Copyright (c) 2016 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_git_diff_tree.py
+
+    run "git diff-tree --stdin -z" to find the paths changed
+    by each commit and parse the output as it arrives from git
+
+'''
+import os
+import threading
+import subprocess
+import multiprocessing
+import concurrent.futures
+
+import git
+
+import wb_git_status
+
+# mode of a submodule, which is not a file of the commit
+gitlink_mode = 0o160000
+
+class GitCommitChanges:
+    __slots__ = ('commit_id', 'all_added', 'all_deleted', 'all_renamed', 'all_modified')
+
+    def __init__( self, commit_id ):
+        self.commit_id = commit_id
+
+        self.all_added = set()
+        self.all_deleted = set()
+        # (new path, old path)
+        self.all_renamed = []
+        self.all_modified = set()
+
+    def __repr__( self ):
+        return ('<GitCommitChanges: %s A %d D %d R %d M %d>' %
+                (self.commit_id, len(self.all_added), len(self.all_deleted), len(self.all_renamed), len(self.all_modified)))
+
+    def addRawRecord( self, old_mode, new_mode, status, all_paths ):
+        # only files are changes, submodules and missing sides are not
+        old_is_file = old_mode not in (0, gitlink_mode)
+        new_is_file = new_mode not in (0, gitlink_mode)
+
+        if status == 'R':
+            old_path, new_path = all_paths
+            if old_is_file and new_is_file:
+                self.all_renamed.append( (new_path, old_path) )
+                return
+
+            # a rename of a submodule is not a change
+            if old_is_file:
+                self.all_deleted.add( old_path )
+
+            if new_is_file:
+                self.all_added.add( new_path )
+
+            return
+
+        path = all_paths[0]
+        if old_is_file and new_is_file:
+            self.all_modified.add( path )
+
+        elif old_is_file:
+            self.all_deleted.add( path )
+
+        elif new_is_file:
+            self.all_added.add( path )
+
+#
+#   gitCommitChanges yields a GitCommitChanges for each of all_commits
+#   in the same order. all_commits is a list of (commit id, first
+#   parent id) with None as the parent id of a root commit.
+#
+#   Only the paths that changed are reported by git and only renames
+#   that do not change the contents of the file are detected.
+#
+def gitCommitChanges( repo, all_commits ):
+    proc = repo.git.diff_tree( '--stdin', '-z', '-r', '--root', '--always', '--raw', '-M100%',
+                                as_process=True, istream=subprocess.PIPE )
+
+    # the commits are written by a thread so that git
+    # cannot block on a full stdout while stdin is written
+    writer = threading.Thread( target=writeCommits, args=(proc.stdin, all_commits) )
+    writer.daemon = True
+    writer.start()
+
+    try:
+        yield from parseDiffTree( wb_git_status.allChunks( proc ) )
+
+    except BaseException:
+        # the output is no longer read, stop git so that
+        # the writer is not left blocked on a full stdin
+        proc.proc.kill()
+        writer.join()
+        proc.proc.wait()
+        raise
+
+    writer.join()
+
+    # raises GitCommandError if git diff-tree failed
+    proc.wait()
+
+#
+#   ChangeWorkerPool is the one pool of worker processes that is shared
+#   by all the GitProjects. The pool is started when it is first used
+#   and is kept for the following log pages until shutdown().
+#
+#   The workers are started with spawn so that they do not inherit the
+#   threads of the app.
+#
+class ChangeWorkerPool:
+    def __init__( self ):
+        self.__lock = threading.Lock()
+        self.__executor = None
+
+    def executor( self, max_workers ):
+        with self.__lock:
+            if self.__executor is None:
+                self.__executor = concurrent.futures.ProcessPoolExecutor(
+                                        max_workers, mp_context=multiprocessing.get_context( 'spawn' ) )
+
+            return self.__executor
+
+    def shutdown( self ):
+        with self.__lock:
+            if self.__executor is not None:
+                self.__executor.shutdown( wait=False )
+                self.__executor = None
+
+#
+#   gitCommitChangesInParallel yields the same as gitCommitChanges but
+#   all_commits is split into shards of shard_size commits that the
+#   workers of executor give to git diff-tree in parallel. The changes
+#   are yielded in the order of all_commits as each shard is finished.
+#
+def gitCommitChangesInParallel( executor, repo, all_commits, shard_size ):
+    all_shards = [all_commits[offset:offset + shard_size] for offset in range( 0, len(all_commits), shard_size )]
+
+    all_futures = [executor.submit( commitChangesForShard, repo.git_dir, shard ) for shard in all_shards]
+    try:
+        for future in all_futures:
+            yield from future.result()
+
+    except BaseException:
+        # the pool is shared, do not leave it busy with
+        # shards that no one will read
+        for future in all_futures:
+            future.cancel()
+        raise
+
+def commitChangesForShard( git_dir, all_commits ):
+    # runs in a worker process with a repo of its own
+    repo = git.Repo( git_dir )
+    try:
+        return list( gitCommitChanges( repo, all_commits ) )
+
+    finally:
+        repo.close()
+
+def writeCommits( stdin, all_commits ):
+    try:
+        for commit_id, parent_id in all_commits:
+            if parent_id is None:
+                stdin.write( ('%s\n' % (commit_id,)).encode( 'ascii' ) )
+
+            else:
+                stdin.write( ('%s %s\n' % (commit_id, parent_id)).encode( 'ascii' ) )
+
+        stdin.close()
+
+    except OSError:
+        # git has exited, the error is reported by proc.wait()
+        pass
+
+def parseDiffTree( all_chunks ):
+    # the output is NUL terminated fields. Each commit starts with its
+    # id followed by a raw record for each change. A raw record is
+    # followed by its path, a rename by the old and new paths.
+    partial_field = b''
+    changes = None
+    raw_record = None
+    all_paths = []
+
+    for chunk in all_chunks:
+        all_fields = (partial_field + chunk).split( b'\0' )
+        partial_field = all_fields.pop()
+
+        for field in all_fields:
+            if raw_record is not None:
+                all_paths.append( os.fsdecode( field ) )
+                old_mode, new_mode, status, num_paths = raw_record
+                if len(all_paths) == num_paths:
+                    changes.addRawRecord( old_mode, new_mode, status, all_paths )
+                    raw_record = None
+                    all_paths = []
+
+                continue
+
+            if len(field) == 0:
+                continue
+
+            if field[0:1] == b':':
+                # :<old mode> <new mode> <old sha> <new sha> <status>[<score>]
+                all_parts = field[1:].split( b' ' )
+                status = chr( all_parts[4][0] )
+                raw_record = (int( all_parts[0], 8 ), int( all_parts[1], 8 ), status, 2 if status in ('R', 'C') else 1)
+
+            else:
+                if changes is not None:
+                    yield changes
+
+                changes = GitCommitChanges( field.decode( 'ascii' ) )
+
+    assert partial_field == b'' and raw_record is None, 'git diff-tree output truncated'
+
+    if changes is not None:
+        yield changes
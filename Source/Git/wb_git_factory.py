@@ -14,17 +14,22 @@ import wb_git_log_history_view
 import wb_git_ui_components
 import wb_git_ui_actions
 import wb_git_preferences
+import wb_git_diff_tree
 
 import wb_scm_project_dialogs
 import wb_scm_factory_abc
 
 class WbGitFactory(wb_scm_factory_abc.WbScmFactoryABC):
     def __init__( self ):
-        pass
+        # the worker processes are shared by all the GitProjects
+        self.change_worker_pool = wb_git_diff_tree.ChangeWorkerPool()
 
     def scmName( self ):
         return 'git'
 
+    def shutdown( self ):
+        self.change_worker_pool.shutdown()
+
     def scmPresentationShortName( self ):
         return 'Git'
 
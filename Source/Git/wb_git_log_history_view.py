@@ -23,6 +23,8 @@ import wb_table_view
 
 import wb_ui_components
 
+import wb_git_project
+
 def U_( s: str ) -> str:
     return s
 
@@ -202,15 +204,10 @@ class WbGitLogHistoryView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrac
 
         yield self.app.switchToBackground
 
-        self.log_model.loadCommitLogForRepository( self.ui_component.deferedLogHistoryProgress(), git_project, options.getLimit(), options.getSince(), options.getUntil() )
-
-        yield self.app.switchToForeground
+        commit_log_walk = git_project.cmdCommitLogWalkForRepository( self.ui_component.deferedLogHistoryProgress(),
+                                options.getSince(), options.getUntil(), changed_files=not self.log_model.changed_files_on_select )
 
-        self.log_table.resizeColumnToContents( self.log_model.col_date )
-
-        self.ui_component.progress.end()
-        self.updateEnableStates()
-        self.show()
+        yield from self.__showCommitLogWalk_Bg( commit_log_walk, options.getLimit() )
 
     @thread_switcher
     def showCommitLogForFile_Bg( self, git_project, filename, options ):
@@ -219,13 +216,28 @@ class WbGitLogHistoryView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrac
 
         yield self.app.switchToBackground
 
-        self.log_model.loadCommitLogForFile( self.ui_component.deferedLogHistoryProgress(), git_project, filename, options.getLimit(), options.getSince(), options.getUntil() )
+        commit_log_walk = git_project.cmdCommitLogWalkForFile( self.ui_component.deferedLogHistoryProgress(), filename,
+                                options.getSince(), options.getUntil(), changed_files=not self.log_model.changed_files_on_select )
+
+        yield from self.__showCommitLogWalk_Bg( commit_log_walk, options.getLimit() )
+
+    #
+    #   The window is shown with the first page of the log. The model
+    #   fetches the other pages as the log table is scrolled to them.
+    #
+    @thread_switcher
+    def __showCommitLogWalk_Bg( self, commit_log_walk, limit ):
+        # called on the background thread
+        all_tags_by_id = self.git_project.cmdTagsForRepository()
 
         yield self.app.switchToForeground
 
+        self.log_model.loadCommitLogWalk( commit_log_walk, limit, all_tags_by_id, self.ui_component.progress )
+
+        yield from self.log_model.fetchMoreCommitLog_Bg()
+
         self.log_table.resizeColumnToContents( self.log_model.col_date )
 
-        self.ui_component.progress.end()
         self.updateEnableStates()
         self.show()
 
@@ -246,10 +258,39 @@ class WbGitLogHistoryView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrac
         self.commit_message.clear()
         self.commit_message.insertPlainText( node.commitMessage() )
 
-        self.changes_model.loadChanges( node.commitFileChanges() )
+        if self.log_model.changed_files_on_select:
+            # the changes are shown when the background has found them
+            self.changes_model.loadChanges( [] )
+            self.app.wrapWithThreadSwitcher( self.loadChangesForCommit_Bg, 'log history selectionChanged' )( node )
+
+        else:
+            self.changes_model.loadChanges( node.commitFileChanges() )
 
         self.updateEnableStates()
 
+    @thread_switcher
+    def loadChangesForCommit_Bg( self, node ):
+        yield self.app.switchToBackground
+
+        try:
+            all_changes = self.git_project.cmdChangedFilesForLog( node )
+
+        except wb_git_project.GitCommandError as e:
+            all_changes = []
+            self.app.log.error( T_('Cannot find the changes of commit %(commit_id)s - %(error)s') %
+                            {'commit_id': node.commitIdString()
+                            ,'error': e} )
+
+        yield self.app.switchToForeground
+
+        # the selection may have moved to another commit
+        if( len(self.current_commit_selections) == 0
+        or self.log_model.commitNode( self.current_commit_selections[0] ) is not node ):
+            return
+
+        self.changes_model.loadChanges( all_changes )
+        self.updateEnableStates()
+
     def selectionChangedFile( self ):
         self.current_file_selection = [index.row() for index in self.changes_table.selectedIndexes() if index.column() == 0]
         self.updateEnableStates()
@@ -284,6 +325,14 @@ class WbGitLogHistoryModel(QtCore.QAbstractTableModel):
 
     column_titles = (U_('Author'), U_('Date'), U_('Tag'), U_('Message'), U_('Commit ID'))
 
+    # find the changes of a commit when it is selected
+    # and not for every commit when the log is loaded
+    changed_files_on_select = True
+
+    # the number of commits fetched each time the
+    # log table is scrolled to the end of the commits
+    fetch_more_page_size = 200
+
     def __init__( self, app ):
         self.app = app
 
@@ -294,19 +343,85 @@ class WbGitLogHistoryModel(QtCore.QAbstractTableModel):
         self.all_commit_nodes  = []
         self.all_tags_by_id = {}
 
+        self.__commit_log_walk = None
+        self.__limit = None
+        self.__progress = None
+        self.__is_fetching = False
+
         self.__brush_is_tag = QtGui.QBrush( QtGui.QColor( 0, 0, 255 ) )
 
-    def loadCommitLogForRepository( self, progress_callback, git_project, limit, since, until ):
+    def loadCommitLogWalk( self, commit_log_walk, limit, all_tags_by_id, progress ):
+        # limit is the most commits to fetch, None fetches all of the log
         self.beginResetModel()
-        self.all_commit_nodes = git_project.cmdCommitLogForRepository( progress_callback, limit, since, until )
-        self.all_tags_by_id = git_project.cmdTagsForRepository()
+        self.all_commit_nodes = []
+        self.all_tags_by_id = all_tags_by_id
         self.endResetModel()
 
-    def loadCommitLogForFile( self, progress_callback, git_project, filename, limit, since, until ):
-        self.beginResetModel()
-        self.all_commit_nodes = git_project.cmdCommitLogForFile( progress_callback, filename, limit, since, until )
-        self.all_tags_by_id = git_project.cmdTagsForRepository()
-        self.endResetModel()
+        self.__commit_log_walk = commit_log_walk
+        self.__limit = limit
+        self.__progress = progress
+        self.__is_fetching = False
+
+    def canFetchMore( self, parent ):
+        if parent.isValid() or self.__commit_log_walk is None:
+            return False
+
+        return (not self.__is_fetching
+            and not self.__commit_log_walk.isFinished()
+            and (self.__limit is None or len(self.all_commit_nodes) < self.__limit))
+
+    def fetchMore( self, parent ):
+        self.app.wrapWithThreadSwitcher( self.fetchMoreCommitLog_Bg, 'log history fetchMore' )()
+
+    #
+    #   Only the commits that the log table has been scrolled to are
+    #   held. The progress shows how many commits have been fetched
+    #   while the next page is walked.
+    #
+    @thread_switcher
+    def fetchMoreCommitLog_Bg( self ):
+        if not self.canFetchMore( QtCore.QModelIndex() ):
+            return
+
+        self.__is_fetching = True
+
+        commit_log_walk = self.__commit_log_walk
+        page_size = self.fetch_more_page_size
+        if self.__limit is not None:
+            page_size = min( page_size, self.__limit - len(self.all_commit_nodes) )
+
+        self.__progress.start( T_('Logs %(count)d') )
+        self.__progress.incEventCount( len(self.all_commit_nodes) )
+
+        yield self.app.switchToBackground
+
+        try:
+            all_commit_nodes = commit_log_walk.nextCommitLogs( page_size )
+
+        except wb_git_project.GitCommandError as e:
+            self.app.log.error( T_('Cannot get the commit log - %s') % (e,) )
+            all_commit_nodes = None
+
+        yield self.app.switchToForeground
+
+        self.__progress.end()
+
+        if commit_log_walk is not self.__commit_log_walk:
+            # another log has been loaded
+            return
+
+        self.__is_fetching = False
+
+        if all_commit_nodes is None:
+            # stop fetching after an error
+            self.__commit_log_walk = None
+
+        elif len(all_commit_nodes) > 0:
+            first_row = len(self.all_commit_nodes)
+
+            self.beginInsertRows( QtCore.QModelIndex(), first_row, first_row + len(all_commit_nodes) - 1 )
+            self.all_commit_nodes.extend( all_commit_nodes )
+            self.endInsertRows()
 
     def commitForRow( self, row ):
         node = self.all_commit_nodes[ row ]
@@ -10,9 +10,26 @@
     wb_git_project.py
 
 '''
+import os
+import stat
+import collections
+import concurrent.futures
+import time
 import pathlib
+import functools
+import itertools
+import binascii
+import tempfile
 
 import wb_annotate_node
+import wb_working_tree_watcher
+import wb_working_tree_walker
+import wb_path_index
+import wb_status_cache
+
+import wb_git_status
+import wb_git_diff_tree
+import wb_git_commit_cache
 
 import git
 import git.exc
@@ -44,24 +61,81 @@ def gitInit( app, wc_path ):
             app.log.error( line )
         return False
 
+def isInsidePaths( filepath, all_paths ):
+    if filepath in all_paths:
+        return True
+
+    for parent in filepath.parents:
+        if parent in all_paths:
+            return True
+
+    return False
+
 class GitProject:
+    # above this many changed folders a full untracked scan is faster
+    max_changed_folders_for_incremental_status = 100
+    # above this many dirty paths a full tracked status is faster
+    max_dirty_paths_for_incremental_status = 1000
+    # git's untracked cache is turned on for projects
+    # with at least this many files in the index
+    min_paths_for_untracked_cache = 20000
+    # submodules have their own git status and
+    # this many are run at the same time
+    max_workers_for_submodule_status = 8
+    # the changes of this many commits are kept for
+    # the commits that are selected in the log history
+    changed_files_cache_size = 64
+    # the changes of at least this many commits are found by
+    # worker processes when change_worker_processes is not 0.
+    # It is 0 as the speedup on a multi-core machine has not
+    # been measured, see Experiments/git_changes_benchmark.py
+    change_worker_processes = 0
+    min_commits_for_change_workers = 1000
+    # the number of commits that each worker is given at a time
+    change_worker_shard_size = 250
+
     def __init__( self, app, prefs_project, ui_components ):
         self.app = app
         self.ui_components = ui_components
 
         self._debug = self.app._debug_options._debugGitProject
         self._debugTree = self.app._debug_options._debugGitUpdateTree
+        self._debugStatus = self.app._debug_options._debugGitStatus
 
         self.prefs_project = prefs_project
         self.repo = git.Repo( str( prefs_project.path ) )
         self.index = None
 
-        self.tree = GitProjectTreeNode( self, prefs_project.name, pathlib.Path( '.' ) )
-        self.flat_tree = GitProjectTreeNode( self, prefs_project.name, pathlib.Path( '.' ) )
+        self.__setPathIndex( wb_path_index.PathIndex() )
 
         self.all_file_state = {}
 
-        self.__stale_index = False
+        self.__status_fingerprint = None
+        self.__all_tracked_records = {}
+        self.__all_renamed_records = {}
+        self.__all_untracked_records = {}
+
+        # the paths of the cloned submodules, which are given their own git status
+        self.__all_submodule_paths = set()
+
+        self.__watcher = None
+
+        # the status was loaded from the status cache
+        self.__status_from_cache = False
+        # the paths of the status cache until the status is reconciled
+        self.__all_status_cache_paths = None
+
+        # None until the git config has been checked
+        self.__use_untracked_cache = None
+
+        # paths changed by the cmd functions
+        self.__all_stale_paths = set()
+
+        # commit id -> changes, with the most recently used last
+        self.__all_commit_changes = collections.OrderedDict()
+
+        # made when the commits are first needed
+        self.__commit_cache = None
 
         self.__num_staged_files = 0
         self.__num_modified_files = 0
@@ -128,126 +202,873 @@ class GitProject:
     def numModifiedFiles( self ):
         return self.__num_modified_files
 
-    def saveChanges( self ):
-        self._debug( 'saveChanges() __stale_index %r' % (self.__stale_index,) )
+    def startWatcher( self, changed_callback ):
+        if self.__watcher is not None:
+            return
 
-        if self.__stale_index:
-            self.updateState()
-            self.__stale_index = False
+        git_dir = pathlib.Path( self.repo.git_dir )
+        self.__watcher = wb_working_tree_watcher.createWorkingTreeWatcher(
+                            self.app, self.projectPath(),
+                            [git_dir / 'index', git_dir / 'HEAD'],
+                            changed_callback )
+
+    def stopWatcher( self ):
+        if self.__watcher is not None:
+            self.__watcher.stop()
+            self.__watcher = None
+
+    def takeStalePaths( self ):
+        # the paths changed by the cmd functions since the last call
+        all_paths = self.__all_stale_paths
+        self.__all_stale_paths = set()
+        return all_paths
+
+    def usesFolderStatus( self ):
+        # the status of the whole working tree is always used
+        return False
 
-    def updateState( self ):
-        self._debug( 'updateState() repo=%s' % (self.projectPath(),) )
+    # all_paths limits the update to the paths that have been changed
+    def updateState( self, all_paths=None ):
+        self._debug( 'updateState( %r ) repo=%s' % (all_paths, self.projectPath()) )
 
-        # rebuild the tree
-        self.tree = GitProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ) )
-        self.flat_tree = GitProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ) )
+        if all_paths is None:
+            # all the paths are updated
+            self.__all_stale_paths = set()
 
         if not self.projectPath().exists():
             self.app.log.error( T_('Project %(name)s folder %(folder)s has been deleted') %
                             {'name': self.projectName()
                             ,'folder': self.projectPath()} )
 
+            self.__setPathIndex( wb_path_index.PathIndex() )
             self.all_file_state = {}
+            self.__status_fingerprint = None
+            self.__status_from_cache = False
 
-        else:
+        elif self.__status_fingerprint is None:
             self.__calculateStatus()
 
-        for path in self.all_file_state:
-            self.__updateTree( path )
+        elif all_paths is not None and not self.__status_from_cache:
+            if len(all_paths) == 0:
+                return
+
+            self.__calculateStatusForPaths( all_paths )
+
+        elif self.__status_from_cache:
+            # the files may have changed while the workbench was not
+            # running, which the watcher cannot know about
+            self.__status_from_cache = False
+            if self.__watcher is not None:
+                self.__watcher.takeChanges()
+
+            # the reconcile needs the file state of every path
+            self.__setFileStates( dict( wb_status_cache.allPathsFromFolders( self.__all_status_cache_paths ) ) )
+            self.__all_status_cache_paths = None
+
+            self.__calculateStatusIncremental( None )
+
+        elif self.__watcher is None:
+            self.__calculateStatusIncremental( None )
+
+        else:
+            changes = self.__watcher.takeChanges()
+            if changes.isEmpty():
+                self._debug( 'updateState() no changes in working tree' )
+                return
+
+            if changes.full_scan_needed:
+                changes = None
+
+            self.__calculateStatusIncremental( changes )
 
         self.dumpTree()
 
     def __calculateStatus( self ):
+        if self.__watcher is not None:
+            # the full scan will see all the pending changes
+            self.__watcher.takeChanges()
+
+        if self.__use_untracked_cache is None:
+            self.__setupUntrackedCache()
+
+        start_time = time.perf_counter()
+
+        if self.__use_untracked_cache:
+            # the ignored files are the files that are in neither
+            # the index nor the untracked files
+            all_index_names = {}
+            for path in wb_git_status.gitLsFiles( self.repo ):
+                folder, _, name = path.rpartition( os.sep )
+                all_index_names.setdefault( folder or '.', set() ).add( name )
+
+            all_not_indexed_paths = []
+
+        else:
+            all_index_names = None
+            all_not_indexed_paths = None
+
+        all_folder_mtimes = {}
+        all_disk_paths = {}
+        self.__walkFolder( pathlib.Path( '.' ), all_disk_paths, all_folder_mtimes, all_index_names, all_not_indexed_paths )
+
+        walk_time = time.perf_counter()
+
+        # ----------------------------------------
+        # the index is only read if a commit is made
+        self.index = git.index.IndexFile( self.repo )
+
+        # a single git status reports the staged, unstaged, untracked
+        # and ignored files. All the files not reported are tracked
+        # and unchanged.
+        self.__readStatus( None, untracked_cache=self.__use_untracked_cache )
+
+        if all_not_indexed_paths is not None:
+            for filepath, str_path in all_not_indexed_paths:
+                if filepath not in self.__all_untracked_records:
+                    self.__all_untracked_records[ filepath ] = wb_git_status.GitStatusRecord( '!', str_path )
+
+        self.__countChanges()
+
+        status_time = time.perf_counter()
+
+        self.__setFileStates( all_disk_paths )
+
+        self._debugStatus( '__calculateStatus() %d paths walk %.3fs status %.3fs states %.3fs untracked cache %r' %
+                            (len(self.all_file_state), walk_time - start_time, status_time - walk_time,
+                            time.perf_counter() - status_time, self.__use_untracked_cache) )
+
+        all_ignore_files = [pathlib.Path( self.repo.git_dir ) / 'info' / 'exclude']
+        all_ignore_files.extend( self.__allIgnoreFiles( all_disk_paths ) )
+
+        self.__status_fingerprint = self.__statusFingerprint( all_ignore_files )
+        self.__status_fingerprint.all_folder_mtimes = all_folder_mtimes
+
+    def __setFileStates( self, all_disk_paths ):
+        all_paths = set( all_disk_paths )
+        all_paths.update( self.__all_tracked_records )
+        all_paths.update( self.__all_renamed_records )
+        all_paths.update( self.__all_untracked_records )
+
         self.all_file_state = {}
+        for filepath in all_paths:
+            self.all_file_state[ filepath ] = self.__newFileState( filepath, all_disk_paths.get( filepath, False ) )
+
+        # the tree nodes are created from the index as they are needed
+        path_index = wb_path_index.PathIndex()
+        for path, file_state in self.all_file_state.items():
+            path_index.addPath( path, wb_path_index.stateHasChanges( file_state ) )
+
+        self.__setPathIndex( path_index )
+
+    #
+    #   The status cache saves the git status records and the status
+    #   fingerprint. After the cache is loaded the first updateState()
+    #   reconciles with the working tree as an incremental status.
+    #
+    #   Until then the paths are looked up in a CachedStatus so that
+    #   the status is shown without making the file state of every path.
+    #
+    #   The cache is only used if the index and HEAD are unchanged.
+    #
+    def loadStatusCache( self ):
+        fingerprint = self.__statusFingerprint( [] )
+        if fingerprint.index_key is None:
+            return False
+
+        status = wb_status_cache.readStatusCache( self.prefs_project, (fingerprint.index_key, fingerprint.head_commit_id) )
+        if status is None:
+            return False
+
+        self.__all_tracked_records = {}
+        self.__all_renamed_records = {}
+        self.__all_untracked_records = {}
+        for all_fields in status['records']:
+            self.__addStatusRecord( wb_git_status.statusRecordFromTuple( all_fields ) )
+
+        self.__findSubmodules()
+
+        self.__countChanges()
+
+        all_changed_names = set()
+        for all_records in (self.__all_tracked_records, self.__all_renamed_records, self.__all_untracked_records):
+            for filepath in all_records:
+                if wb_path_index.stateHasChanges( self.__newFileState( filepath, False ) ):
+                    all_changed_names.add( (str(filepath.parent), filepath.name) )
+
+        def recordInfo( folder, name, is_dir ):
+            return (is_dir, (folder, name) in all_changed_names, False)
+
+        cached_status = wb_status_cache.CachedStatus( status['paths'], recordInfo, self.__newFileState, True )
+        self.all_file_state = cached_status.fileStates()
+        self.__setPathIndex( cached_status )
+        self.__all_status_cache_paths = status['paths']
+
+        for path, key in status['ignore_files']:
+            fingerprint.all_ignore_file_keys[ pathlib.Path( path ) ] = key
+
+        for folder, mtime in status['folder_mtimes']:
+            fingerprint.all_folder_mtimes[ pathlib.Path( folder ) ] = mtime
+
+        self._debug( 'loadStatusCache() %r' % (cached_status,) )
+
+        self.__status_fingerprint = fingerprint
+        self.__status_from_cache = True
+        return True
+
+    def saveStatusCache( self ):
+        fingerprint = self.__status_fingerprint
+        # a status that is still the one loaded from the cache is already saved
+        if fingerprint is None or self.__status_from_cache:
+            return
+
+        all_records = [record.asTuple() for record in self.__all_tracked_records.values()]
+        all_records.extend( [record.asTuple() for record in self.__all_untracked_records.values()] )
+
+        status = {
+            'paths': wb_status_cache.allPathsByFolder( self.all_file_state, WbGitFileState.isDir ),
+            'records': all_records,
+            'ignore_files': [(str(path), key) for path, key in fingerprint.all_ignore_file_keys.items()],
+            'folder_mtimes': [(str(folder), mtime) for folder, mtime in fingerprint.all_folder_mtimes.items()],
+            }
+
+        try:
+            wb_status_cache.writeStatusCache( self.prefs_project, (fingerprint.index_key, fingerprint.head_commit_id), status )
+
+        except OSError as e:
+            self.app.log.error( T_('Cannot save the status of project %(name)s - %(error)s') %
+                            {'name': self.projectName()
+                            ,'error': e} )
+
+    #
+    #   Only look at the folders that have had entries added or removed
+    #   since the last status and only update the file states that have
+    #   a different status. The path index is updated by copying the
+    #   folders that change so that the foreground never sees a partial
+    #   update.
+    #
+    #   When the working tree watcher provides the changes the folders
+    #   do not need to be stat'ed and the tracked status is limited
+    #   to the dirty paths.
+    #
+    def __calculateStatusIncremental( self, changes ):
+        start_time = time.perf_counter()
 
         repo_root = self.projectPath()
+        old_fingerprint = self.__status_fingerprint
 
-        git_dir = repo_root / '.git'
+        all_changed_folders = []
+        if changes is not None:
+            for folder in changes.all_dirty_folders:
+                if folder in old_fingerprint.all_folder_mtimes:
+                    all_changed_folders.append( folder )
 
-        all_folders = set( [repo_root] )
-        while len(all_folders) > 0:
-            folder = all_folders.pop()
+        else:
+            for folder, mtime in old_fingerprint.all_folder_mtimes.items():
+                try:
+                    st = os.stat( str( repo_root / folder ) )
+                    if stat.S_ISDIR( st.st_mode ) and st.st_mtime_ns != mtime:
+                        all_changed_folders.append( folder )
 
-            for filename in folder.iterdir():
-                abs_path = folder / filename
+                except OSError:
+                    # removed folders are handled when the parent is rescanned
+                    pass
 
-                repo_relative = abs_path.relative_to( repo_root )
+        self._debug( '__calculateStatusIncremental() %d changed folders' % (len(all_changed_folders),) )
 
-                if abs_path.is_dir():
-                    if abs_path != git_dir:
-                        all_folders.add( abs_path )
+        all_folder_mtimes = dict( old_fingerprint.all_folder_mtimes )
+        all_touched = set()
+        all_new_disk_paths = {}
 
-                        self.all_file_state[ repo_relative ] = WbGitFileState( self, repo_relative )
-                        self.all_file_state[ repo_relative ].setIsDir()
+        for folder in sorted( all_changed_folders ):
+            if folder not in all_folder_mtimes:
+                # inside a folder that has been removed
+                continue
 
-                else:
-                    self.all_file_state[ repo_relative ] = WbGitFileState( self, repo_relative )
+            self.__rescanFolder( folder, all_touched, all_new_disk_paths, all_folder_mtimes )
+
+        all_ignore_files = list( old_fingerprint.all_ignore_file_keys )
+        all_ignore_files.extend( self.__allIgnoreFiles( all_new_disk_paths ) )
+
+        fingerprint = self.__statusFingerprint( all_ignore_files )
 
-        # ----------------------------------------
-        # can only get info from the index if there is at least 1 commit
         self.index = git.index.IndexFile( self.repo )
 
-        if self.hasCommits():
-            head_vs_index = self.index.diff( self.repo.head.commit )
-            index_vs_working = self.index.diff( None )
+        # untracked and ignored files depend on the index, the ignore files
+        # and the folders that have had entries added or removed
+        if( fingerprint.isUntrackedStale( old_fingerprint )
+        or pathlib.Path( '.' ) in all_changed_folders
+        or len(all_changed_folders) > self.max_changed_folders_for_incremental_status ):
+            all_untracked_folders = None
 
         else:
-            head_vs_index = []
-            index_vs_working = []
+            all_untracked_folders = [folder for folder in all_changed_folders if folder in all_folder_mtimes]
 
-        # each ref to self.repo.untracked_files creates a new object
-        # cache the value once/update
-        untracked_files = self.repo.untracked_files
+        # the index and HEAD decide the status of every tracked file
+        if( all_untracked_folders is None
+        or changes is None
+        or changes.metadata_changed
+        or len(changes.all_dirty_paths) > self.max_dirty_paths_for_incremental_status ):
+            all_tracked_paths = None
 
-        for entry in self.index.entries.values():
-            filepath = pathlib.Path( entry.path )
-            if filepath not in self.all_file_state:
-                # filepath has been deleted
-                self.all_file_state[ filepath ] = WbGitFileState( self, filepath )
+        else:
+            all_tracked_paths = changes.all_dirty_paths
 
-            self.all_file_state[ filepath ].setIndexEntry( entry )
+        all_old_tracked = self.__all_tracked_records
+        all_old_renamed = self.__all_renamed_records
+        all_old_untracked = self.__all_untracked_records
 
-        self.__num_staged_files = 0
-        for diff in head_vs_index:
-            self.__num_staged_files += 1
-            filepath = pathlib.Path( diff.b_path )
-            if filepath not in self.all_file_state:
-                self.all_file_state[ filepath ] = WbGitFileState( self, filepath )
-            self.all_file_state[ filepath ]._addStaged( diff )
+        scan_time = time.perf_counter()
+
+        self.__readStatus( all_untracked_folders, all_tracked_paths )
+
+        status_time = time.perf_counter()
+
+        self.__addChangedRecords( all_old_tracked, self.__all_tracked_records, all_touched )
+        self.__addChangedRecords( all_old_renamed, self.__all_renamed_records, all_touched )
+        self.__addChangedRecords( all_old_untracked, self.__all_untracked_records, all_touched )
+
+        self.__countChanges()
+
+        # git status may have refreshed the index
+        fingerprint = self.__statusFingerprint( all_ignore_files )
+        fingerprint.all_folder_mtimes = all_folder_mtimes
+
+        self._debug( '__calculateStatusIncremental() %d touched paths' % (len(all_touched),) )
+
+        self.__status_fingerprint = fingerprint
+        self.__updateFileStates( all_touched, all_new_disk_paths )
+
+        self._debugStatus( '__calculateStatusIncremental() %d changed folders %d touched paths scan %.3fs status %.3fs states %.3fs '
+                           'untracked %s tracked %s' %
+                            (len(all_changed_folders), len(all_touched), scan_time - start_time, status_time - scan_time,
+                            time.perf_counter() - status_time,
+                            'all' if all_untracked_folders is None else len(all_untracked_folders),
+                            'all' if all_tracked_paths is None else len(all_tracked_paths)) )
+
+    #
+    #   After the cmd functions have changed some paths only those paths
+    #   are given to git status. The results are merged into copies of
+    #   the records, file states and path index.
+    #
+    #   The status fingerprint is left as it was so that the next
+    #   updateState() still sees the index as changed.
+    #
+    def __calculateStatusForPaths( self, all_paths ):
+        start_time = time.perf_counter()
+
+        all_paths = set( all_paths )
+
+        # both sides of a rename are needed for git status to report it
+        for path in list( all_paths ):
+            record = self.__all_tracked_records.get( path )
+            if record is not None and record.kind == '2':
+                all_paths.add( pathlib.Path( record.orig_path ) )
+
+            record = self.__all_renamed_records.get( path )
+            if record is not None:
+                all_paths.add( pathlib.Path( record.path ) )
+
+        all_touched = set( all_paths )
+        for path in all_paths:
+            if self.__path_index.hasFolder( path ):
+                all_touched.update( self.__path_index.allPathsBelow( path ) )
+
+        all_old_tracked = self.__all_tracked_records
+        all_old_renamed = self.__all_renamed_records
+        all_old_untracked = self.__all_untracked_records
+
+        # keep the records of the paths that have not changed
+        self.__all_tracked_records = {}
+        self.__all_renamed_records = {}
+        for filepath, record in all_old_tracked.items():
+            if not isInsidePaths( filepath, all_paths ):
+                self.__addStatusRecord( record )
+
+        self.__all_untracked_records = {}
+        for filepath, record in all_old_untracked.items():
+            if not isInsidePaths( filepath, all_paths ):
+                self.__all_untracked_records[ filepath ] = record
+
+        self.index = git.index.IndexFile( self.repo )
+
+        optional_locks = self.__watcher is None
+        all_repo_paths, all_stale_submodules = self.__splitSubmodulePaths( all_paths )
+        if len(all_repo_paths) > 0:
+            for record in wb_git_status.gitStatusPorcelainV2( self.repo, all_repo_paths, optional_locks=optional_locks ):
+                self.__addStatusRecord( record )
+
+        self.__readSubmodulesStatus( all_stale_submodules, optional_locks )
+
+        status_time = time.perf_counter()
+
+        self.__addChangedRecords( all_old_tracked, self.__all_tracked_records, all_touched )
+        self.__addChangedRecords( all_old_renamed, self.__all_renamed_records, all_touched )
+        self.__addChangedRecords( all_old_untracked, self.__all_untracked_records, all_touched )
+
+        self.__countChanges()
+
+        self.__updateFileStates( all_touched, {} )
+
+        self._debugStatus( '__calculateStatusForPaths() %d paths %d touched paths status %.3fs states %.3fs' %
+                            (len(all_paths), len(all_touched), status_time - start_time, time.perf_counter() - status_time) )
+
+    def __updateFileStates( self, all_touched, all_new_disk_paths ):
+        repo_root = self.projectPath()
+
+        all_file_state = dict( self.all_file_state )
+        all_updated = []
+        all_removed = []
+
+        for filepath in all_touched:
+            if filepath in all_new_disk_paths:
+                is_dir = all_new_disk_paths[ filepath ]
+                on_disk = True
+
+            else:
+                abs_path = repo_root / filepath
+                on_disk = os.path.lexists( str(abs_path) )
+                is_dir = on_disk and abs_path.is_dir()
+
+            if( not on_disk
+            and filepath not in self.__all_tracked_records
+            and filepath not in self.__all_renamed_records
+            and filepath not in self.__all_untracked_records ):
+                if filepath in all_file_state:
+                    del all_file_state[ filepath ]
+                    all_removed.append( filepath )
+
+                continue
+
+            all_file_state[ filepath ] = self.__newFileState( filepath, is_dir )
+            all_updated.append( filepath )
+
+        self.all_file_state = all_file_state
+
+        if len(all_updated) > 0 or len(all_removed) > 0:
+            path_index = self.__path_index.copy()
+            for filepath in all_removed:
+                path_index.removePath( filepath )
+
+            for filepath in all_updated:
+                path_index.addPath( filepath, wb_path_index.stateHasChanges( all_file_state[ filepath ] ) )
+
+            self.__setPathIndex( path_index )
+
+    def __walkFolder( self, folder, all_disk_paths, all_folder_mtimes, all_index_names=None, all_not_indexed_paths=None ):
+        # all_index_names is folder -> names of the files in the index.
+        # When it is given the files that are not in the index are
+        # added to all_not_indexed_paths as (path, str path).
+        all_submodule_folders = set()
+
+        for walked in wb_working_tree_walker.walkWorkingTree( self.projectPath(), folder ):
+            folder_path = pathlib.Path( walked.path )
+            all_folder_mtimes[ folder_path ] = walked.mtime_ns
+
+            for name in walked.all_folder_names:
+                all_disk_paths[ folder_path / name ] = True
+
+            for name in walked.all_file_names:
+                all_disk_paths[ folder_path / name ] = False
+
+            if all_index_names is None:
+                continue
+
+            parent, _, name = walked.path.rpartition( os.sep )
+            parent = parent or '.'
+            if parent in all_submodule_folders or name in all_index_names.get( parent, () ):
+                # the files of a submodule are not in the index
+                all_submodule_folders.add( walked.path )
+                continue
+
+            all_folder_index_names = all_index_names.get( walked.path, () )
+            for name in walked.all_file_names:
+                if name not in all_folder_index_names:
+                    all_not_indexed_paths.append( (folder_path / name, wb_working_tree_walker.joinRelativePath( walked.path, name )) )
+
+    def __rescanFolder( self, folder, all_touched, all_new_disk_paths, all_folder_mtimes ):
+        repo_root = self.projectPath()
+
+        all_old_names = set( self.__path_index.allChildNames( folder ) )
+
+        walked = wb_working_tree_walker.scanFolder( str(repo_root), str(folder) )
+        if walked is None:
+            # removed since it was found to have changed
+            walked = wb_working_tree_walker.WalkedFolder( str(folder), None )
+
+        else:
+            all_folder_mtimes[ folder ] = walked.mtime_ns
+
+        all_new_entries = [(name, True) for name in walked.all_folder_names]
+        all_new_entries.extend( [(name, False) for name in walked.all_file_names] )
+
+        all_new_names = set()
+        for name, is_dir in all_new_entries:
+            all_new_names.add( name )
+
+            if name not in all_old_names:
+                repo_relative = folder / name
+                all_touched.add( repo_relative )
+                if is_dir:
+                    all_new_disk_paths[ repo_relative ] = True
+
+                    all_walked_paths = {}
+                    self.__walkFolder( repo_relative, all_walked_paths, all_folder_mtimes )
+                    all_touched.update( all_walked_paths )
+                    all_new_disk_paths.update( all_walked_paths )
+
+                else:
+                    all_new_disk_paths[ repo_relative ] = False
+
+        for name in all_old_names - all_new_names:
+            repo_relative = folder / name
+            all_touched.add( repo_relative )
+
+            if self.__path_index.hasFolder( repo_relative ):
+                for path in self.__path_index.allPathsBelow( repo_relative ):
+                    all_touched.add( path )
+                    all_folder_mtimes.pop( path, None )
+
+                all_folder_mtimes.pop( repo_relative, None )
+
+    def __readStatus( self, all_untracked_folders, all_tracked_paths=None, untracked_cache=False ):
+        # a status that refreshes the index would wake up the watcher.
+        # git only saves its untracked cache when it can write the index.
+        optional_locks = self.__watcher is None or untracked_cache
+
+        # when only the tracked files need checking the last
+        # untracked and ignored files are still correct
+        if all_untracked_folders is None:
+            assert all_tracked_paths is None
+            # the caller works out the ignored files when the untracked cache is used
+            all_status_records = wb_git_status.gitStatusPorcelainV2( self.repo, ignored=not untracked_cache,
+                                    optional_locks=optional_locks, untracked_cache=untracked_cache )
+            self.__all_tracked_records = {}
+            self.__all_renamed_records = {}
+            self.__all_untracked_records = {}
+
+            self.__findSubmodules()
+            all_stale_submodules = self.__all_submodule_paths
+
+        elif all_tracked_paths is None:
+            all_status_records = wb_git_status.gitStatusPorcelainV2( self.repo, untracked=False, optional_locks=optional_locks )
+            self.__all_tracked_records = {}
+            self.__all_renamed_records = {}
+
+            # git status cannot be given the folders inside a submodule
+            all_untracked_folders, _ = self.__splitSubmodulePaths( all_untracked_folders )
+            all_stale_submodules = self.__all_submodule_paths
+
+        else:
+            all_tracked_paths, all_stale_submodules = self.__splitSubmodulePaths( all_tracked_paths )
+            all_untracked_folders, all_stale_folder_submodules = self.__splitSubmodulePaths( all_untracked_folders )
+            all_stale_submodules.update( all_stale_folder_submodules )
+
+            # keep the records of the paths that have not changed
+            all_tracked_records = {}
+            for filepath, record in self.__all_tracked_records.items():
+                if not isInsidePaths( filepath, all_tracked_paths ):
+                    all_tracked_records[ filepath ] = record
+
+            self.__all_tracked_records = all_tracked_records
+            self.__all_renamed_records = {}
+            for record in all_tracked_records.values():
+                if record.kind == '2' and record.stagedStatus() == 'R':
+                    self.__all_renamed_records[ pathlib.Path( record.orig_path ) ] = record
+
+            if len(all_tracked_paths) > 0:
+                all_status_records = wb_git_status.gitStatusPorcelainV2( self.repo, all_tracked_paths, untracked=False, optional_locks=optional_locks )
+
+            else:
+                all_status_records = []
+
+        for record in all_status_records:
+            self.__addStatusRecord( record )
+
+        if all_untracked_folders is not None and len(all_untracked_folders) > 0:
+            all_untracked_records = dict( self.__all_untracked_records )
+            for filepath in list( all_untracked_records ):
+                for folder in all_untracked_folders:
+                    if folder in filepath.parents:
+                        del all_untracked_records[ filepath ]
+                        break
+
+            self.__all_untracked_records = all_untracked_records
+
+            for record in wb_git_status.gitStatusPorcelainV2( self.repo, all_untracked_folders, optional_locks=optional_locks ):
+                if record.kind in ('?', '!'):
+                    self.__addStatusRecord( record )
+
+        self.__readSubmodulesStatus( all_stale_submodules, optional_locks )
+
+    #
+    #   A submodule is a repo of its own that the git status of the
+    #   project only reports as one path. The status of each cloned
+    #   submodule is read on a pool thread and its records are merged
+    #   into the records of the project with the submodule path added.
+    #   The status of the submodules takes about as long as the
+    #   slowest of them.
+    #
+    def __findSubmodules( self ):
+        all_submodule_paths = set()
+
+        all_repos = [pathlib.Path( '.' )]
+        while len(all_repos) > 0:
+            repo_path = all_repos.pop()
+            if repo_path == pathlib.Path( '.' ):
+                repo = self.repo
+
+            else:
+                repo = git.Repo( str( self.projectPath() / repo_path ) )
+
+            try:
+                for str_path in wb_git_status.gitSubmodulePaths( repo ):
+                    path = repo_path / str_path
+                    # submodules that have not been cloned have no status
+                    if (self.projectPath() / path / '.git').exists():
+                        all_submodule_paths.add( path )
+                        # submodules can have submodules
+                        all_repos.append( path )
+
+            finally:
+                if repo is not self.repo:
+                    repo.close()
+
+        self.__all_submodule_paths = all_submodule_paths
+
+    def __submoduleOf( self, filepath ):
+        # the innermost submodule that filepath is inside
+        for parent in filepath.parents:
+            if parent in self.__all_submodule_paths:
+                return parent
+
+        return None
+
+    def __splitSubmodulePaths( self, all_paths ):
+        # returns the paths that git status of the project can be
+        # given and the submodules that the other paths are inside
+        all_stale_submodules = set()
+        if len(self.__all_submodule_paths) == 0:
+            return all_paths, all_stale_submodules
+
+        all_repo_paths = []
+        for path in all_paths:
+            submodule = self.__submoduleOf( path )
+            if submodule is None:
+                all_repo_paths.append( path )
+
+            else:
+                all_stale_submodules.add( submodule )
+
+        return all_repo_paths, all_stale_submodules
+
+    def __readSubmodulesStatus( self, all_submodules, optional_locks ):
+        if len(all_submodules) == 0:
+            return
+
+        start_time = time.perf_counter()
+
+        # drop the old records of the submodules
+        all_tracked_records = {}
+        for filepath, record in self.__all_tracked_records.items():
+            if self.__submoduleOf( filepath ) not in all_submodules:
+                all_tracked_records[ filepath ] = record
+
+        all_untracked_records = {}
+        for filepath, record in self.__all_untracked_records.items():
+            if self.__submoduleOf( filepath ) not in all_submodules:
+                all_untracked_records[ filepath ] = record
+
+        self.__all_tracked_records = {}
+        self.__all_renamed_records = {}
+        self.__all_untracked_records = all_untracked_records
+        for record in all_tracked_records.values():
+            self.__addStatusRecord( record )
+
+        with concurrent.futures.ThreadPoolExecutor( self.max_workers_for_submodule_status ) as executor:
+            all_futures = {}
+            for submodule in all_submodules:
+                all_futures[ executor.submit( self.__readSubmoduleStatus, submodule, optional_locks ) ] = submodule
+
+            for future in concurrent.futures.as_completed( all_futures ):
+                submodule = all_futures[ future ]
+
+                try:
+                    all_records, duration = future.result()
+
+                except (git.exc.GitError, OSError) as e:
+                    self.app.log.error( T_('Cannot get the status of submodule %(submodule)s - %(error)s') %
+                                    {'submodule': submodule
+                                    ,'error': e} )
+                    continue
+
+                prefix = pathlib.PurePosixPath( submodule )
+                for record in all_records:
+                    record.path = str( prefix / record.path )
+                    if record.orig_path is not None:
+                        record.orig_path = str( prefix / record.orig_path )
+
+                    self.__addStatusRecord( record )
+
+                self._debugStatus( '__readSubmodulesStatus() %s %d records %.3fs' % (submodule, len(all_records), duration) )
+
+        self._debugStatus( '__readSubmodulesStatus() %d submodules %.3fs' % (len(all_submodules), time.perf_counter() - start_time) )
 
+    def __readSubmoduleStatus( self, submodule, optional_locks ):
+        # runs on a pool thread with a repo of its own
+        start_time = time.perf_counter()
+
+        repo = git.Repo( str( self.projectPath() / submodule ) )
+        try:
+            all_records = list( wb_git_status.gitStatusPorcelainV2( repo, optional_locks=optional_locks ) )
+
+        finally:
+            repo.close()
+
+        return all_records, time.perf_counter() - start_time
+
+    def __addStatusRecord( self, record ):
+        filepath = pathlib.Path( record.path )
+
+        if record.kind in ('?', '!'):
+            self.__all_untracked_records[ filepath ] = record
+
+        else:
+            self.__all_tracked_records[ filepath ] = record
+
+            if record.kind == '2' and record.stagedStatus() == 'R':
+                # the rename is reported against the HEAD name
+                self.__all_renamed_records[ pathlib.Path( record.orig_path ) ] = record
+
+    def __addChangedRecords( self, all_old_records, all_new_records, all_touched ):
+        for filepath, record in all_new_records.items():
+            if filepath not in all_old_records or record.isNotEqual( all_old_records[ filepath ] ):
+                all_touched.add( filepath )
+
+        for filepath in all_old_records:
+            if filepath not in all_new_records:
+                all_touched.add( filepath )
+
+    def __countChanges( self ):
+        self.__num_staged_files = 0
         self.__num_modified_files = 0
-        for diff in index_vs_working:
-            self.__num_modified_files += 1
-            filepath = pathlib.Path( diff.a_path )
-            if filepath not in self.all_file_state:
-                self.all_file_state[ filepath ] = WbGitFileState( self, filepath )
-            self.all_file_state[ filepath ]._addUnstaged( diff )
 
-        for path in untracked_files:
-            filepath = pathlib.Path( path )
-            if filepath not in self.all_file_state:
-                self.all_file_state[ filepath ] = WbGitFileState( self, filepath )
+        for record in self.__all_tracked_records.values():
+            if record.kind == 'u':
+                self.__num_modified_files += 1
+                continue
+
+            if record.stagedStatus() != '.':
+                self.__num_staged_files += 1
+
+            if record.unstagedStatus() != '.':
+                self.__num_modified_files += 1
 
-            self.all_file_state[ filepath ]._setUntracked()
+    def __newFileState( self, filepath, is_dir ):
+        file_state = WbGitFileState( self, filepath )
+        if is_dir:
+            file_state.setIsDir()
 
-    def __updateTree( self, path ):
-        assert isinstance( path, pathlib.Path ), 'path %r' % (path,)
-        self._debugTree( '__updateTree path %r' % (path,) )
-        node = self.tree
+        record = self.__all_tracked_records.get( filepath )
+        renamed_record = self.__all_renamed_records.get( filepath )
+        untracked_record = self.__all_untracked_records.get( filepath )
 
-        self._debugTree( '__updateTree path.parts %r' % (path.parts,) )
+        if renamed_record is not None:
+            file_state._setStaged( 'R', renamed_record, pathlib.Path( renamed_record.path ) )
 
-        for index, name in enumerate( path.parts[0:-1] ):
-            self._debugTree( '__updateTree name %r at node %r' % (name,node) )
+        if untracked_record is not None:
+            if untracked_record.kind == '?':
+                file_state._setUntracked()
 
-            if not node.hasFolder( name ):
-                node.addFolder( name, GitProjectTreeNode( self, name, pathlib.Path( *path.parts[0:index+1] ) ) )
+        elif record is not None:
+            if record.kind == 'u':
+                # unmerged files need resolving in the working tree
+                file_state._setTracked()
+                file_state._setUnstaged( 'M', record )
 
-            node = node.getFolder( name )
+            else:
+                staged = record.stagedStatus()
+                if staged != 'D':
+                    file_state._setTracked()
+
+                if staged != '.' and not (record.kind == '2' and staged == 'R'):
+                    file_state._setStaged( staged, record, None )
+
+                unstaged = record.unstagedStatus()
+                if unstaged != '.':
+                    file_state._setUnstaged( unstaged, record )
 
-        self._debugTree( '__updateTree addFile %r to node %r' % (path, node) )
-        node.addFileByName( path )
-        self.flat_tree.addFileByPath( path )
+        elif renamed_record is None and not is_dir:
+            # not reported by git status so tracked and unchanged
+            file_state._setTracked()
+
+        return file_state
+
+    #
+    #   git's untracked cache saves git status from reading the folders
+    #   that have not changed. It is turned on for large projects that
+    #   have not configured it, setting core.untrackedCache to false
+    #   in the repo config turns it off for a project.
+    #
+    #   The split index is not turned on as GitPython cannot read it.
+    #
+    def __setupUntrackedCache( self ):
+        untracked_cache = self.__gitConfigValue( 'core.untrackedCache' )
+
+        if untracked_cache is None:
+            num_paths = sum( 1 for path in wb_git_status.gitLsFiles( self.repo ) )
+            if num_paths >= self.min_paths_for_untracked_cache:
+                try:
+                    untracked_cache = self.__enableUntrackedCache()
+
+                except GitCommandError as e:
+                    self.app.log.error( str(e) )
+
+        self.__use_untracked_cache = untracked_cache is not None and untracked_cache.lower() in ('true', 'yes', 'on', '1')
+
+    def __enableUntrackedCache( self ):
+        # the test waits for the mtimes to change and takes seconds
+        try:
+            self.repo.git.update_index( '--test-untracked-cache' )
+
+        except GitCommandError:
+            # remember that the file system cannot support the cache
+            self.repo.git.config( 'core.untrackedCache', 'false' )
+            self.app.log.info( T_('The git untracked cache does not work for project %s') % (self.projectName(),) )
+            return 'false'
+
+        self.repo.git.config( 'core.untrackedCache', 'true' )
+        self.repo.git.update_index( '--untracked-cache' )
+        self.app.log.info( T_('Turned on the git untracked cache for project %s') % (self.projectName(),) )
+        return 'true'
+
+    def __gitConfigValue( self, name ):
+        try:
+            return self.repo.git.config( '--get', name )
+
+        except GitCommandError:
+            # not set
+            return None
+
+    def __allIgnoreFiles( self, all_disk_paths ):
+        repo_root = self.projectPath()
+        return [repo_root / path for path in all_disk_paths if path.name == '.gitignore']
+
+    def __statusFingerprint( self, all_ignore_files ):
+        git_dir = pathlib.Path( self.repo.git_dir )
+
+        try:
+            head_commit_id = self.repo.head.commit.hexsha
+
+        except ValueError:
+            head_commit_id = None
+
+        return wb_git_status.GitStatusFingerprint( git_dir, head_commit_id, all_ignore_files )
+
+    def __setPathIndex( self, path_index ):
+        self.__path_index = path_index
+
+        self.tree = GitProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ), path_index )
+        self.flat_tree = GitProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ), path_index, is_by_path=True )
 
     def dumpTree( self ):
         if self._debugTree.isEnabled():
@@ -320,16 +1141,9 @@ class GitProject:
 
         last_pushed_commit_id = tracking_branch.commit.hexsha
 
-        all_unpushed_commits = []
-        for commit in self.repo.iter_commits( None ):
-            commit_id = commit.hexsha
-
-            if last_pushed_commit_id == commit_id:
-                break
-
-            all_unpushed_commits.append( commit )
-
-        return all_unpushed_commits
+        commit_cache = self.__commitCache()
+        return self.__commitLogNodes( commit_cache,
+                    commit_cache.allCommitIds( self.repo.head.commit.hexsha, stop_commit_id=last_pushed_commit_id ) )
 
     #------------------------------------------------------------
     #
@@ -348,23 +1162,63 @@ class GitProject:
         self._debug( 'cmdStage( %r )' % (filename,) )
 
         self.repo.git.add( filename )
-        self.__stale_index = True
+        self.__all_stale_paths.add( filename )
 
     def cmdUnstage( self, rev, filename ):
         self._debug( 'cmdUnstage( %r )' % (filename,) )
 
         self.repo.git.reset( 'HEAD', filename, mixed=True )
-        self.__stale_index = True
+        self.__all_stale_paths.add( filename )
 
     def cmdRevert( self, rev, filename ):
         self._debug( 'cmdRevert( %r, %r )' % (rev, filename) )
 
         self.repo.git.checkout( rev, filename )
-        self.__stale_index = True
+        self.__all_stale_paths.add( filename )
 
     def cmdDelete( self, filename ):
         (self.prefs_project.path / filename).unlink()
-        self.__stale_index = True
+        self.__all_stale_paths.add( filename )
+
+    #
+    #   The Many versions of the cmd functions run one git command for
+    #   all the filenames. The filenames are given to git on stdin with
+    #   --pathspec-from-file so there is no limit on the number of them.
+    #
+    def cmdStageMany( self, all_filenames ):
+        self._debug( 'cmdStageMany( %d files )' % (len(all_filenames),) )
+
+        with self.__pathspecFile( all_filenames ) as pathspec_file:
+            self.repo.git.add( pathspec_from_file='-', pathspec_file_nul=True, istream=pathspec_file )
+
+        self.__all_stale_paths.update( all_filenames )
+
+    def cmdUnstageMany( self, rev, all_filenames ):
+        self._debug( 'cmdUnstageMany( %r, %d files )' % (rev, len(all_filenames)) )
+
+        with self.__pathspecFile( all_filenames ) as pathspec_file:
+            self.repo.git.reset( rev, pathspec_from_file='-', pathspec_file_nul=True, istream=pathspec_file )
+
+        self.__all_stale_paths.update( all_filenames )
+
+    def cmdRevertMany( self, rev, all_filenames ):
+        self._debug( 'cmdRevertMany( %r, %d files )' % (rev, len(all_filenames)) )
+
+        # rev '--' reverts to the staged version
+        all_args = [] if rev == '--' else [rev]
+
+        with self.__pathspecFile( all_filenames ) as pathspec_file:
+            self.repo.git.checkout( *all_args, pathspec_from_file='-', pathspec_file_nul=True, istream=pathspec_file )
+
+        self.__all_stale_paths.update( all_filenames )
+
+    def __pathspecFile( self, all_filenames ):
+        # literal pathspecs so that names with glob characters match only themselves
+        pathspec_file = tempfile.TemporaryFile()
+        pathspec_file.write( b'\0'.join( [os.fsencode( ':(literal)%s' % (pathlib.PurePosixPath( filename ),) )
+                                            for filename in all_filenames] ) )
+        pathspec_file.seek( 0 )
+        return pathspec_file
 
     def cmdRename( self, filename, new_filename ):
         filestate = self.getFileState( filename )
@@ -380,7 +1234,8 @@ class GitProject:
             except IOError as e:
                 self.app.log.error( 'Renamed failed - %s' % (e,) )
 
-        self.__stale_index = True
+        self.__all_stale_paths.add( filename )
+        self.__all_stale_paths.add( new_filename )
 
     def cmdDiffFolder( self, folder, head, staged ):
         if head and staged:
@@ -420,74 +1275,71 @@ class GitProject:
             return all_lines
 
     def cmdCommit( self, message ):
-        self.__stale_index = True
         return self.index.commit( message )
 
     def cmdCommitLogAfterCommitId( self, commit_id ):
         if not self.hasCommits():
             return []
 
-        all_commit_logs = []
-
-        for commit in self.repo.iter_commits( None ):
-            if commit.hexsha == commit_id:
-                break
+        commit_cache = self.__commitCache()
+        return self.__commitLogNodes( commit_cache,
+                    commit_cache.allCommitIds( self.repo.head.commit.hexsha, stop_commit_id=commit_id ) )
 
-            all_commit_logs.append( GitCommitLogNode( commit ) )
+    # when changed_files is False the changes of a commit
+    # are found by cmdChangedFilesForLog() when they are needed
+    def cmdCommitLogForRepository( self, progress_callback, limit=None, since=None, until=None, changed_files=True ):
+        return self.cmdCommitLogWalkForRepository( progress_callback, since, until, changed_files ).nextCommitLogs( limit )
 
-        return all_commit_logs
+    def cmdCommitLogForFile( self, progress_callback, filename, limit=None, since=None, until=None, changed_files=True ):
+        return self.cmdCommitLogWalkForFile( progress_callback, filename, since, until, changed_files ).nextCommitLogs( limit )
 
-    def cmdCommitLogForRepository( self, progress_callback, limit=None, since=None, until=None ):
+    # the walks return the commit logs a page at a time
+    def cmdCommitLogWalkForRepository( self, progress_callback, since=None, until=None, changed_files=True ):
         if not self.hasCommits():
-            return []
-
-        all_commit_logs = []
-
-        kwds = {}
-        if limit is not None:
-            kwds['max_count'] = limit
-        if since is not None:
-            kwds['since'] = since
-        if since is not None:
-            kwds['until'] = until
-
-        for commit in self.repo.iter_commits( None, **kwds ):
-            all_commit_logs.append( GitCommitLogNode( commit ) )
+            return GitCommitLogWalk( iter( () ), None )
 
-        total = len(all_commit_logs)
-        progress_callback( 0, total )
+        commit_cache = self.__commitCache()
+        all_commit_ids = commit_cache.iterCommitIds( self.repo.head.commit.hexsha, since, until )
 
-        self.__addCommitChangeInformation( progress_callback, all_commit_logs )
-        progress_callback( total, total )
-
-        return all_commit_logs
+        return GitCommitLogWalk( all_commit_ids, functools.partial( self.__commitLogPage, progress_callback, changed_files ) )
 
-    def cmdCommitLogForFile( self, progress_callback, filename, limit=None, since=None, until=None ):
+    def cmdCommitLogWalkForFile( self, progress_callback, filename, since=None, until=None, changed_files=True ):
         if not self.hasCommits():
-            return []
+            return GitCommitLogWalk( iter( () ), None )
 
-        all_commit_logs = []
+        progress_callback( 0, 0 )
+        commit_cache = self.__commitCache()
 
-        kwds = {}
-        if limit is not None:
-            kwds['max_count'] = limit
-        if since is not None:
-            kwds['since'] = since
-        if since is not None:
-            kwds['until'] = until
+        # git finds the commits that changed filename, the cache has the rest
+        all_commit_ids = commit_cache.iterFilteredCommitIds( self.repo.git.rev_list( 'HEAD', '--', str(filename) ).split(), since, until )
 
-        progress_callback( 0, 0 )
-        for commit in self.repo.iter_commits( None, str(filename), **kwds ):
-            all_commit_logs.append( GitCommitLogNode( commit ) )
+        return GitCommitLogWalk( all_commit_ids, functools.partial( self.__commitLogPage, progress_callback, changed_files ) )
+
+    def __commitLogPage( self, progress_callback, changed_files, all_commit_ids ):
+        all_commit_logs = self.__commitLogNodes( self.__commit_cache, all_commit_ids )
 
         total = len(all_commit_logs)
         progress_callback( 0, total )
 
-        self.__addCommitChangeInformation( progress_callback, all_commit_logs )
+        if changed_files:
+            self.__addCommitChangeInformation( progress_callback, all_commit_logs )
+
         progress_callback( total, total )
 
         return all_commit_logs
 
+    def __commitCache( self ):
+        # brings the commit cache up to date with the refs
+        if self.__commit_cache is None:
+            self.__commit_cache = wb_git_commit_cache.GitCommitCache( self.repo )
+
+        self.__commit_cache.update()
+        return self.__commit_cache
+
+    def __commitLogNodes( self, commit_cache, all_commit_ids ):
+        all_records = commit_cache.commitRecords( all_commit_ids )
+        return [GitCommitLogNode( all_records[ commit_id ] ) for commit_id in all_commit_ids]
+
     def cmdTagsForRepository( self ):
         tag_name_by_id = {}
         for tag in self.repo.tags:
@@ -495,70 +1347,69 @@ class GitProject:
 
         return tag_name_by_id
 
-    def __addCommitChangeInformation( self, progress_callback, all_commit_logs ):
-        # now calculate what was added, deleted and modified in each commit
-        total = len(all_commit_logs)
-        for offset in range( total ):
-            progress_callback( offset, total )
-            new_tree = all_commit_logs[ offset ].commitTree()
-            old_tree = all_commit_logs[ offset ].commitPreviousTree()
-
-            all_new = {}
-            self.__treeToDict( new_tree, all_new )
-            new_set = set(all_new)
+    def cmdChangedFilesForLog( self, log ):
+        all_changes = log.commitFileChanges()
+        if all_changes is not None:
+            return all_changes
 
-            if old_tree is None:
-                all_commit_logs[ offset ]._addChanges( new_set, set(), [], set() )
+        commit_id = log.commitId()
+        if commit_id in self.__all_commit_changes:
+            self.__all_commit_changes.move_to_end( commit_id )
+            return self.__all_commit_changes[ commit_id ]
 
-            else:
-                all_old = {}
-                self.__treeToDict( old_tree, all_old )
+        all_saved_changes = self.__commit_cache.fileChanges( [commit_id] )
+        if commit_id in all_saved_changes:
+            all_changes = all_saved_changes[ commit_id ]
 
-                old_set = set(all_old)
+        else:
+            changes, = wb_git_diff_tree.gitCommitChanges( self.repo, [(commit_id, log.commitPreviousId())] )
+            all_changes = allFileChanges( changes.all_added, changes.all_deleted, changes.all_renamed, changes.all_modified )
+            self.__commit_cache.setFileChanges( {commit_id: all_changes} )
 
-                all_added = new_set - old_set
-                all_deleted = old_set - new_set
+        self.__all_commit_changes[ commit_id ] = all_changes
+        if len(self.__all_commit_changes) > self.changed_files_cache_size:
+            self.__all_commit_changes.popitem( last=False )
 
-                all_renamed = []
+        return all_changes
 
-                # look for renames
-                if len(all_added) > 0 and len(all_deleted) > 0:
-                    all_old_id_to_name = {}
-                    for name in all_deleted:
-                        all_old_id_to_name[ all_old[ name ] ] = name
+    #
+    #   git diff-tree reports only the paths that each commit changed
+    #   compared to its first parent. Only renames of files with the
+    #   same contents are reported as renames.
+    #
+    #   The changes are saved in the commit cache.
+    #
+    def __addCommitChangeInformation( self, progress_callback, all_commit_logs ):
+        total = len(all_commit_logs)
 
-                    for name in list(all_added):
-                        id_ = all_new[ name ]
+        all_saved_changes = self.__commit_cache.fileChanges( [node.commitId() for node in all_commit_logs] )
 
-                        if id_ in all_old_id_to_name:
-                            old_name = all_old_id_to_name[ id_ ]
+        all_new_logs = []
+        for node in all_commit_logs:
+            if node.commitId() in all_saved_changes:
+                node._setChanges( all_saved_changes[ node.commitId() ] )
 
-                            # converted svn repos can have trees that cannot
-                            # be used to figure out the rename
-                            # for example when the checkin deletes a folder
-                            # which cannot be expressed in git trees
-                            if( old_name in all_added
-                            and old_name in all_deleted ):
-                                all_added.remove( name )
-                                all_deleted.remove( old_name )
-                                all_renamed.append( (name, old_name) )
+            else:
+                all_new_logs.append( node )
 
-                all_modified = set()
+        all_commit_ids = [(node.commitId(), node.commitPreviousId()) for node in all_new_logs]
 
-                for key in all_new:
-                    if( key in all_old
-                    and all_new[ key ] != all_old[ key ] ):
-                        all_modified.add( key )
+        if( self.change_worker_processes > 0
+        and len(all_commit_ids) >= self.min_commits_for_change_workers ):
+            executor = self.ui_components.factory.change_worker_pool.executor( self.change_worker_processes )
+            all_commit_changes = wb_git_diff_tree.gitCommitChangesInParallel( executor, self.repo, all_commit_ids,
+                                    self.change_worker_shard_size )
 
-                all_commit_logs[ offset ]._addChanges( all_added, all_deleted, all_renamed, all_modified )
+        else:
+            all_commit_changes = wb_git_diff_tree.gitCommitChanges( self.repo, all_commit_ids )
 
-    def __treeToDict( self, tree, all_entries ):
-        for blob in tree:
-            if blob.type == 'blob':
-                all_entries[ blob.path ] = blob.hexsha
+        all_new_changes = {}
+        for offset, changes in enumerate( all_commit_changes ):
+            progress_callback( total - len(all_new_logs) + offset, total )
+            all_new_logs[ offset ]._addChanges( changes.all_added, changes.all_deleted, changes.all_renamed, changes.all_modified )
+            all_new_changes[ changes.commit_id ] = all_new_logs[ offset ].commitFileChanges()
 
-        for child in tree.trees:
-            self.__treeToDict( child, all_entries )
+        self.__commit_cache.setFileChanges( all_new_changes )
 
     def cmdAnnotationForFile( self, filename, rev=None ):
         if rev is None:
@@ -579,9 +1430,9 @@ class GitProject:
     def cmdCommitLogForAnnotateFile( self, filename, all_commit_ids ):
         all_commit_logs = {}
 
-        for commit_id in all_commit_ids:
-            commit = self.repo.commit( commit_id )
-            all_commit_logs[ commit_id ] = GitCommitLogNode( commit )
+        commit_cache = self.__commitCache()
+        for commit_id, record in commit_cache.commitRecords( all_commit_ids ).items():
+            all_commit_logs[ commit_id ] = GitCommitLogNode( record )
 
         return all_commit_logs
 
@@ -624,7 +1475,21 @@ class GitProject:
             raise
 
 
+#
+#   There is a WbGitFileState for every file in the working tree
+#   so it is kept small. The booleans are bits in __flags and the
+#   blobs are only created when a diff needs them.
+#
 class WbGitFileState:
+    __slots__ = ('__project', '__filepath', '__flags', '__staged_abbrev', '__unstaged_abbrev',
+                 '__renamed_to', '__head_blob_info', '__staged_blob_info')
+
+    __flag_is_dir               = 0x01
+    __flag_tracked              = 0x02
+    __flag_untracked            = 0x04
+    __flag_staged_is_modified   = 0x08
+    __flag_unstaged_is_modified = 0x10
+
     def __init__( self, project, filepath ):
         assert isinstance( project, GitProject ),'expecting GitProject got %r' % (project,)
         assert isinstance( filepath, pathlib.Path ), 'expecting pathlib.Path got %r' % (filepath,)
@@ -632,28 +1497,20 @@ class WbGitFileState:
         self.__project = project
         self.__filepath = filepath
 
-        self.__is_dir = False
-
-        self.__index_entry = None
-        self.__unstaged_diff = None
-        self.__staged_diff = None
-        self.__untracked = False
-
-        # from the above calculate the following
-        self.__state_calculated = False
+        self.__flags = 0
 
-        self.__staged_is_modified = False
-        self.__unstaged_is_modified = False
+        self.__staged_abbrev = ''
+        self.__unstaged_abbrev = ''
 
-        self.__staged_abbrev = None
-        self.__unstaged_abbrev = None
+        self.__renamed_to = None
 
-        self.__head_blob = None
-        self.__staged_blob = None
+        # (sha, mode) of the blobs
+        self.__head_blob_info = None
+        self.__staged_blob_info = None
 
     def __repr__( self ):
-        return ('<WbGitFileState: calc %r, S=%r, U=%r' %
-                (self.__state_calculated, self.__staged_abbrev, self.__unstaged_abbrev))
+        return ('<WbGitFileState: S=%r, U=%r' %
+                (self.__staged_abbrev, self.__unstaged_abbrev))
 
     def relativePath( self ):
         return self.__filepath
@@ -663,125 +1520,94 @@ class WbGitFileState:
 
     def renamedToFilename( self ):
         assert self.isStagedRenamed()
-        return self.__staged_diff.rename_from
+        return self.__renamed_to
 
     def setIsDir( self ):
-        self.__is_dir = True
+        self.__flags |= self.__flag_is_dir
 
     def isDir( self ):
-        return self.__is_dir
+        return self.__flags&self.__flag_is_dir != 0
 
-    def setIndexEntry( self, index_entry ):
-        self.__index_entry = index_entry
+    def _setTracked( self ):
+        self.__flags |= self.__flag_tracked
 
-    def _addStaged( self, diff ):
-        self.__state_calculated = False
-        self.__staged_diff = diff
+    def _setStaged( self, abbrev, record, renamed_to ):
+        if abbrev in ('M', 'T'):
+            self.__staged_abbrev = 'M'
+            self.__flags |= self.__flag_staged_is_modified
+            self.__head_blob_info = (record.sha_head, record.mode_head)
+            self.__staged_blob_info = (record.sha_index, record.mode_index)
 
-    def _addUnstaged( self, diff ):
-        self.__state_calculated = False
-        self.__unstaged_diff = diff
-
-    def _setUntracked( self ):
-        self.__untracked = True
-
-    # from the provided info work out
-    # interesting properies
-    def __calculateState( self ):
-        if self.__state_calculated:
-            return
-
-        if self.__staged_diff is None:
-            self.__staged_abbrev = ''
+        elif abbrev == 'C':
+            self.__staged_abbrev = 'A'
 
         else:
-            if self.__staged_diff.renamed:
-                self.__staged_abbrev = 'R'
+            self.__staged_abbrev = abbrev
+            self.__renamed_to = renamed_to
 
-            elif self.__staged_diff.deleted_file:
-                self.__staged_abbrev = 'A'
-
-            elif self.__staged_diff.new_file:
-                self.__staged_abbrev = 'D'
-
-            else:
-                self.__staged_abbrev = 'M'
-                self.__staged_is_modified = True
-                self.__head_blob = self.__staged_diff.b_blob
-                self.__staged_blob = self.__staged_diff.a_blob
-
-        if  self.__unstaged_diff is None:
-            self.__unstaged_abbrev = ''
+    def _setUnstaged( self, abbrev, record ):
+        if abbrev in ('M', 'T'):
+            self.__unstaged_abbrev = 'M'
+            self.__flags |= self.__flag_unstaged_is_modified
+            if self.__head_blob_info is None:
+                self.__head_blob_info = (record.sha_index, record.mode_index)
 
         else:
-            if self.__unstaged_diff.deleted_file:
-                self.__unstaged_abbrev = 'D'
-
-            elif self.__unstaged_diff.new_file:
-                self.__unstaged_abbrev = 'A'
+            self.__unstaged_abbrev = abbrev
 
-            else:
-                self.__unstaged_abbrev = 'M'
-                self.__unstaged_is_modified = True
-                if self.__head_blob is None:
-                    self.__head_blob = self.__unstaged_diff.a_blob
-
-        self.__state_calculated = True
+    def _setUntracked( self ):
+        self.__flags |= self.__flag_untracked
 
     def getStagedAbbreviatedStatus( self ):
-        self.__calculateState()
         return self.__staged_abbrev
 
     def getUnstagedAbbreviatedStatus( self ):
-        self.__calculateState()
         return self.__unstaged_abbrev
 
+    def getRemoteAbbreviatedStatus( self ):
+        # QQQ here for Svn compat - bad OO design here
+        return ''
+
     #------------------------------------------------------------
     def isControlled( self ):
-        if self.__staged_diff is not None and self.__staged_diff.renamed:
+        if self.__staged_abbrev == 'R':
             return True
 
-        return self.__index_entry is not None
+        return self.__flags&self.__flag_tracked != 0
 
     def isUncontrolled( self ):
-        return self.__untracked
+        return self.__flags&self.__flag_untracked != 0
 
     def isIgnored( self ):
-        if self.__staged_diff is not None and self.__staged_diff.renamed:
+        if self.__staged_abbrev == 'R':
             return False
 
-        if self.__index_entry is not None:
+        if self.__flags&self.__flag_tracked != 0:
             return False
 
         # untracked files have had ignored files striped out
-        if self.__untracked:
+        if self.__flags&self.__flag_untracked != 0:
             return False
 
         return True
 
     # ------------------------------
     def isStagedNew( self ):
-        self.__calculateState()
         return self.__staged_abbrev == 'A'
 
     def isStagedModified( self ):
-        self.__calculateState()
         return self.__staged_abbrev == 'M'
 
     def isStagedDeleted( self ):
-        self.__calculateState()
         return self.__staged_abbrev == 'D'
 
     def isStagedRenamed( self ):
-        self.__calculateState()
         return self.__staged_abbrev == 'R'
 
     def isUnstagedModified( self ):
-        self.__calculateState()
         return self.__unstaged_abbrev == 'M'
 
     def isUnstagedDeleted( self ):
-        self.__calculateState()
         return self.__unstaged_abbrev == 'D'
 
     # ------------------------------------------------------------
@@ -789,7 +1615,7 @@ class WbGitFileState:
         return self.__staged_abbrev != ''
 
     def canStage( self ):
-        return self.__unstaged_abbrev != '' or self.__untracked
+        return self.__unstaged_abbrev != '' or self.isUncontrolled()
 
     def canUnstage( self ):
         return self.__staged_abbrev != ''
@@ -802,16 +1628,13 @@ class WbGitFileState:
 
     # ------------------------------------------------------------
     def canDiffHeadVsStaged( self ):
-        self.__calculateState()
-        return self.__staged_is_modified
+        return self.__flags&self.__flag_staged_is_modified != 0
 
     def canDiffStagedVsWorking( self ):
-        self.__calculateState()
-        return self.__unstaged_is_modified and self.__staged_is_modified
+        return self.canDiffHeadVsStaged() and self.canDiffHeadVsWorking()
 
     def canDiffHeadVsWorking( self ):
-        self.__calculateState()
-        return self.__unstaged_is_modified
+        return self.__flags&self.__flag_unstaged_is_modified != 0
 
     def getTextLinesWorking( self ):
         path = self.absolutePath()
@@ -847,82 +1670,124 @@ class WbGitFileState:
             return all_lines
 
     def getHeadBlob( self ):
-        return self.__head_blob
+        return self.__blobFromInfo( self.__head_blob_info )
 
     def getStagedBlob( self ):
-        return self.__staged_blob
+        return self.__blobFromInfo( self.__staged_blob_info )
 
-class GitCommitLogNode:
-    def __init__( self, commit ):
-        self.__commit = commit
-        self.__all_changes = []
+    def __blobFromInfo( self, blob_info ):
+        if blob_info is None:
+            return None
 
-    def _addChanges( self, all_added, all_deleted, all_renamed, all_modified ):
-        for name in all_added:
-            self.__all_changes.append( ('A', name, '' ) )
+        sha, mode = blob_info
+        git_filepath = pathlib.PurePosixPath( self.__filepath )
+        return git.Blob( self.__project.repo, binascii.a2b_hex( sha ), mode, str(git_filepath) )
+
+#
+#   GitCommitLogWalk returns the commit logs of a log history a page
+#   at a time so that only the commits that are shown are read. The
+#   commit ids are walked as each page is asked for.
+#
+class GitCommitLogWalk:
+    def __init__( self, all_commit_ids, commit_log_page ):
+        self.__all_commit_ids = all_commit_ids
+        # makes the commit logs of a list of commit ids
+        self.__commit_log_page = commit_log_page
+
+        self.__num_commit_logs = 0
+        self.__is_finished = False
 
-        for name in all_deleted:
-            self.__all_changes.append( ('D', name, '' ) )
+    def __repr__( self ):
+        return '<GitCommitLogWalk: %d commit logs finished %r>' % (self.__num_commit_logs, self.__is_finished)
 
-        for name, old_name in all_renamed:
-            self.__all_changes.append( ('R', name, old_name ) )
+    def isFinished( self ):
+        return self.__is_finished
 
-        for name in all_modified:
-            self.__all_changes.append( ('M', name, '' ) )
+    def numCommitLogs( self ):
+        return self.__num_commit_logs
 
-    def commitTree( self ):
-        return self.__commit.tree
+    def nextCommitLogs( self, count=None ):
+        # the next count commit logs, all of the rest when count is None
+        all_commit_ids = list( itertools.islice( self.__all_commit_ids, count ) )
+        if count is None or len(all_commit_ids) < count:
+            self.__is_finished = True
 
-    def commitPreviousTree( self ):
-        if len(self.__commit.parents) == 0:
-            return None
+        if len(all_commit_ids) == 0:
+            return []
+
+        self.__num_commit_logs += len(all_commit_ids)
+        return self.__commit_log_page( all_commit_ids )
+
+def allFileChanges( all_added, all_deleted, all_renamed, all_modified ):
+    # the (action, name, old name) of each change to a file
+    all_changes = []
+
+    for name in all_added:
+        all_changes.append( ('A', name, '' ) )
+
+    for name in all_deleted:
+        all_changes.append( ('D', name, '' ) )
 
-        previous_commit = self.__commit.parents[0]
-        return previous_commit.tree
+    for name, old_name in all_renamed:
+        all_changes.append( ('R', name, old_name ) )
 
-    def commitTreeDict( self ):
-        all_entries = {}
-        self.__treeToDict( self.commitTree(), all_entries )
-        return all_entries
+    for name in all_modified:
+        all_changes.append( ('M', name, '' ) )
 
-    def commitPreviousTreeDict( self ):
-        all_entries = {}
+    return all_changes
 
-        tree = self.commitPreviousTree()
-        if tree is not None:
-            self.__treeToDict( tree, all_entries )
+class GitCommitLogNode:
+    def __init__( self, record ):
+        # record is a GitCommitRecord from the commit cache
+        self.__record = record
+        # None until the changes are added
+        self.__all_changes = None
+
+    def _addChanges( self, all_added, all_deleted, all_renamed, all_modified ):
+        self.__all_changes = allFileChanges( all_added, all_deleted, all_renamed, all_modified )
 
-        return all_entries
+    def _setChanges( self, all_changes ):
+        self.__all_changes = all_changes
+
+    def commitPreviousId( self ):
+        if len(self.__record.parent_ids) == 0:
+            return None
+
+        return self.__record.parent_ids[0]
 
     def commitId( self ):
-        return self.__commit.hexsha
+        return self.__record.commit_id
 
     def commitIdString( self ):
-        return self.__commit.hexsha
+        return self.__record.commit_id
 
     def commitAuthor( self ):
-        return self.__commit.author.name
+        return self.__record.author_name
 
     def commitAuthorEmail( self ):
-        return self.__commit.author.email
+        return self.__record.author_email
 
     def commitDate( self ):
-        return self.__commit.committed_datetime
+        return self.__record.committedDatetime()
 
     def commitMessage( self ):
-        return self.__commit.message
+        return self.__record.message
 
     def commitFileChanges( self ):
         return self.__all_changes
 
+#
+#   GitProjectTreeNode is a view of one folder in a PathIndex.
+#   The folder nodes are only created when they are looked at.
+#
 class GitProjectTreeNode:
-    def __init__( self, project, name, path ):
+    def __init__( self, project, name, path, path_index, is_by_path=False ):
         self.project = project
         self.name = name
-        self.is_by_path = False
+        self.is_by_path = is_by_path
         self.__path = path
+        self.__path_index = path_index
         self.__all_folders = {}
-        self.__all_files = {}
 
     def __repr__( self ):
         return '<GitProjectTreeNode: project %r, path %s>' % (self.project, self.__path)
@@ -930,46 +1795,44 @@ class GitProjectTreeNode:
     def isByPath( self ):
         return self.is_by_path
 
-    def addFileByName( self, path ):
-        assert path.name != ''
-        self.__all_files[ path.name ] = path
-
-    def addFileByPath( self, path ):
-        assert path.name != ''
-        self.is_by_path = True
-        path = path
-        self.__all_files[ path ] = path
-
     def getAllFileNames( self ):
-        return self.__all_files.keys()
+        if self.is_by_path:
+            return list( self.__path_index.allPaths() )
 
-    def addFolder( self, name, node ):
-        assert type(name) == str and name != '', 'name %r, node %r' % (name, node)
-        assert isinstance( node, GitProjectTreeNode )
-        self.__all_folders[ name ] = node
+        return self.__path_index.allChildNames( self.__path )
 
     def getFolder( self, name ):
         assert type(name) == str
+        if name not in self.__all_folders:
+            assert self.hasFolder( name ), 'name %r, node %r' % (name, self)
+            self.__all_folders[ name ] = GitProjectTreeNode( self.project, name, self.__path / name, self.__path_index )
+
         return self.__all_folders[ name ]
 
     def getAllFolderNodes( self ):
-        return self.__all_folders.values()
+        return [self.getFolder( name ) for name in self.getAllFolderNames()]
 
     def getAllFolderNames( self ):
-        return self.__all_folders.keys()
+        if self.is_by_path:
+            return set()
+
+        return self.__path_index.allSubFolderNames( self.__path )
 
     def hasFolder( self, name ):
         assert type(name) == str
-        return name in self.__all_folders
+        return name in self.getAllFolderNames()
+
+    def numChangedFiles( self ):
+        return self.__path_index.numChangedPaths( self.__path )
 
     def _dumpTree( self, indent ):
         self.project._debug( 'dump: %*s%r' % (indent, '', self) )
 
-        for file in sorted( self.__all_files ):
+        for file in sorted( self.getAllFileNames() ):
             self.project._debug( 'dump %*s   file: %r' % (indent, '', file) )
 
-        for folder in sorted( self.__all_folders ):
-            self.__all_folders[ folder ]._dumpTree( indent+4 )
+        for folder in sorted( self.getAllFolderNames() ):
+            self.getFolder( folder )._dumpTree( indent+4 )
 
     def isNotEqual( self, other ):
         return (self.relativePath() != other.relativePath()
@@ -985,7 +1848,12 @@ class GitProjectTreeNode:
         return self.project.projectPath() / self.__path
 
     def getStatusEntry( self, name ):
-        path = self.__all_files[ name ]
+        if self.is_by_path:
+            path = name
+
+        else:
+            path = self.__path_index.childPath( self.__path, name )
+
         if path in self.project.all_file_state:
             entry = self.project.all_file_state[ path ]
         else:
@@ -0,0 +1,261 @@
+'''
+ ====================================================================
+ Copyright (c) 2016 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_git_status.py
+
+    run "git status --porcelain=v2 -z" and parse the output
+    as it arrives from the git process
+
+'''
+import os
+import pathlib
+
+import git
+
+import wb_marshal_file
+
+# the size of each read from the git pipes
+read_chunk_size = 256*1024
+
+class GitStatusRecord:
+    __slots__ = ('kind', 'xy', 'mode_head', 'mode_index', 'sha_head', 'sha_index', 'path', 'orig_path')
+
+    # kind is one of
+    #   '1' - ordinary changed entry
+    #   '2' - renamed or copied entry, orig_path is the HEAD path
+    #   'u' - unmerged entry
+    #   '?' - untracked file
+    #   '!' - ignored file
+    def __init__( self, kind, path ):
+        self.kind = kind
+        self.path = path
+
+        self.xy = '..'
+        self.mode_head = None
+        self.mode_index = None
+        self.sha_head = None
+        self.sha_index = None
+        self.orig_path = None
+
+    def __repr__( self ):
+        return '<GitStatusRecord: %s %s %r %r>' % (self.kind, self.xy, self.path, self.orig_path)
+
+    def isNotEqual( self, other ):
+        return (self.kind != other.kind
+            or self.xy != other.xy
+            or self.sha_head != other.sha_head
+            or self.sha_index != other.sha_index
+            or self.mode_head != other.mode_head
+            or self.mode_index != other.mode_index
+            or self.orig_path != other.orig_path)
+
+    def asTuple( self ):
+        return (self.kind, self.xy, self.mode_head, self.mode_index, self.sha_head, self.sha_index, self.path, self.orig_path)
+
+    def stagedStatus( self ):
+        return self.xy[0]
+
+    def unstagedStatus( self ):
+        return self.xy[1]
+
+def statusRecordFromTuple( all_fields ):
+    kind, xy, mode_head, mode_index, sha_head, sha_index, path, orig_path = all_fields
+
+    record = GitStatusRecord( kind, path )
+    record.xy = xy
+    record.mode_head = mode_head
+    record.mode_index = mode_index
+    record.sha_head = sha_head
+    record.sha_index = sha_index
+    record.orig_path = orig_path
+
+    return record
+
+def gitStatusPorcelainV2( repo, all_paths=None, untracked=True, ignored=True, optional_locks=True, untracked_cache=False ):
+    args = ['--porcelain=v2', '-z']
+    if untracked:
+        args.append( '--untracked-files=all' )
+        if ignored:
+            args.append( '--ignored' )
+
+    else:
+        args.append( '--untracked-files=no' )
+
+    if all_paths is not None:
+        # paths are relative to the top of the working tree
+        # and must not be treated as patterns
+        args.append( '--' )
+        args.extend( [':(top,literal)%s' % (pathlib.PurePosixPath( path ),) for path in all_paths] )
+
+    git_cmd = repo.git
+    if untracked_cache:
+        # git only uses the untracked cache with the untracked
+        # files mode that is configured and never with --ignored
+        git_cmd = git_cmd( c='status.showUntrackedFiles=all' )
+
+    if optional_locks:
+        proc = git_cmd.status( *args, as_process=True )
+
+    else:
+        # stop git status refreshing the index, which would be
+        # seen as a change by a working tree watcher
+        proc = git_cmd.status( *args, as_process=True, env={'GIT_OPTIONAL_LOCKS': '0'} )
+
+    yield from parsePorcelainV2( allChunks( proc ) )
+
+    # raises GitCommandError if git status failed
+    proc.wait()
+
+def gitLsFiles( repo ):
+    # yields the path of every file in the index in the
+    # form used by wb_working_tree_walker
+    proc = repo.git.ls_files( '-z', as_process=True )
+
+    partial_field = b''
+    for chunk in allChunks( proc ):
+        all_fields = (partial_field + chunk).split( b'\0' )
+        partial_field = all_fields.pop()
+
+        for field in all_fields:
+            path = os.fsdecode( field )
+            if os.sep != '/':
+                path = path.replace( '/', os.sep )
+
+            yield path
+
+    proc.wait()
+
+def gitSubmodulePaths( repo ):
+    # yields the path of each submodule in .gitmodules
+    # in the form used by wb_working_tree_walker
+    gitmodules = pathlib.Path( repo.working_tree_dir ) / '.gitmodules'
+    if not gitmodules.exists():
+        return
+
+    try:
+        output = repo.git.config( '-z', '--file', str(gitmodules), '--get-regexp', r'^submodule\..*\.path$' )
+
+    except git.GitCommandError:
+        # no submodule has a path
+        return
+
+    for entry in output.split( '\0' ):
+        if entry == '':
+            continue
+
+        # the name and value are separated by a newline
+        _, _, path = entry.partition( '\n' )
+        if os.sep != '/':
+            path = path.replace( '/', os.sep )
+
+        yield path
+
+def allChunks( proc ):
+    while True:
+        chunk = proc.stdout.read( read_chunk_size )
+        if len(chunk) == 0:
+            break
+
+        yield chunk
+
+def parsePorcelainV2( all_chunks ):
+    # record fields are NUL terminated, only the rename
+    # record '2' is followed by a second NUL terminated field
+    partial_field = b''
+    rename_record = None
+
+    for chunk in all_chunks:
+        all_fields = (partial_field + chunk).split( b'\0' )
+        partial_field = all_fields.pop()
+
+        for field in all_fields:
+            if rename_record is not None:
+                rename_record.orig_path = os.fsdecode( field )
+                yield rename_record
+                rename_record = None
+                continue
+
+            if len(field) == 0:
+                continue
+
+            record = parsePorcelainV2Field( field )
+            if record is None:
+                continue
+
+            if record.kind == '2':
+                rename_record = record
+
+            else:
+                yield record
+
+    assert partial_field == b'' and rename_record is None, 'git status output truncated'
+
+def parsePorcelainV2Field( field ):
+    kind = chr( field[0] )
+
+    if kind in ('?', '!'):
+        # ? <path>
+        return GitStatusRecord( kind, os.fsdecode( field[2:] ) )
+
+    if kind == '1':
+        # 1 <XY> <sub> <mH> <mI> <mW> <hH> <hI> <path>
+        all_parts = field.split( b' ', 8 )
+
+    elif kind == '2':
+        # 2 <XY> <sub> <mH> <mI> <mW> <hH> <hI> <X><score> <path>
+        all_parts = field.split( b' ', 9 )
+        del all_parts[8]
+
+    elif kind == 'u':
+        # u <XY> <sub> <m1> <m2> <m3> <mW> <h1> <h2> <h3> <path>
+        # stage 2 is ours, treat it as the index side
+        all_parts = field.split( b' ', 10 )
+        all_parts = [all_parts[0], all_parts[1], all_parts[2], all_parts[3], all_parts[4], all_parts[6], all_parts[7], all_parts[8], all_parts[10]]
+
+    else:
+        # header lines are only output with --branch
+        return None
+
+    record = GitStatusRecord( kind, os.fsdecode( all_parts[8] ) )
+    record.xy = all_parts[1].decode( 'ascii' )
+    record.mode_head = int( all_parts[3], 8 )
+    record.mode_index = int( all_parts[4], 8 )
+    record.sha_head = all_parts[6].decode( 'ascii' )
+    record.sha_index = all_parts[7].decode( 'ascii' )
+
+    return record
+
+#
+#   GitStatusFingerprint records the things that decide which
+#   files git status reports as untracked or ignored.
+#
+#   The folder mtimes change when entries are added to or
+#   removed from a folder, which is what makes new untracked
+#   files appear.
+#
+class GitStatusFingerprint:
+    def __init__( self, git_dir, head_commit_id, all_ignore_files ):
+        self.index_key = wb_marshal_file.statKey( git_dir / 'index' )
+        self.head_commit_id = head_commit_id
+
+        self.all_ignore_file_keys = {}
+        for path in all_ignore_files:
+            self.all_ignore_file_keys[ path ] = wb_marshal_file.statKey( path )
+
+        # relative folder path -> st_mtime_ns
+        self.all_folder_mtimes = {}
+
+    def __repr__( self ):
+        return ('<GitStatusFingerprint: index %r, head %s, folders %d>' %
+                (self.index_key, self.head_commit_id, len(self.all_folder_mtimes)))
+
+    def isUntrackedStale( self, other ):
+        return (self.index_key != other.index_key
+            or self.head_commit_id != other.head_commit_id
+            or self.all_ignore_file_keys != other.all_ignore_file_keys)
@@ -51,7 +51,7 @@ class WbGitStatusView(wb_tracked_qwidget.WbTrackedModelessQWidget):
         self.resize( 100*em, 50*ex )
 
     def setStatus( self, all_unpushed_commits, all_staged_files, all_untracked_files ):
-        unpushed_text = '\n'.join( ['"%s" id %s' % (commit.message.split('\n')[0], commit.hexsha) for commit in all_unpushed_commits] )
+        unpushed_text = '\n'.join( ['"%s" id %s' % (commit.commitMessage().split('\n')[0], commit.commitIdString()) for commit in all_unpushed_commits] )
         all_staged_text = []
         for status, filename, renamed_to in sorted( all_staged_files ):
             if renamed_to is None:
@@ -281,7 +281,7 @@ class GitMainWindowActions(wb_ui_actions.WbMainWindowActions):
 
         try:
             for commit in git_project.getUnpushedCommits():
-                self.log.info( 'pushing "%s" id %s' % (commit.message.split('\n')[0], commit.hexsha) )
+                self.log.info( 'pushing "%s" id %s' % (commit.commitMessage().split('\n')[0], commit.commitIdString()) )
 
             git_project.cmdPush(
                 self.deferRunInForeground( self.pushProgressHandler ),
@@ -407,16 +407,16 @@ class GitMainWindowActions(wb_ui_actions.WbMainWindowActions):
     @thread_switcher
     def tableActionGitStage_Bg( self, checked=None ):
         self._debug( 'tableActionGitStage_Bg start' )
-        yield from self._tableActionChangeRepo_Bg( self._actionGitStage )
+        yield from self._tableActionChangeRepoMany_Bg( self._actionGitStageMany )
         self._debug( 'tableActionGitStage_Bg done' )
 
     @thread_switcher
     def tableActionGitUnstage_Bg( self, checked=None ):
-        yield from self._tableActionChangeRepo_Bg( self._actionGitUnstage )
+        yield from self._tableActionChangeRepoMany_Bg( self._actionGitUnstageMany )
 
     @thread_switcher
     def tableActionGitRevert_Bg( self, checked=None ):
-        yield from self._tableActionChangeRepo_Bg( self._actionGitRevert, self._areYouSureRevert )
+        yield from self._tableActionChangeRepoMany_Bg( self._actionGitRevertMany, self._areYouSureRevert )
 
     @thread_switcher
     def tableActionGitDelete_Bg( self, checked=None ):
@@ -467,16 +467,36 @@ class GitMainWindowActions(wb_ui_actions.WbMainWindowActions):
         git_project.cmdUnstage( 'HEAD', filename )
 
     def _actionGitRevert( self, git_project, filename ):
-        file_state = git_project.getFileState( filename )
+        git_project.cmdRevert( self._revertRev( git_project.getFileState( filename ) ), filename )
+
+    def _revertRev( self, file_state ):
         if( file_state.isStagedModified()
         and (file_state.isUnstagedModified()
             or file_state.isUnstagedDeleted()) ):
             # revert to staged (--)
-            git_project.cmdRevert( '--', filename )
+            return '--'
 
         else:
             # revert to HEAD
-            git_project.cmdRevert( 'HEAD', filename )
+            return 'HEAD'
+
+    # the Many actions are called on the background thread
+    # with a batch of the selected filenames
+    def _actionGitStageMany( self, git_project, all_filenames ):
+        git_project.cmdStageMany( all_filenames )
+
+    def _actionGitUnstageMany( self, git_project, all_filenames ):
+        git_project.cmdUnstageMany( 'HEAD', all_filenames )
+
+    def _actionGitRevertMany( self, git_project, all_filenames ):
+        all_rev_filenames = {'--': [], 'HEAD': []}
+        for filename in all_filenames:
+            rev = self._revertRev( git_project.getFileState( filename ) )
+            all_rev_filenames[ rev ].append( filename )
+
+        for rev, all_filenames in sorted( all_rev_filenames.items() ):
+            if len(all_filenames) > 0:
+                git_project.cmdRevertMany( rev, all_filenames )
 
     def _actionGitDelete( self, git_project, filename ):
         file_state = git_project.getFileState( filename )
@@ -561,13 +581,19 @@ class GitMainWindowActions(wb_ui_actions.WbMainWindowActions):
         yield from self.table_view.tableActionViewRepo_Bg( execute_function, are_you_sure_function, self._tableActionChangeRepo_finalise_Bg )
         self._debug( '_tableActionChangeRepo_Bg done' )
 
+    @thread_switcher
+    def _tableActionChangeRepoMany_Bg( self, execute_many_function, are_you_sure_function=None ):
+        self._debug( '_tableActionChangeRepoMany_Bg start' )
+
+        yield from self.table_view.tableActionViewRepoMany_Bg( execute_many_function, are_you_sure_function, self._tableActionChangeRepo_finalise_Bg )
+        self._debug( '_tableActionChangeRepoMany_Bg done' )
+
     @thread_switcher
     def _tableActionChangeRepo_finalise_Bg( self, git_project ):
         self._debug( '_tableActionChangeRepo_finalise_Bg' )
-        git_project.saveChanges()
 
-        # take account of the change
-        yield from self.top_window.updateTableView_Bg()
+        # take account of the change to the paths
+        yield from self.top_window.updateTableView_Bg( git_project.takeStalePaths() )
 
     # ------------------------------------------------------------
     def selectedGitProjectTreeNode( self ):
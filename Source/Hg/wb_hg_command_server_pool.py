@@ -0,0 +1,149 @@
+'''
+ ====================================================================
+ Copyright (c) 2016 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_hg_command_server_pool.py
+
+    keep the hg command servers running between commands so
+    that the hg startup cost is only paid once per project and
+    thread
+
+'''
+import threading
+import time
+
+import hglib
+import hglib.client
+
+#
+#   A command server handles one command at a time so each thread
+#   is given its own server for a project. The servers are kept
+#   until they have not been used for idle_timeout seconds.
+#   A server that has exited is started again when it is next used.
+#
+#   The pool counts the commands that each server is running so that
+#   a server in the middle of a long command is never closed as idle.
+#
+class HgCommandServerPool:
+    # seconds that an unused command server is kept running
+    idle_timeout = 300
+
+    def __init__( self ):
+        self.__lock = threading.Lock()
+
+        # (path, thread ident) -> PooledHgClient
+        self.__all_servers = {}
+
+        self.__idle_timer = None
+
+    def __repr__( self ):
+        return '<HgCommandServerPool: servers %d>' % (len(self.__all_servers),)
+
+    def client( self, path ):
+        # returns the command server for path that the calling thread uses
+        key = (str(path), threading.get_ident())
+
+        with self.__lock:
+            repo = self.__all_servers.get( key )
+            if repo is not None:
+                if self.__isRunning( repo ):
+                    repo.last_used = time.monotonic()
+                    return repo
+
+                # the server has exited, start a new one
+                del self.__all_servers[ key ]
+
+        repo = PooledHgClient( self, key[0] )
+
+        with self.__lock:
+            self.__all_servers[ key ] = repo
+            self.__startIdleTimer()
+
+        return repo
+
+    def _acquire( self, repo ):
+        with self.__lock:
+            repo.in_use += 1
+
+    def _release( self, repo ):
+        with self.__lock:
+            repo.in_use -= 1
+            repo.last_used = time.monotonic()
+
+    def closeAll( self ):
+        with self.__lock:
+            all_clients = list( self.__all_servers.values() )
+            self.__all_servers = {}
+
+            if self.__idle_timer is not None:
+                self.__idle_timer.cancel()
+                self.__idle_timer = None
+
+        for repo in all_clients:
+            self.__close( repo )
+
+    def closeIdle( self ):
+        now = time.monotonic()
+
+        with self.__lock:
+            self.__idle_timer = None
+
+            all_idle_clients = []
+            for key, repo in list( self.__all_servers.items() ):
+                if repo.in_use == 0 and now - repo.last_used >= self.idle_timeout:
+                    del self.__all_servers[ key ]
+                    all_idle_clients.append( repo )
+
+            self.__startIdleTimer()
+
+        for repo in all_idle_clients:
+            self.__close( repo )
+
+    def __startIdleTimer( self ):
+        # called with __lock held
+        if self.__idle_timer is not None or len(self.__all_servers) == 0:
+            return
+
+        self.__idle_timer = threading.Timer( self.idle_timeout, self.closeIdle )
+        self.__idle_timer.daemon = True
+        self.__idle_timer.start()
+
+    def __isRunning( self, repo ):
+        return repo.server is not None and repo.server.poll() is None
+
+    def __close( self, repo ):
+        if not self.__isRunning( repo ):
+            return
+
+        try:
+            repo.close()
+
+        except (hglib.error.ServerError, OSError):
+            pass
+
+#
+#   PooledHgClient tells the pool when each command starts and finishes.
+#   All the hglib commands are run by runcommand().
+#
+class PooledHgClient(hglib.client.hgclient):
+    def __init__( self, pool, path ):
+        self.__pool = pool
+
+        # commands running and when the last one finished
+        self.in_use = 0
+        self.last_used = time.monotonic()
+
+        super().__init__( path, 'utf-8', None )
+
+    def runcommand( self, args, inchannels, outchannels ):
+        self.__pool._acquire( self )
+        try:
+            return super().runcommand( args, inchannels, outchannels )
+
+        finally:
+            self.__pool._release( self )
@@ -14,17 +14,22 @@ import wb_hg_ui_components
 import wb_hg_ui_actions
 import wb_hg_log_history_view
 import wb_hg_preferences
+import wb_hg_command_server_pool
 
 import wb_scm_project_dialogs
 import wb_scm_factory_abc
 
 class WbHgFactory(wb_scm_factory_abc.WbScmFactoryABC):
     def __init__( self ):
-        pass
+        # the command servers are shared by all the HgProjects
+        self.command_server_pool = wb_hg_command_server_pool.HgCommandServerPool()
 
     def scmName( self ):
         return 'hg'
 
+    def shutdown( self ):
+        self.command_server_pool.closeAll()
+
     def scmPresentationShortName( self ):
         return 'Hg'
 
@@ -22,6 +22,8 @@ import wb_main_window
 import wb_ui_components
 import wb_table_view
 
+import wb_hg_project
+
 from wb_background_thread import thread_switcher
 
 def U_( s: str ) -> str:
@@ -244,8 +246,37 @@ class WbHgLogHistoryView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrack
         self.commit_message.clear()
         self.commit_message.insertPlainText( node.message )
 
-        self.changes_model.loadChanges( node.all_changed_files )
+        if self.log_model.changed_files_on_select:
+            # the changes are shown when the background has found them
+            self.changes_model.loadChanges( [] )
+            self.app.wrapWithThreadSwitcher( self.loadChangesForCommit_Bg, 'log history selectionChanged' )( node )
+
+        else:
+            self.changes_model.loadChanges( node.all_changed_files )
+
+        self.updateEnableStates()
+
+    @thread_switcher
+    def loadChangesForCommit_Bg( self, node ):
+        yield self.app.switchToBackground
+
+        try:
+            all_changes = self.hg_project.cmdChangedFilesForLog( node )
+
+        except wb_hg_project.HgCommandError as e:
+            all_changes = []
+            self.app.log.error( T_('Cannot find the changes of commit %(commit_id)s - %(error)s') %
+                            {'commit_id': node.commitIdString()
+                            ,'error': e} )
+
+        yield self.app.switchToForeground
 
+        # the selection may have moved to another commit
+        if( len(self.current_commit_selections) == 0
+        or self.log_model.commitNode( self.current_commit_selections[0] ) is not node ):
+            return
+
+        self.changes_model.loadChanges( all_changes )
         self.updateEnableStates()
 
     def selectionChangedFile( self ):
@@ -286,6 +317,10 @@ class WbHgLogHistoryModel(QtCore.QAbstractTableModel):
 
     column_titles = (U_('Author'), U_('Date'), U_('Tag'), U_('Message'), U_('Commit ID'))
 
+    # find the changed files of a commit when it is selected
+    # and not for every commit when the log is loaded
+    changed_files_on_select = True
+
     def __init__( self, app ):
         self.app = app
 
@@ -300,13 +335,13 @@ class WbHgLogHistoryModel(QtCore.QAbstractTableModel):
 
     def loadCommitLogForRepository( self, progress_callback, hg_project, limit, since, until ):
         self.beginResetModel()
-        self.all_commit_nodes = hg_project.cmdCommitLogForRepository( limit, since, until )
+        self.all_commit_nodes = hg_project.cmdCommitLogForRepository( limit, since, until, changed_files=not self.changed_files_on_select )
         self.all_tags_by_rev = hg_project.cmdTagsForRepository()
         self.endResetModel()
 
     def loadCommitLogForFile( self, progress_callback, hg_project, filename, limit, since, until ):
         self.beginResetModel()
-        self.all_commit_nodes = hg_project.cmdCommitLogForFile( filename, limit, since, until )
+        self.all_commit_nodes = hg_project.cmdCommitLogForFile( filename, limit, since, until, changed_files=not self.changed_files_on_select )
         self.all_tags_by_rev = hg_project.cmdTagsForRepository()
         self.endResetModel()
 
@@ -11,12 +11,20 @@
 
 '''
 from typing import List
+import io
+import os
 import pathlib
 import sys
+import binascii
 import pytz
 
 import wb_background_thread
 import wb_annotate_node
+import wb_working_tree_watcher
+import wb_working_tree_walker
+import wb_path_index
+import wb_status_cache
+import wb_marshal_file
 
 import hglib
 import hglib.util
@@ -43,6 +51,15 @@ def HgVersion():
     return out.decode( 'utf-8' ).split('\n')[0]
 
 class HgProject:
+    # above this many changed paths a full status is used
+    max_dirty_paths_for_status_for_paths = 1000
+
+    # hg status is only asked for the modified, added, removed,
+    # deleted and unknown files. The clean files are found from the
+    # manifest of the working copy parent, which is cached until the
+    # parent changes, and the ignored files from the working tree.
+    use_parent_manifest_status = True
+
     def __init__( self, app, prefs_project, ui_components ):
         self.app = app
         self.ui_components = ui_components
@@ -52,16 +69,35 @@ class HgProject:
 
         self.prefs_project = prefs_project
         if self.prefs_project is not None:
-            self.repo = hglib.open( str( prefs_project.path ), 'utf-8' )
-            self.tree = HgProjectTreeNode( self, prefs_project.name, pathlib.Path( '.' ) )
-            self.flat_tree = HgProjectTreeNode( self, prefs_project.name, pathlib.Path( '.' ) )
+            self.__command_server_pool = self.ui_components.factory.command_server_pool
+            self.__repo = None
+
+            # start the command server now so that a bad repo is reported
+            self.__command_server_pool.client( prefs_project.path )
+            self.__setPathIndex( wb_path_index.PathIndex() )
 
         else:
-            self.repo = hglib.open( None, 'utf-8' )
+            self.__command_server_pool = None
+            self.__repo = hglib.open( None, 'utf-8' )
             self.tree = None
             self.flat_tree = None
 
         self.all_file_state = {}
+        self.__status_calculated = False
+
+        self.__watcher = None
+
+        # paths changed by the cmd functions
+        self.__all_stale_paths = set()
+
+        # dirstate when the status was calculated
+        self.__status_cache_fingerprint = None
+        # the status loaded from the status cache
+        self.__cached_status = None
+
+        # the manifest of the working copy parents in __manifest_parents
+        self.__manifest_parents = None
+        self.__all_parent_manifest = []
 
         self.__num_modified_files = 0
 
@@ -94,6 +130,14 @@ class HgProject:
 
         return None
 
+    # the command server that the calling thread uses
+    @property
+    def repo( self ):
+        if self.__command_server_pool is None:
+            return self.__repo
+
+        return self.__command_server_pool.client( self.prefs_project.path )
+
     # return a new HgProject that can be used in another thread
     def newInstance( self ):
         return HgProject( self.app, self.prefs_project, self.ui_components )
@@ -116,10 +160,57 @@ class HgProject:
     def numModifiedFiles( self ):
         return self.__num_modified_files
 
-    def updateState( self ):
-        # rebuild the tree
-        self.tree = HgProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ) )
-        self.flat_tree = HgProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ) )
+    def startWatcher( self, changed_callback ):
+        if self.__watcher is not None:
+            return
+
+        self.__watcher = wb_working_tree_watcher.createWorkingTreeWatcher(
+                            self.app, self.projectPath(),
+                            [pathlib.Path( '.hg/dirstate' )],
+                            changed_callback )
+
+    def stopWatcher( self ):
+        if self.__watcher is not None:
+            self.__watcher.stop()
+            self.__watcher = None
+
+    def takeStalePaths( self ):
+        # the paths changed by the cmd functions since the last call
+        all_paths = self.__all_stale_paths
+        self.__all_stale_paths = set()
+        return all_paths
+
+    def usesFolderStatus( self ):
+        # the status of the whole working tree is always used
+        return False
+
+    # all_paths limits the update to the paths that have been changed
+    def updateState( self, all_paths=None ):
+        # the first updateState() after the status cache is loaded is a full status
+        self.__cached_status = None
+
+        if all_paths is None and self.__watcher is not None:
+            changes = self.__watcher.takeChanges()
+            if changes.isEmpty() and self.__status_calculated:
+                self._debug( 'updateState() no changes in working copy' )
+                return
+
+            if( self.__status_calculated
+            and not changes.full_scan_needed
+            and not changes.metadata_changed
+            and len(changes.all_dirty_paths) <= self.max_dirty_paths_for_status_for_paths ):
+                # only files in the working copy have changed
+                all_paths = changes.all_dirty_paths
+
+        if( all_paths is not None
+        and self.__status_calculated
+        and self.projectPath().exists()
+        and self.__calculateStatusForPaths( all_paths ) ):
+            self.dumpTree()
+            return
+
+        self.__status_calculated = True
+        self.__all_stale_paths = set()
 
         if not self.projectPath().exists():
             self.app.log.error( T_('Project %(name)s folder %(folder)s has been deleted') %
@@ -127,51 +218,64 @@ class HgProject:
                             ,'folder': self.projectPath()} )
 
             self.all_file_state = {}
+            self.__num_modified_files = 0
+            self.__status_cache_fingerprint = None
 
         else:
             self.__calculateStatus()
 
-
-        for path in self.all_file_state:
-            self.__updateTree( path )
+        self.__updatePathIndex()
 
         self.dumpTree()
 
+    def __updatePathIndex( self ):
+        # the tree nodes are created from the index as they are needed
+        path_index = wb_path_index.PathIndex()
+        for path, file_state in self.all_file_state.items():
+            path_index.addPath( path, wb_path_index.stateHasChanges( file_state ) )
+
+        self.__setPathIndex( path_index )
+
     def __calculateStatus( self ):
         self.all_file_state = {}
+        self.__num_modified_files = 0
 
-        repo_root = self.projectPath()
+        for walked in wb_working_tree_walker.walkWorkingTree( self.projectPath() ):
+            folder = pathlib.Path( walked.path )
 
-        hg_dir = repo_root / '.hg'
+            for name in walked.all_folder_names:
+                repo_relative = folder / name
+                self.all_file_state[ repo_relative ] = WbHgFileState( self, repo_relative )
+                self.all_file_state[ repo_relative ].setIsDir()
 
-        all_folders = set( [repo_root] )
-        while len(all_folders) > 0:
-            folder = all_folders.pop()
+            for name in walked.all_file_names:
+                repo_relative = folder / name
+                self.all_file_state[ repo_relative ] = WbHgFileState( self, repo_relative )
 
-            for filename in folder.iterdir():
-                abs_path = folder / filename
+        if self.use_parent_manifest_status:
+            for filepath, nodeid, permission, executable, symlink in self.__parentManifest():
+                if filepath not in self.all_file_state:
+                    # filepath has been deleted
+                    self.all_file_state[ filepath ] = WbHgFileState( self, filepath )
 
-                repo_relative = abs_path.relative_to( repo_root )
+                # clean unless hg status reports it
+                self.all_file_state[ filepath ].setManifest( nodeid, permission, executable, symlink )
+                self.all_file_state[ filepath ].setState( 'C' )
 
-                if abs_path.is_dir():
-                    if abs_path != hg_dir:
-                        all_folders.add( abs_path )
+            all_status = self.repo.status( modified=True, added=True, removed=True, deleted=True, unknown=True )
 
-                        self.all_file_state[ repo_relative ] = WbHgFileState( self, repo_relative )
-                        self.all_file_state[ repo_relative ].setIsDir()
+        else:
+            for nodeid, permission, executable, symlink, filepath in self.repo.manifest():
+                filepath = self.pathForWb( filepath )
+                if filepath not in self.all_file_state:
+                    # filepath has been deleted
+                    self.all_file_state[ filepath ] = WbHgFileState( self, filepath )
 
-                else:
-                    self.all_file_state[ repo_relative ] = WbHgFileState( self, repo_relative )
+                self.all_file_state[ filepath ].setManifest( nodeid, permission, executable, symlink )
 
-        for nodeid, permission, executable, symlink, filepath in self.repo.manifest():
-            filepath = self.pathForWb( filepath )
-            if filepath not in self.all_file_state:
-                # filepath has been deleted
-                self.all_file_state[ filepath ] = WbHgFileState( self, filepath )
-
-            self.all_file_state[ filepath ].setManifest( nodeid, permission, executable, symlink )
+            all_status = self.repo.status( all=True, ignored=True )
 
-        for state, filepath in self.repo.status( all=True, ignored=True ):
+        for state, filepath in all_status:
             state = state.decode( 'utf-8' )
 
             filepath = self.pathForWb( filepath )
@@ -184,23 +288,141 @@ class HgProject:
             if state in ('A', 'M', 'R'):
                 self.__num_modified_files += 1
 
-    def __updateTree( self, path ):
-        self._debugTree( '__updateTree path %r' % (path,) )
-        node = self.tree
+        if self.use_parent_manifest_status:
+            # the files that are neither tracked nor unknown are ignored
+            for file_state in self.all_file_state.values():
+                if not file_state.isDir() and file_state.getState() == '':
+                    file_state.setState( 'I' )
+
+        # hg status may have written the dirstate
+        self.__status_cache_fingerprint = self.__statusCacheFingerprint()
+
+    def __parentManifest( self ):
+        # the manifest only changes when the working copy parent changes
+        all_parents = self.repo.parents()
+        if all_parents is None:
+            # nothing has been committed yet
+            all_parents = []
+
+        parents = tuple( parent.node for parent in all_parents )
+        if parents != self.__manifest_parents:
+            self._debug( '__parentManifest() reading manifest for %r' % (parents,) )
+
+            self.__all_parent_manifest = [(self.pathForWb( filepath ), nodeid, permission, executable, symlink)
+                                            for nodeid, permission, executable, symlink, filepath in self.repo.manifest()]
+            self.__manifest_parents = parents
+
+        return self.__all_parent_manifest
+
+    #
+    #   Only the changed paths are given to hg status and the results
+    #   merged into copies of the file states and path index. The
+    #   manifest details are kept from the old file states as the
+    #   parent of the working copy has not changed. Returns False when
+    #   a full status is needed as a folder has changed.
+    #
+    def __calculateStatusForPaths( self, all_paths ):
+        for path in all_paths:
+            if self.__path_index.hasFolder( path ) or (self.projectPath() / path).is_dir():
+                return False
+
+        self._debug( '__calculateStatusForPaths() %d paths' % (len(all_paths),) )
+
+        all_states = {}
+        if len(all_paths) > 0:
+            all_include = [('path:%s' % (pathlib.PurePosixPath( path ),)).encode( sys.getfilesystemencoding() )
+                                for path in all_paths]
+            for state, filepath in self.repo.status( all=True, ignored=True, include=all_include ):
+                all_states[ self.pathForWb( filepath ) ] = state.decode( 'utf-8' )
+
+        all_file_state = dict( self.all_file_state )
+        path_index = self.__path_index.copy()
+        num_modified_files = self.__num_modified_files
+
+        for path in all_paths:
+            old_file_state = all_file_state.get( path )
+            if old_file_state is not None and old_file_state.canCommit():
+                num_modified_files -= 1
+
+            state = all_states.get( path )
+            if state is None and not os.path.lexists( str(self.projectPath() / path) ):
+                if old_file_state is not None:
+                    del all_file_state[ path ]
+                    path_index.removePath( path )
+
+                continue
+
+            file_state = WbHgFileState( self, path )
+            if old_file_state is not None:
+                file_state._setStatusCacheRecord( old_file_state._statusCacheRecord() )
+
+            file_state.setState( state if state is not None else '' )
+
+            all_file_state[ path ] = file_state
+            if file_state.canCommit():
+                num_modified_files += 1
+
+            path_index.addPath( path, wb_path_index.stateHasChanges( file_state ) )
+
+        self.all_file_state = all_file_state
+        self.__num_modified_files = num_modified_files
+        self.__setPathIndex( path_index )
+        return True
+
+    #
+    #   The status cache lets the last status be shown at startup.
+    #   updateState() still calculates the status as the working
+    #   copy files may have changed since the cache was saved.
+    #
+    def __statusCacheFingerprint( self ):
+        return wb_marshal_file.statKey( self.projectPath() / '.hg' / 'dirstate' )
+
+    def __newCachedFileState( self, filepath, record ):
+        file_state = WbHgFileState( self, filepath )
+        file_state._setStatusCacheRecord( record )
+        return file_state
+
+    def loadStatusCache( self ):
+        fingerprint = self.__statusCacheFingerprint()
+        if fingerprint is None:
+            return False
+
+        status = wb_status_cache.readStatusCache( self.prefs_project, fingerprint )
+        if status is None:
+            return False
+
+        cached_status = wb_status_cache.CachedStatus( status,
+                            wb_status_cache.fileStateRecordInfo( self.__newCachedFileState ),
+                            self.__newCachedFileState, True )
+
+        self._debug( 'loadStatusCache() %r' % (cached_status,) )
+
+        self.__cached_status = cached_status
+        self.all_file_state = cached_status.fileStates()
+        self.__num_modified_files = cached_status.num_can_commit
+        self.__setPathIndex( cached_status )
+        return True
+
+    def saveStatusCache( self ):
+        # a status that is still the one loaded from the cache is already saved
+        if self.__status_cache_fingerprint is None or self.__cached_status is not None:
+            return
 
-        self._debugTree( '__updateTree path.parts %r' % (path.parts,) )
+        status = wb_status_cache.allPathsByFolder( self.all_file_state, WbHgFileState._statusCacheRecord )
 
-        for index, name in enumerate( path.parts[0:-1] ):
-            self._debugTree( '__updateTree name %r at node %r' % (name,node) )
+        try:
+            wb_status_cache.writeStatusCache( self.prefs_project, self.__status_cache_fingerprint, status )
 
-            if not node.hasFolder( name ):
-                node.addFolder( name, HgProjectTreeNode( self, name, pathlib.Path( *path.parts[0:index+1] ) ) )
+        except OSError as e:
+            self.app.log.error( T_('Cannot save the status of project %(name)s - %(error)s') %
+                            {'name': self.projectName()
+                            ,'error': e} )
 
-            node = node.getFolder( name )
+    def __setPathIndex( self, path_index ):
+        self.__path_index = path_index
 
-        self._debugTree( '__updateTree addFile %r to node %r' % (path, node) )
-        node.addFileByName( path )
-        self.flat_tree.addFileByPath( path )
+        self.tree = HgProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ), path_index )
+        self.flat_tree = HgProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ), path_index, is_by_path=True )
 
     def dumpTree( self ):
         if self._debugTree.isEnabled():
@@ -292,12 +514,31 @@ class HgProject:
 
     def cmdAdd( self, filename ):
         self.repo.add( self.pathForHg( filename ) )
+        self.__all_stale_paths.add( filename )
 
     def cmdRevert( self, filename ):
         self.repo.revert( self.pathForHg( filename ) )
+        self.__all_stale_paths.add( filename )
 
     def cmdDelete( self, filename ):
         self.repo.delete( self.pathForHg( filename ) )
+        self.__all_stale_paths.add( filename )
+
+    #
+    #   The Many versions of the cmd functions run one hg command
+    #   for all the filenames
+    #
+    def cmdAddMany( self, all_filenames ):
+        self.repo.add( [self.pathForHg( filename ) for filename in all_filenames] )
+        self.__all_stale_paths.update( all_filenames )
+
+    def cmdRevertMany( self, all_filenames ):
+        self.repo.revert( [self.pathForHg( filename ) for filename in all_filenames] )
+        self.__all_stale_paths.update( all_filenames )
+
+    def cmdDeleteMany( self, all_filenames ):
+        self.repo.remove( [self.pathForHg( filename ) for filename in all_filenames] )
+        self.__all_stale_paths.update( all_filenames )
 
     def cmdDiffFolder( self, folder ):
         text = self.repo.diff( [self.pathForHg( folder )] )
@@ -337,7 +578,9 @@ class HgProject:
 
         return all_commit_logs
 
-    def cmdCommitLogForRepository( self, limit=None, since=None, until=None ):
+    # when changed_files is False the log's all_changed_files
+    # are set by cmdChangedFilesForLog() when they are needed
+    def cmdCommitLogForRepository( self, limit=None, since=None, until=None, changed_files=True ):
         if since is not None and until is not None:
             date = '%s to %s' % (since, until)
 
@@ -352,9 +595,12 @@ class HgProject:
 
         all_logs = [WbHgLogFull( data, self.repo ) for data in self.repo.log( limit=limit, date=date )]
 
+        if changed_files:
+            self.__addChangedFiles( all_logs )
+
         return all_logs
 
-    def cmdCommitLogForFile( self, filename, limit=None, since=None, until=None ):
+    def cmdCommitLogForFile( self, filename, limit=None, since=None, until=None, changed_files=True ):
         if since is not None and until is not None:
             date = '%s to %s' % (since, until)
 
@@ -370,8 +616,41 @@ class HgProject:
         all_logs = [WbHgLogFull( data, self.repo )
                     for data in self.repo.log( files=[self.pathForHg( filename )], limit=limit, date=date )]
 
+        if changed_files:
+            self.__addChangedFiles( all_logs )
+
         return all_logs
 
+    def cmdChangedFilesForLog( self, log ):
+        if log.all_changed_files is None:
+            self.__addChangedFiles( [log] )
+
+        return log.all_changed_files
+
+    #
+    #   The files changed by all the commits are found by one hg log
+    #   and not one hg status for each commit. The output is parsed as
+    #   it arrives from the command server.
+    #
+    def __addChangedFiles( self, all_logs ):
+        if len(all_logs) == 0:
+            return
+
+        all_changed_files = {}
+        parser = WbHgChangedFilesParser( all_changed_files )
+        error = io.BytesIO()
+
+        args = hglib.util.cmdbuilder( b'log',
+                    template=changed_files_template,
+                    rev=' + '.join( str(log.rev) for log in all_logs ).encode( 'utf-8' ) )
+
+        ret = self.repo.runcommand( args, {}, {b'o': parser.feed, b'e': error.write} )
+        if ret != 0:
+            raise HgCommandError( args, ret, b'', error.getvalue() )
+
+        for log in all_logs:
+            log.all_changed_files = all_changed_files.get( log.rev, [] )
+
     def cmdTagsForRepository( self ):
         tag_name_by_rev = {}
         for tag_name, rev, commit_id, x in self.repo.tags():
@@ -583,46 +862,99 @@ class WbHgLogFull(WbHgLogBasic):
     def __init__( self, data, repo ):
         super().__init__( data, repo )
 
-        if self.rev == 0:
-            rev= '0'
-        else:
-            rev = '%d:%d' % (self.rev-1, self.rev)
+        # [(state, path)] set by HgProject
+        self.all_changed_files = None
+
+# NUL separated rev, state and path of each file changed by a commit
+changed_files_template = (b'{file_adds % "{rev}\\0A\\0{file}\\0"}'
+                          b'{file_dels % "{rev}\\0R\\0{file}\\0"}'
+                          b'{file_mods % "{rev}\\0M\\0{file}\\0"}')
+
+class WbHgChangedFilesParser:
+    def __init__( self, all_changed_files ):
+        # rev -> [(state, path)]
+        self.all_changed_files = all_changed_files
 
-        self.all_changed_files = [(state.decode('utf-8'), path.decode('utf-8')) for state, path in repo.status( rev=rev )]
+        self.__partial_field = b''
+        self.__all_pending_fields = []
 
+    def feed( self, data ):
+        all_fields = (self.__partial_field + data).split( b'\0' )
+        self.__partial_field = all_fields.pop()
+
+        all_fields = self.__all_pending_fields + all_fields
+        num_fields = len(all_fields) - len(all_fields) % 3
+
+        for index in range( 0, num_fields, 3 ):
+            rev, state, path = all_fields[ index:index+3 ]
+            self.all_changed_files.setdefault( int(rev), [] ).append( (state.decode( 'utf-8' ), path.decode( 'utf-8' )) )
+
+        self.__all_pending_fields = all_fields[ num_fields: ]
+
+#
+#   There is a WbHgFileState for every file in the working copy
+#   so it is kept small. The booleans are bits in __flags and the
+#   nodeid is held in binary. The manifest permission is implied
+#   by the executable flag.
+#
 class WbHgFileState:
+    __slots__ = ('__project', '__filepath', '__flags', '__state', '__nodeid')
+
+    __flag_is_dir       = 0x01
+    __flag_executable   = 0x02
+    __flag_symlink      = 0x04
+
     def __init__( self, project : HgProject, filepath : 'pathlib.Path' ) -> None:
         self.__project = project
         self.__filepath = filepath
 
-        self.__is_dir = False
+        self.__flags = 0
 
         self.__state = ''           # type: str
 
-        self.__nodeid = None        # type: str
-        self.__permission = None    # type: int
-        self.__executable = None    # type: bool
-        self.__symlink = None       # type: bool
+        self.__nodeid = None        # type: bytes
 
     def __repr__( self ) -> str:
         return ('<WbHgFileState: %s %s %s>' %
-                (self.__filepath, self.__state, self.__nodeid))
+                (self.__filepath, self.__state, self.nodeid()))
 
     def setIsDir( self ) -> None:
-        self.__is_dir = True
+        self.__flags |= self.__flag_is_dir
 
     def isDir( self ) -> bool:
-        return self.__is_dir
+        return self.__flags&self.__flag_is_dir != 0
 
     def setManifest( self, nodeid : bytes, permission, executable, symlink ) -> None:
-        self.__nodeid = nodeid.decode('utf-8')
-        self.__permission = permission
-        self.__executable = executable
-        self.__symlink = symlink
+        self.__nodeid = binascii.a2b_hex( nodeid )
+        if executable:
+            self.__flags |= self.__flag_executable
+        if symlink:
+            self.__flags |= self.__flag_symlink
+
+    def nodeid( self ) -> str:
+        if self.__nodeid is None:
+            return None
+
+        return binascii.b2a_hex( self.__nodeid ).decode( 'ascii' )
+
+    def isExecutable( self ) -> bool:
+        return self.__flags&self.__flag_executable != 0
+
+    def isSymlink( self ) -> bool:
+        return self.__flags&self.__flag_symlink != 0
 
     def setState( self, state : str ):
         self.__state = state
 
+    def getState( self ) -> str:
+        return self.__state
+
+    def _statusCacheRecord( self ) -> tuple:
+        return (self.__flags, self.__state, self.__nodeid)
+
+    def _setStatusCacheRecord( self, record : tuple ) -> None:
+        self.__flags, self.__state, self.__nodeid = record
+
     def getAbbreviatedStatus( self ) -> str:
         if self.__state in ('C', '?'):
             return ''
@@ -637,6 +969,10 @@ class WbHgFileState:
         # QQQ here for Git compat - bad OO design here
         return self.getAbbreviatedStatus()
 
+    def getRemoteAbbreviatedStatus( self ) -> str:
+        # QQQ here for Svn compat - bad OO design here
+        return ''
+
     def absolutePath( self ) -> pathlib.Path:
         return self.__project.projectPath() / self.__filepath
 
@@ -764,14 +1100,18 @@ class HgCommitLogNode:
     def commitFileChanges( self ):
         return self.__all_changes
 
+#
+#   HgProjectTreeNode is a view of one folder in a PathIndex.
+#   The folder nodes are only created when they are looked at.
+#
 class HgProjectTreeNode:
-    def __init__( self, project, name, path ):
+    def __init__( self, project, name, path, path_index, is_by_path=False ):
         self.project = project
         self.name = name
-        self.is_by_path = False
+        self.is_by_path = is_by_path
         self.__path = path
+        self.__path_index = path_index
         self.__all_folders = {}
-        self.__all_files = {}
 
     def __repr__( self ):
         return '<HgProjectTreeNode: project %r, path %s>' % (self.project, self.__path)
@@ -779,46 +1119,44 @@ class HgProjectTreeNode:
     def isByPath( self ):
         return self.is_by_path
 
-    def addFileByName( self, path ):
-        assert path.name != ''
-        self.__all_files[ path.name ] = path
-
-    def addFileByPath( self, path ):
-        assert path.name != ''
-        self.is_by_path = True
-        path = path
-        self.__all_files[ path ] = path
-
     def getAllFileNames( self ):
-        return self.__all_files.keys()
+        if self.is_by_path:
+            return list( self.__path_index.allPaths() )
 
-    def addFolder( self, name, node ):
-        assert type(name) == str and name != '', 'name %r, node %r' % (name, node)
-        assert isinstance( node, HgProjectTreeNode )
-        self.__all_folders[ name ] = node
+        return self.__path_index.allChildNames( self.__path )
 
     def getFolder( self, name ):
         assert type(name) == str
+        if name not in self.__all_folders:
+            assert self.hasFolder( name ), 'name %r, node %r' % (name, self)
+            self.__all_folders[ name ] = HgProjectTreeNode( self.project, name, self.__path / name, self.__path_index )
+
         return self.__all_folders[ name ]
 
     def getAllFolderNodes( self ):
-        return self.__all_folders.values()
+        return [self.getFolder( name ) for name in self.getAllFolderNames()]
 
     def getAllFolderNames( self ):
-        return self.__all_folders.keys()
+        if self.is_by_path:
+            return set()
+
+        return self.__path_index.allSubFolderNames( self.__path )
 
     def hasFolder( self, name ):
         assert type(name) == str
-        return name in self.__all_folders
+        return name in self.getAllFolderNames()
+
+    def numChangedFiles( self ):
+        return self.__path_index.numChangedPaths( self.__path )
 
     def _dumpTree( self, indent ):
         self.project._debugTree( 'dump: %*s%r' % (indent, '', self) )
 
-        for file in sorted( self.__all_files ):
+        for file in sorted( self.getAllFileNames() ):
             self.project._debugTree( 'dump %*s   file: %r' % (indent, '', file) )
 
-        for folder in sorted( self.__all_folders ):
-            self.__all_folders[ folder ]._dumpTree( indent+4 )
+        for folder in sorted( self.getAllFolderNames() ):
+            self.getFolder( folder )._dumpTree( indent+4 )
 
     def isNotEqual( self, other ):
         return (self.relativePath() != other.relativePath()
@@ -834,7 +1172,11 @@ class HgProjectTreeNode:
         return self.project.projectPath() / self.__path
 
     def getStatusEntry( self, name ):
-        path = self.__all_files[ name ]
+        if self.is_by_path:
+            path = name
+
+        else:
+            path = self.__path_index.childPath( self.__path, name )
 
         if path in self.project.all_file_state:
             entry = self.project.all_file_state[ path ]
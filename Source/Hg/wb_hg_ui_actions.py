@@ -357,15 +357,15 @@ class HgMainWindowActions(wb_ui_actions.WbMainWindowActions):
     # ------------------------------------------------------------
     @thread_switcher
     def tableActionHgAdd_Bg( self, checked=None ):
-        yield from self.__tableActionChangeRepo_Bg( self.__actionHgAdd )
+        yield from self.__tableActionChangeRepoMany_Bg( self.__actionHgAddMany )
 
     @thread_switcher
     def tableActionHgRevert_Bg( self, checked=None ):
-        yield from self.__tableActionChangeRepo_Bg( self.__actionHgRevert, self.__areYouSureRevert )
+        yield from self.__tableActionChangeRepoMany_Bg( self.__actionHgRevertMany, self.__areYouSureRevert )
 
     @thread_switcher
     def tableActionHgDelete_Bg( self, checked=None ):
-        yield from self.__tableActionChangeRepo_Bg( self.__actionHgDelete, self.__areYouSureDelete )
+        yield from self.__tableActionChangeRepoMany_Bg( self.__actionHgDeleteMany, self.__areYouSureDelete )
 
     def tableActionHgDiffSmart( self ):
         self._debug( 'tableActionHgDiffSmart()' )
@@ -375,24 +375,31 @@ class HgMainWindowActions(wb_ui_actions.WbMainWindowActions):
         self._debug( 'tableActionHgDiffHeadVsWorking()' )
         self.table_view.tableActionViewRepo( self.__actionHgDiffHeadVsWorking )
 
-    def __actionHgAdd( self, hg_project, filename ):
-        hg_project.cmdAdd( filename )
+    # the Many actions are called on the background thread
+    # with a batch of the selected filenames
+    def __actionHgAddMany( self, hg_project, all_filenames ):
+        hg_project.cmdAddMany( all_filenames )
 
-    def __actionHgRevert( self, hg_project, filename ):
-        hg_project.cmdRevert( filename )
+    def __actionHgRevertMany( self, hg_project, all_filenames ):
+        hg_project.cmdRevertMany( all_filenames )
 
-    def __actionHgDelete( self, hg_project, filename ):
-        file_state = hg_project.getFileState( filename )
-        if file_state.isControlled():
-            hg_project.cmdDelete( filename )
+    def __actionHgDeleteMany( self, hg_project, all_filenames ):
+        all_controlled_filenames = []
+        for filename in all_filenames:
+            file_state = hg_project.getFileState( filename )
+            if file_state.isControlled():
+                all_controlled_filenames.append( filename )
 
-        else:
-            try:
-                file_state.absolutePath().unlink()
+            else:
+                try:
+                    file_state.absolutePath().unlink()
+
+                except IOError as e:
+                    self.log.error( 'Error deleting %s' % (filename,) )
+                    self.log.error( str(e) )
 
-            except IOError as e:
-                self.log.error( 'Error deleting %s' % (filename,) )
-                self.log.error( str(e) )
+        if len(all_controlled_filenames) > 0:
+            hg_project.cmdDeleteMany( all_controlled_filenames )
 
     def __actionHgDiffSmart( self, hg_project, filename ):
         file_state = hg_project.getFileState( filename )
@@ -419,13 +426,13 @@ class HgMainWindowActions(wb_ui_actions.WbMainWindowActions):
         return wb_common_dialogs.WbAreYouSureDelete( self.main_window, all_filenames )
 
     @thread_switcher
-    def __tableActionChangeRepo_Bg( self, execute_function, are_you_sure_function=None ):
+    def __tableActionChangeRepoMany_Bg( self, execute_many_function, are_you_sure_function=None ):
         @thread_switcher
         def finalise( hg_project ):
-            # take account of the change
-            yield from self.top_window.updateTableView_Bg()
+            # take account of the change to the paths
+            yield from self.top_window.updateTableView_Bg( hg_project.takeStalePaths() )
 
-        yield from self.table_view.tableActionViewRepo_Bg( execute_function, are_you_sure_function, finalise )
+        yield from self.table_view.tableActionViewRepoMany_Bg( execute_many_function, are_you_sure_function, finalise )
 
     # ------------------------------------------------------------
     def selectedHgProjectTreeNode( self ):
@@ -19,6 +19,7 @@ class WbScmDebug(wb_debug.WbDebug):
         # assumes derived class sets self.log
         self._debugGitProject = self.addDebugOption( 'GIT PROJECT' )
         self._debugGitUpdateTree = self.addDebugOption( 'GIT TREE' )
+        self._debugGitStatus = self.addDebugOption( 'GIT STATUS' )
         self._debugHgProject = self.addDebugOption( 'HG PROJECT' )
         self._debugHgUpdateTree = self.addDebugOption( 'HG TREE' )
         self._debugHgProtocolTrace = self.addDebugOption( 'HG TRACE' )
@@ -31,6 +31,10 @@ class WbScmFactoryABC(metaclass=ABCMeta):
     def scmPresentationLongName( self ) -> str:
         pass
 
+    def shutdown( self ) -> None:
+        # release the resources of the scm as the app is closing
+        pass
+
     @abstractmethod
     def uiComponents( self ) -> 'WbScmUiComponentsABC':
         pass
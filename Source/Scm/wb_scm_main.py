@@ -17,8 +17,13 @@ if sys.version_info < MIN_SUPPORTED_PYTHON_VERSION:
     print( 'Error: Must be run using pthon %d.%d or newer' % MIN_SUPPORTED_PYTHON_VERSION )
     sys.exit( 9 )
 
+import multiprocessing
+
 import wb_main
 import wb_scm_app
 
 if __name__ == '__main__':
+    # the git log history can start worker processes with spawn,
+    # which in the frozen kit run this script again
+    multiprocessing.freeze_support()
     sys.exit( wb_main.main( wb_scm_app.WbScmApp, sys.argv ) )
@@ -166,6 +166,11 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
         self.timer_update_enable_states.timeout.connect( self.updateActionEnabledStates )
         self.timer_update_enable_states.setSingleShot( True )
 
+        # timer used to wait for a burst of working tree changes to finish
+        self.timer_working_tree_changed = QtCore.QTimer()
+        self.timer_working_tree_changed.timeout.connect( self.workingTreeChangedTimeout )
+        self.timer_working_tree_changed.setSingleShot( True )
+
         # all variables exist
         self.__init_state = self.INIT_STATE_CONSISTENT
 
@@ -309,8 +314,9 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
 
     singleton_update_table_running = False
 
+    # all_paths limits the status update to the paths that have been changed
     @thread_switcher
-    def updateTableView_Bg( self ):
+    def updateTableView_Bg( self, all_paths=None ):
         if WbScmMainWindow.singleton_update_table_running:
             return
 
@@ -325,7 +331,7 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
 
         # load in the latest status
         self._debug( 'updateTableView_Bg calling refreshTree_Bg' )
-        yield from self.tree_model.refreshTree_Bg()
+        yield from self.tree_model.refreshTree_Bg( all_paths )
 
         # sort filter is now invalid
         self.table_view.table_sortfilter.invalidate()
@@ -443,6 +449,7 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
     def setupStatusBar( self, s ):
         self.status_general = QtWidgets.QLabel()
         self.status_progress = QtWidgets.QLabel()
+        self.status_cancel = QtWidgets.QPushButton( T_('Cancel') )
         self.status_action = QtWidgets.QLabel()
 
         self.status_progress.setFrameStyle( QtWidgets.QFrame.Panel|QtWidgets.QFrame.Sunken )
@@ -450,12 +457,13 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
 
         s.addWidget( self.status_general, 1 )
         s.addWidget( self.status_progress, 1 )
+        s.addWidget( self.status_cancel )
         s.addWidget( self.status_action, 1 )
 
         self.setStatusGeneral()
         self.setStatusAction()
 
-        self.progress = wb_scm_progress.WbScmProgress( self.status_progress )
+        self.progress = wb_scm_progress.WbScmProgress( self.status_progress, self.status_cancel )
 
     def setStatusGeneral( self, msg=None ):
         if msg is None:
@@ -516,6 +524,32 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
 
         self.app.wrapWithThreadSwitcher( self.updateTableView_Bg, 'appActiveHandler' )()
 
+    working_tree_changed_delay = 500
+
+    def workingTreeChangedHandler( self, scm_project ):
+        if self.__init_state == self.INIT_STATE_INCONSISTENT:
+            return
+
+        # only the selected project is shown, others are updated when selected
+        selected_scm_project = self.table_view.selectedScmProject()
+        if selected_scm_project is None or selected_scm_project.isNotEqual( scm_project ):
+            return
+
+        self.timer_working_tree_changed.start( self.working_tree_changed_delay )
+
+    def workingTreeChangedTimeout( self ):
+        self._debug( 'workingTreeChangedTimeout()' )
+
+        if self.__init_state != self.INIT_STATE_COMPLETE:
+            return
+
+        if WbScmMainWindow.singleton_update_table_running:
+            # try again once the current update is done
+            self.timer_working_tree_changed.start( self.working_tree_changed_delay )
+            return
+
+        self.app.wrapWithThreadSwitcher( self.updateTableView_Bg, 'working tree changed' )()
+
     #------------------------------------------------------------
     #
     # app actions
@@ -594,6 +628,11 @@ class WbScmMainWindow(wb_main_window.WbMainWindow):
 
         self.app.writePreferences()
 
+        self.tree_model.saveStatusCaches()
+
+        for factory in self.app.all_factories.values():
+            factory.shutdown()
+
         # close all open modeless windows
         wb_tracked_qwidget.closeAllWindows()
 
@@ -5,22 +5,32 @@
 #
 #------------------------------------------------------------
 class WbScmProgress:
-    def __init__( self, status_widget ):
+    def __init__( self, status_widget, cancel_button ):
         self.status_widget = status_widget
+        self.cancel_button = cancel_button
         self.progress_format = None
 
         self.__total = None
         self.__event_count = None
         self.__in_conflict = None
+        self.__cancel_requested = False
 
         self.status_widget.setText( '' )
 
-    def start( self, fmt, total=0 ):
+        self.cancel_button.clicked.connect( self.requestCancel )
+        self.cancel_button.setVisible( False )
+
+    # the cancel button is only shown when the work checks isCancelRequested
+    def start( self, fmt, total=0, cancellable=False ):
         self.progress_format = fmt
 
         self.__total = total
         self.__event_count = 0
         self.__in_conflict = 0
+        self.__cancel_requested = False
+
+        self.cancel_button.setEnabled( True )
+        self.cancel_button.setVisible( cancellable )
 
         self.__updateStatusCtrl()
 
@@ -38,8 +48,8 @@ class WbScmProgress:
 
         self.status_widget.setText( self.progress_format % progress_values )
 
-    def incEventCount( self ):
-        self.__event_count += 1
+    def incEventCount( self, count=1 ):
+        self.__event_count += count
         self.__updateStatusCtrl()
 
     def getEventCount( self ):
@@ -52,5 +62,14 @@ class WbScmProgress:
     def getInConflictCount( self ):
         return self.__in_conflict
 
+    # the work being reported on checks for a cancel between steps
+    def requestCancel( self ):
+        self.__cancel_requested = True
+        self.cancel_button.setEnabled( False )
+
+    def isCancelRequested( self ):
+        return self.__cancel_requested
+
     def end( self ):
         self.status_widget.setText( '' )
+        self.cancel_button.setVisible( False )
@@ -40,7 +40,22 @@ class ScmProjectPlaceholder:
     def projectPath( self ):
         return pathlib.Path( self.prefs_project.path )
 
-    def updateState( self ):
+    def startWatcher( self, changed_callback ):
+        pass
+
+    def stopWatcher( self ):
+        pass
+
+    def loadStatusCache( self ):
+        return False
+
+    def saveStatusCache( self ):
+        pass
+
+    def usesFolderStatus( self ):
+        return False
+
+    def updateState( self, all_paths=None ):
         pass
 
 class ScmProjectPlaceholderTreeNode:
@@ -74,5 +89,8 @@ class ScmProjectPlaceholderTreeNode:
     def getAllFileNames( self ):
         return []
 
+    def numChangedFiles( self ):
+        return 0
+
     def isByPath( self ):
         return False
@@ -109,6 +109,12 @@ class WbScmTableSortFilter(QtCore.QSortFilterProxyModel):
 
             return left > right
 
+        if column == model.col_remote:
+            left = (left_ent.remoteAsString(), left_ent.name)
+            right = (right_ent.remoteAsString(), right_ent.name)
+
+            return left < right
+
         if column == model.col_date:
             left = (left_ent.stat().st_mtime, left_ent.name)
             right = (right_ent.stat().st_mtime, right_ent.name)
@@ -142,12 +148,13 @@ class WbScmTableModel(QtCore.QAbstractTableModel):
     col_include = 0
     col_staged = 1
     col_status = 2
-    col_name = 3
-    col_date = 4
-    col_type = 5
-    col_num_columns = 6
+    col_remote = 3
+    col_name = 4
+    col_date = 5
+    col_type = 6
+    col_num_columns = 7
 
-    column_titles = (U_('Commit'), U_('Staged'), U_('Status'), U_('Name'), U_('Date'), U_('Type'))
+    column_titles = (U_('Commit'), U_('Staged'), U_('Status'), U_('Remote'), U_('Name'), U_('Date'), U_('Type'))
 
     def __init__( self, app ):
         self.app = app
@@ -208,6 +215,9 @@ class WbScmTableModel(QtCore.QAbstractTableModel):
             elif col == self.col_status:
                 return entry.statusAsString()
 
+            elif col == self.col_remote:
+                return entry.remoteAsString()
+
             elif col == self.col_name:
                 # entry.name maybe a pathlib.Path object
                 name = str(entry.name)
@@ -443,6 +453,12 @@ class WbScmTableEntry:
 
         return self.status.getUnstagedAbbreviatedStatus()
 
+    def remoteAsString( self ):
+        if self.status is None:
+            return ''
+
+        return self.status.getRemoteAbbreviatedStatus()
+
 def os_scandir( path ):
     if hasattr( os, 'scandir' ):
         return os.scandir( path )
@@ -23,6 +23,9 @@ import wb_background_thread
 from wb_background_thread import thread_switcher
 
 class WbScmTableView(wb_table_view.WbTableView):
+    # number of filenames given to each call of an execute_many_function
+    table_action_batch_size = 500
+
     def __init__( self, app, main_window ):
         self.app = app
         self.main_window = main_window
@@ -75,6 +78,7 @@ class WbScmTableView(wb_table_view.WbTableView):
         self.setColumnWidth( self.table_model.col_include, em*4 )
         self.setColumnWidth( self.table_model.col_staged, em*4 )
         self.setColumnWidth( self.table_model.col_status, em*4 )
+        self.setColumnWidth( self.table_model.col_remote, em*4 )
         self.setColumnWidth( self.table_model.col_name, em*32 )
         self.setColumnWidth( self.table_model.col_date, em*20 )
         self.setColumnWidth( self.table_model.col_type, em*6 )
@@ -219,6 +223,64 @@ class WbScmTableView(wb_table_view.WbTableView):
 
         self._debug( 'tableActionViewRepo_Bg done' )
 
+    #
+    #   like tableActionViewRepo_Bg but execute_many_function is called on
+    #   the background thread with batches of up to table_action_batch_size
+    #   filenames. The progress is updated after each batch and the
+    #   Cancel button of the status bar stops the batches that have
+    #   not started.
+    #
+    @thread_switcher
+    def tableActionViewRepoMany_Bg( self, execute_many_function, are_you_sure_function=None, finalise_function=None ):
+        self._debug( 'tableActionViewRepoMany_Bg start' )
+        all_filenames = self.__tableActionViewRepoPrep( are_you_sure_function )
+
+        if len(all_filenames) > 0:
+            scm_project = self.selectedScmProject()
+
+            progress = self.app.top_window.progress
+            progress.start( T_('%(count)d of %(total)d files %(percent)d%%'), len(all_filenames), cancellable=True )
+
+            for start in range( 0, len(all_filenames), self.table_action_batch_size ):
+                if progress.isCancelRequested():
+                    self.app.log.info( T_('Cancelled after %(count)d of %(total)d files') %
+                                        {'count': start
+                                        ,'total': len(all_filenames)} )
+                    break
+
+                all_batch_filenames = all_filenames[start:start + self.table_action_batch_size]
+                self._debug( 'tableActionViewRepoMany_Bg exec %r %d files' % (execute_many_function, len(all_batch_filenames)) )
+
+                yield self.app.switchToBackground
+
+                try:
+                    execute_many_function( scm_project, all_batch_filenames )
+                    batch_failed = False
+
+                except Exception:
+                    self.app.log.exception( 'tableActionViewRepoMany_Bg %r' % (execute_many_function,) )
+                    batch_failed = True
+
+                yield self.app.switchToForeground
+
+                if batch_failed:
+                    break
+
+                progress.incEventCount( len(all_batch_filenames) )
+
+            progress.end()
+
+            if finalise_function is not None:
+                if wb_background_thread.requiresThreadSwitcher( finalise_function ):
+                    self._debug( 'tableActionViewRepoMany_Bg fin yield from %r' % (finalise_function,) )
+                    yield from finalise_function( scm_project )
+
+                else:
+                    self._debug( 'tableActionViewRepoMany_Bg fin call %r' % (finalise_function,) )
+                    finalise_function( scm_project )
+
+        self._debug( 'tableActionViewRepoMany_Bg done' )
+
     def __tableActionViewRepoPrep( self, are_you_sure_function ):
         folder_path = self.selectedAbsoluteFolder()
         if folder_path is None:
@@ -10,11 +10,14 @@
     wb_scm_tree_model.py
 
 '''
+import threading
+
 from PyQt5 import QtWidgets
 from PyQt5 import QtGui
 from PyQt5 import QtCore
 
 import wb_scm_project_place_holder
+import wb_status_cache
 
 from wb_background_thread import thread_switcher
 
@@ -51,9 +54,14 @@ class WbScmTreeModel(QtGui.QStandardItemModel):
         super().__init__()
 
         self.all_scm_projects = {}
+        # names of the projects that have had their status cache loaded
+        self.all_status_cache_projects = set()
 
         self.selected_node = None
 
+        # folders with changed files below them
+        self.brush_has_changed_files = QtGui.QBrush( QtGui.QColor( 0, 0, 255 ) )
+
     def loadNextProject( self, index ):
         all_projects = sorted( self.app.prefs.getAllProjects() )
         if index < len(all_projects):
@@ -70,7 +78,19 @@ class WbScmTreeModel(QtGui.QStandardItemModel):
         self.all_scm_projects[ scm_project.tree.name ] = (scm_project, tree_node)
         self.appendRow( tree_node )
 
+        # the watcher calls back on its own thread
+        def workingTreeChanged():
+            self.app.runInForeground( self.app.top_window.workingTreeChangedHandler, (scm_project,) )
+
+        scm_project.startWatcher( workingTreeChanged )
+
     def delProject( self, project_name ):
+        if project_name in self.all_scm_projects:
+            scm_project, tree_node = self.all_scm_projects.pop( project_name )
+            scm_project.stopWatcher()
+            wb_status_cache.deleteStatusCache( scm_project.prefs_project )
+            self.all_status_cache_projects.discard( project_name )
+
         item = self.invisibleRootItem()
 
         row = 0
@@ -88,10 +108,22 @@ class WbScmTreeModel(QtGui.QStandardItemModel):
 
         self.removeRow( row, QtCore.QModelIndex() )
 
+    # the caches are written by a thread of their own so that the window
+    # closes at once, the app does not exit until the caches are written
+    def saveStatusCaches( self ):
+        all_scm_projects = [scm_project for scm_project, tree_node in self.all_scm_projects.values()]
+
+        thread = threading.Thread( name='save status caches', target=self.__saveStatusCaches, args=(all_scm_projects,) )
+        thread.start()
+
+    def __saveStatusCaches( self, all_scm_projects ):
+        for scm_project in all_scm_projects:
+            scm_project.saveStatusCache()
+
     event_counter = 0
 
     @thread_switcher
-    def refreshTree_Bg( self ):
+    def refreshTree_Bg( self, all_paths=None ):
         WbScmTreeModel.event_counter += 1
         event = WbScmTreeModel.event_counter
 
@@ -100,12 +132,34 @@ class WbScmTreeModel(QtGui.QStandardItemModel):
             return
 
         scm_project = self.selected_node.scm_project_tree_node.project
+        folder = self.selected_node.scm_project_tree_node.relativePath()
         self.app.top_window.setStatusAction( T_('Update status of %s') % (scm_project.projectName(),) )
+
+        # when a project is first selected show the status saved when
+        # the workbench was last used while its status is recalculated
+        load_status_cache = scm_project.tree.name not in self.all_status_cache_projects
+        self.all_status_cache_projects.add( scm_project.tree.name )
+
         yield self.app.switchToBackground
         self._debug( '%d:WbScmTreeModel.refreshTree_Bg() in Bg self.selected_node %r' % (event, self.selected_node) )
 
+        if load_status_cache:
+            if scm_project.loadStatusCache():
+                yield self.app.switchToForeground
+
+                scm_project, tree_node = self.all_scm_projects[ scm_project.tree.name ]
+                tree_node.update( scm_project.tree )
+                if self.selected_node is not None:
+                    self.table_model.setScmProjectTreeNode( self.selected_node.scm_project_tree_node )
+
+                yield self.app.switchToBackground
+
         # update the project data
-        scm_project.updateState()
+        if scm_project.usesFolderStatus():
+            scm_project.updateFolderState( folder, all_paths )
+
+        else:
+            scm_project.updateState( all_paths )
 
         yield self.app.switchToForeground
         self._debug( '%d:WbScmTreeModel.refreshTree_Bg() in Fg self.selected_node %r' % (event, self.selected_node) )
@@ -151,6 +205,9 @@ class WbScmTreeModel(QtGui.QStandardItemModel):
         item = self.invisibleRootItem()
 
         for name in [bookmark.project_name] + list( bookmark.path.parts ):
+            if item is not self.invisibleRootItem():
+                item.loadRows()
+
             row = 0
             while True:
                 child = item.child( row )
@@ -179,6 +236,32 @@ class WbScmTreeModel(QtGui.QStandardItemModel):
 
         return None
 
+    # the rows of a folder are added when it is expanded
+    def __projectTreeNode( self, index ):
+        if not index.isValid():
+            return None
+
+        return self.itemFromIndex( index )
+
+    def hasChildren( self, index=QtCore.QModelIndex() ):
+        node = self.__projectTreeNode( index )
+        if node is None:
+            return super().hasChildren( index )
+
+        return node.hasFolders()
+
+    def canFetchMore( self, index ):
+        node = self.__projectTreeNode( index )
+        if node is None:
+            return False
+
+        return node.canLoadRows()
+
+    def fetchMore( self, index ):
+        node = self.__projectTreeNode( index )
+        if node is not None:
+            node.loadRows()
+
     def flags( self, index ):
         # turn off edit as that stops double click to expand
         return super().flags( index ) & ~QtCore.Qt.ItemIsEditable
@@ -217,6 +300,10 @@ class WbScmTreeModel(QtGui.QStandardItemModel):
             if old_project != new_project:
                 need_to_refresh = True
 
+        # the status of each folder is updated when it is selected
+        if selected_node.scm_project_tree_node.project.usesFolderStatus():
+            need_to_refresh = True
+
         self.selected_node = selected_node
 
         if need_to_refresh:
@@ -234,28 +321,62 @@ class WbScmTreeModel(QtGui.QStandardItemModel):
 
         return self.selected_node.scm_project_tree_node
 
+#
+#   The rows of the folders of a ProjectTreeNode are only added when
+#   the node is expanded, see WbScmTreeModel.fetchMore(), and only the
+#   nodes that have their rows are updated with the status of the project.
+#
 class ProjectTreeNode(QtGui.QStandardItem):
     def __init__( self, model, scm_project_tree_node ):
         self.model = model
         self._debug = self.model._debug
 
         self.scm_project_tree_node = scm_project_tree_node
+        self.__rows_loaded = False
 
         super().__init__( self.scm_project_tree_node.name )
+        self.__updateForeground()
 
-        for tree in sorted( self.scm_project_tree_node.getAllFolderNodes() ):
-            self.appendRow( ProjectTreeNode( self.model, tree ) )
+    def __updateForeground( self ):
+        if self.scm_project_tree_node.numChangedFiles() > 0:
+            self.setForeground( self.model.brush_has_changed_files )
+
+        else:
+            self.setData( None, QtCore.Qt.ForegroundRole )
 
     def __repr__( self ):
         return '<ProjectTreeNode: %s>' % (self.text(),)
 
+    def hasFolders( self ):
+        if self.__rows_loaded:
+            return self.rowCount() > 0
+
+        return len( self.scm_project_tree_node.getAllFolderNames() ) > 0
+
+    def canLoadRows( self ):
+        return not self.__rows_loaded and self.hasFolders()
+
+    def loadRows( self ):
+        if self.__rows_loaded:
+            return
+
+        self.__rows_loaded = True
+        for tree in sorted( self.scm_project_tree_node.getAllFolderNodes() ):
+            self.appendRow( ProjectTreeNode( self.model, tree ) )
+
     def update( self, scm_project_tree_node, indent=0 ):
         # replace the old scm_project_tree_node with the new one from updateStatus()
         self.scm_project_tree_node = scm_project_tree_node
+        self.__updateForeground()
 
         self._debug( '%*sProjectTreeNode.update name %s' % (indent, '', self.text()) )
 
-        self._debug( '%*sProjectTreeNode.update all_folders %r' % (indent, '', list( scm_project_tree_node.getAllFolderNames() )) )
+        if not self.__rows_loaded:
+            # the rows are made from the new scm_project_tree_node when expanded
+            return
+
+        if self._debug.isEnabled():
+            self._debug( '%*sProjectTreeNode.update all_folders %r' % (indent, '', list( scm_project_tree_node.getAllFolderNames() )) )
 
         # do the deletes first
         all_row_names = set()
@@ -268,7 +389,7 @@ class ProjectTreeNode(QtGui.QStandardItem):
                 self.removeRow( row )
 
             else:
-                # recursive update of the whole tree
+                # recursive update of the expanded nodes
                 item.update( scm_project_tree_node.getFolder( item.text() ), indent+4 )
 
                 all_row_names.add( item.text() )
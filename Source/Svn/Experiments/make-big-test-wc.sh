@@ -0,0 +1,47 @@
+#!/bin/bash
+#
+#   make-big-test-wc.sh [<folders> [<files-per-folder>]]
+#
+#   make a working copy with folders x files-per-folder files,
+#   100,000 by default, with some changed and unversioned files
+#   for svn_wc_db_benchmark.py
+#
+set -e
+
+FOLDERS=${1:-1000}
+FILES=${2:-100}
+
+BASE=${TMPDIR:? set TMPDIR}/test-svn-big-wc
+rm -rf ${BASE}
+
+REPO=${BASE}/repo
+IMPORT=${BASE}/import
+WC=${BASE}/wc
+
+mkdir -p ${REPO} ${IMPORT}/trunk
+
+svnadmin create ${REPO}
+
+for (( folder=0; folder<FOLDERS; folder++ ))
+do
+    mkdir -p ${IMPORT}/trunk/folder-$(( folder / 100 ))/sub-${folder}
+    for (( file=0; file<FILES; file++ ))
+    do
+        echo "folder ${folder} file ${file}" >${IMPORT}/trunk/folder-$(( folder / 100 ))/sub-${folder}/file-${file}.txt
+    done
+done
+
+svn import -q ${IMPORT} file://${REPO} -m "import"
+svn checkout -q file://${REPO}/trunk ${WC}
+
+cd ${WC}
+
+# changed, unversioned and deleted files in a few folders
+for (( folder=0; folder<FOLDERS; folder+=100 ))
+do
+    echo changed >>folder-$(( folder / 100 ))/sub-${folder}/file-0.txt
+    echo new >folder-$(( folder / 100 ))/sub-${folder}/new.txt
+    svn rm -q folder-$(( folder / 100 ))/sub-${folder}/file-1.txt
+done
+
+echo ${WC}
@@ -0,0 +1,88 @@
+#
+#   svn_wc_db_benchmark.py <wc> [<repeat>]
+#
+#   compare status2 of the whole working copy with reading
+#   the wc.db and using status2 only on the folders that
+#   have changed paths, which is what SvnProject does
+#
+#   make a working copy to test with make-big-test-wc.sh
+#
+import sys
+import os
+import time
+import pathlib
+
+import pysvn
+
+import wb_working_tree_walker
+import wb_svn_wc_db
+
+wc_path = pathlib.Path( sys.argv[1] ).absolute()
+repeat = int( sys.argv[2] ) if len(sys.argv) > 2 else 3
+
+client = pysvn.Client()
+
+def statusStatus2():
+    num_changed = 0
+    all_states = client.status2( str(wc_path) )
+    for state in all_states:
+        if state.node_status != pysvn.wc_status_kind.normal:
+            num_changed += 1
+
+    return len(all_states), num_changed
+
+def statusWcDb():
+    all_nodes = wb_svn_wc_db.readWorkingCopyNodes( wc_path )
+    if all_nodes is None:
+        return 'wc.db cannot be used'
+
+    num_paths = 0
+    all_seen_relpaths = {''}
+    all_candidate_folders = set()
+
+    for walked in wb_working_tree_walker.walkWorkingTree( wc_path ):
+        folder_relpath = wb_svn_wc_db.wcRelpath( walked.path )
+        if folder_relpath not in all_nodes:
+            continue
+
+        for name in walked.all_folder_names:
+            relpath = wb_svn_wc_db.joinRelpath( folder_relpath, name )
+            all_seen_relpaths.add( relpath )
+            num_paths += 1
+
+            node = all_nodes.get( relpath )
+            if node is None or node.needs_status or node.kind != 'dir':
+                all_candidate_folders.add( folder_relpath )
+
+        for name in walked.all_file_names:
+            relpath = wb_svn_wc_db.joinRelpath( folder_relpath, name )
+            all_seen_relpaths.add( relpath )
+            num_paths += 1
+
+            node = all_nodes.get( relpath )
+            if node is None or not node.isUnchanged( os.lstat( os.path.join( str(wc_path), walked.path, name ) ) ):
+                all_candidate_folders.add( folder_relpath )
+
+    for relpath in all_nodes:
+        if relpath not in all_seen_relpaths:
+            all_candidate_folders.add( relpath.rpartition( '/' )[0] )
+
+    num_changed = 0
+    for folder_relpath in all_candidate_folders:
+        num_changed += len( client.status2( str(wc_path / folder_relpath), depth=pysvn.depth.immediates, get_all=False ) )
+
+    return num_paths, num_changed, len(all_candidate_folders)
+
+def bench( title, fn ):
+    all_times = []
+    for _ in range( repeat ):
+        start = time.perf_counter()
+        result = fn()
+        all_times.append( time.perf_counter() - start )
+
+    print( '%-20s best %8.3fs  worst %8.3fs  counts %r' % (title, min(all_times), max(all_times), result) )
+    return min(all_times)
+
+old = bench( 'status2', statusStatus2 )
+new = bench( 'wc.db', statusWcDb )
+print( 'speedup %.1fx' % (old / new,) )
@@ -0,0 +1,76 @@
+'''
+ ====================================================================
+ Copyright (c) 2016 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_svn_client_pool.py
+
+    one pysvn.Client for each thread that is shared by
+    all the svn projects
+
+'''
+import threading
+
+import pysvn
+
+import wb_background_thread
+
+#
+#   A pysvn.Client can only be used by one thread at a time so each
+#   thread is given its own client. The clients are not tied to a
+#   working copy and share the credentials that svn saves in its
+#   config dir, so all the projects use the same clients.
+#
+#   The login and ssl callbacks run on the foreground thread. A
+#   client made for another thread calls them via the foreground.
+#
+#   The status of the repositories is fetched by one thread that is
+#   kept for as long as the app runs, so that its client is reused.
+#
+class SvnClientPool:
+    def __init__( self, app, get_login_callback, ssl_server_trust_prompt_callback ):
+        self.app = app
+
+        self.__get_login_callback = get_login_callback
+        self.__ssl_server_trust_prompt_callback = ssl_server_trust_prompt_callback
+
+        self.__thread_local = threading.local()
+
+        self.__remote_status_thread = None
+
+    def client( self, notify_callback ):
+        # notify_callback is the svnCallbackNotify of the project using the client
+        client = getattr( self.__thread_local, 'client', None )
+        if client is None:
+            client = self.__newClient()
+            self.__thread_local.client = client
+
+        client.callback_notify = notify_callback
+        return client
+
+    def runInRemoteStatusThread( self, function, args ):
+        if self.__remote_status_thread is None:
+            self.__remote_status_thread = wb_background_thread.BackgroundThread( self.app )
+            self.__remote_status_thread.name = 'svn remote status'
+            self.__remote_status_thread.start()
+
+        self.__remote_status_thread.addWork( function, args )
+
+    def __newClient( self ):
+        client = pysvn.Client()
+        client.exception_style = 1
+        client.commit_info_style = 2
+
+        if self.app.isForegroundThread():
+            client.callback_get_login = self.__get_login_callback
+            client.callback_ssl_server_trust_prompt = self.__ssl_server_trust_prompt_callback
+
+        else:
+            client.callback_get_login = wb_background_thread.GetReturnFromCallingFunctionOnMainThread( self.app, self.__get_login_callback )
+            client.callback_ssl_server_trust_prompt = wb_background_thread.GetReturnFromCallingFunctionOnMainThread( self.app, self.__ssl_server_trust_prompt_callback )
+
+        return client
@@ -21,6 +21,8 @@ import wb_table_view
 
 import wb_svn_project
 
+from wb_background_thread import thread_switcher
+
 def U_( s: str ) -> str:
     return s
 
@@ -43,6 +45,7 @@ class SvnLogHistoryWindowComponents(wb_ui_components.WbMainWindowComponents):
         # ----------------------------------------
         t = addToolBar( T_('svn info') )
         addTool( t, T_('Diff'), act.tableActionSvnDiffLogHistory, act.enablerTableSvnDiffLogHistory, 'toolbar_images/diff.png' )
+        addTool( t, T_('Load More'), act.tableActionSvnLogHistoryLoadMore_Bg, act.enablerTableSvnLogHistoryLoadMore )
         #addTool( t, T_('Annotate'), act.tableActionSvnAnnotateLogHistory, act.enablerTableSvnAnnotateLogHistory )
 
     def setupTableContextMenu( self, m, addMenu ):
@@ -68,6 +71,14 @@ class WbSvnLogHistoryView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrac
         self.filename = None
         self.svn_project = None
 
+        # the log is fetched a page at a time
+        self.__log_since = None
+        self.__log_until = None
+        self.__log_oldest_revision = None
+        self.__log_is_complete = True
+        self.__log_is_loading = False
+        self.__tags_loaded = False
+
         self.ui_component = SvnLogHistoryWindowComponents( self.app.getScmFactory( 'svn' ) )
 
         self.log_model = WbSvnLogHistoryModel( self.app )
@@ -174,16 +185,111 @@ class WbSvnLogHistoryView(wb_main_window.WbMainWindow, wb_tracked_qwidget.WbTrac
     def isScmTypeActive( self, scm_type ):
         return scm_type == 'svn'
 
-    def showCommitLogForFile( self, svn_project, filename, all_commit_nodes ):
+    @thread_switcher
+    def showCommitLogForFile_Bg( self, svn_project, filename, options ):
         self.filename = filename
         self.svn_project = svn_project
 
-        self.log_model.loadCommitLogForFile( all_commit_nodes )
+        self.__log_since = options.getSince()
+        self.__log_until = options.getUntil()
+        self.__log_oldest_revision = None
+        self.__log_is_complete = False
+        self.__tags_loaded = False
+
+        self.log_model.clearCommitLog()
+
+        yield from self.__loadCommitLogPages_Bg( options.getLimit() )
+
+    def canLoadMoreCommitLog( self ):
+        return not self.__log_is_complete and not self.__log_is_loading
+
+    @thread_switcher
+    def loadMoreCommitLog_Bg( self ):
+        yield from self.__loadCommitLogPages_Bg( self.svn_project.log_page_size )
+
+    #
+    #   Each page of the log is added to the model as it arrives so
+    #   that the first commits are shown without waiting for the whole
+    #   log. limit is the number of commits to load, None loads all
+    #   of the log.
+    #
+    @thread_switcher
+    def __loadCommitLogPages_Bg( self, limit ):
+        self.__log_is_loading = True
+        self.updateEnableStates()
+
+        self.ui_component.progress.start( T_('Logs %(count)d') )
+
+        num_loaded = 0
+        while not self.__log_is_complete and (limit is None or num_loaded < limit):
+            page_size = self.svn_project.log_page_size
+            if limit is not None:
+                page_size = min( page_size, limit - num_loaded )
+
+            yield self.app.switchToBackground
+
+            try:
+                all_commit_nodes = self.svn_project.cmdCommitLogForFile( self.filename, page_size,
+                                        self.__log_since, self.__log_until, self.__log_oldest_revision )
+
+            except wb_svn_project.ClientError as e:
+                self.svn_project.logClientError( e, 'Cannot get commit logs for %s:%s' % (self.svn_project.projectName(), self.filename) )
+                all_commit_nodes = None
+
+            yield self.app.switchToForeground
+
+            if all_commit_nodes is None:
+                break
+
+            if len(all_commit_nodes) < page_size:
+                self.__log_is_complete = True
+
+            if self.__log_oldest_revision is not None:
+                # the since revision can be logged again
+                all_commit_nodes = [node for node in all_commit_nodes
+                                    if node.revision.number < self.__log_oldest_revision]
+
+            if len(all_commit_nodes) > 0:
+                self.__log_oldest_revision = all_commit_nodes[-1].revision.number
+                if self.__log_oldest_revision <= 0:
+                    self.__log_is_complete = True
+
+                self.log_model.appendCommitLog( all_commit_nodes )
+                self.ui_component.progress.incEventCount( len(all_commit_nodes) )
+                num_loaded += len(all_commit_nodes)
+
+            else:
+                self.__log_is_complete = True
+
+            if not self.isVisible():
+                self.log_table.resizeColumnToContents( self.log_model.col_date )
+                self.show()
+
+            if not self.__tags_loaded:
+                self.__tags_loaded = True
+                yield from self.__loadTags_Bg()
 
-        self.log_table.resizeColumnToContents( self.log_model.col_date )
+        self.ui_component.progress.end()
 
+        self.__log_is_loading = False
         self.updateEnableStates()
 
+    @thread_switcher
+    def __loadTags_Bg( self ):
+        yield self.app.switchToBackground
+
+        try:
+            all_tag_nodes = self.svn_project.cmdTagsForFile( self.filename )
+
+        except wb_svn_project.ClientError as e:
+            self.svn_project.logClientError( e, 'Cannot get tags for %s:%s' % (self.svn_project.projectName(), self.filename) )
+            # continue to show the logs we have got
+            all_tag_nodes = []
+
+        yield self.app.switchToForeground
+
+        self.log_model.addTags( all_tag_nodes )
+
     def selectionChangedCommit( self ):
         self.current_commit_selections = [index.row() for index in self.log_table.selectedIndexes() if index.column() == 0]
 
@@ -246,13 +352,56 @@ class WbSvnLogHistoryModel(QtCore.QAbstractTableModel):
         self.all_commit_nodes  = []
         self.all_tags_by_rev = {}
 
+        # tags that are older than the commits loaded so far
+        self.__all_pending_tag_nodes = []
+
         self.__brush_is_tag = QtGui.QBrush( QtGui.QColor( 0, 0, 255 ) )
 
-    def loadCommitLogForFile( self, all_commit_nodes ):
+    def clearCommitLog( self ):
         self.beginResetModel()
-        self.all_commit_nodes = all_commit_nodes
+        self.all_commit_nodes = []
+        self.__all_pending_tag_nodes = []
         self.endResetModel()
 
+    def appendCommitLog( self, all_commit_nodes ):
+        # all_commit_nodes are older than the commits in the model
+        first_row = len(self.all_commit_nodes)
+
+        self.beginInsertRows( QtCore.QModelIndex(), first_row, first_row + len(all_commit_nodes) - 1 )
+        self.all_commit_nodes.extend( all_commit_nodes )
+        self.endInsertRows()
+
+        self.__insertTags()
+
+    def addTags( self, all_tag_nodes ):
+        self.__all_pending_tag_nodes.extend( all_tag_nodes )
+        self.__insertTags()
+
+    def __insertTags( self ):
+        # a tag is shown once the commit it was copied from is loaded
+        if len(self.all_commit_nodes) == 0:
+            return
+
+        oldest_revision = self.all_commit_nodes[-1].revision.number
+
+        all_pending_tag_nodes = []
+        for tag_node in self.__all_pending_tag_nodes:
+            if tag_node.tag_copyfrom_revision < oldest_revision:
+                all_pending_tag_nodes.append( tag_node )
+                continue
+
+            # newest revision first
+            row = 0
+            while( row < len(self.all_commit_nodes)
+            and self.all_commit_nodes[ row ].revision.number >= tag_node.revision.number ):
+                row += 1
+
+            self.beginInsertRows( QtCore.QModelIndex(), row, row )
+            self.all_commit_nodes.insert( row, tag_node )
+            self.endInsertRows()
+
+        self.__all_pending_tag_nodes = all_pending_tag_nodes
+
     def rowCount( self, parent ):
         return len( self.all_commit_nodes )
 
@@ -10,21 +10,31 @@
     wb_svn_project.py
 
 '''
+import concurrent.futures
+import os
 import pathlib
 import sys
 import tempfile
+import time
 import pysvn
 
 import wb_date
 import wb_read_file
 import wb_annotate_node
-import wb_background_thread
+import wb_working_tree_watcher
+import wb_working_tree_walker
+import wb_path_index
+import wb_status_cache
+import wb_marshal_file
 import wb_svn_utils
+import wb_svn_wc_db
+import wb_svn_tag_index
 
 ClientError = pysvn.ClientError
 
 class SvnProject:
     svn_depth_empty = pysvn.depth.empty
+    svn_depth_immediates = pysvn.depth.immediates
     svn_depth_infinity = pysvn.depth.infinity
 
     svn_rev_head = pysvn.Revision( pysvn.opt_revision_kind.head )
@@ -32,6 +42,32 @@ class SvnProject:
     svn_rev_working = pysvn.Revision( pysvn.opt_revision_kind.working )
     svn_rev_r0 = pysvn.Revision( pysvn.opt_revision_kind.number, 0 )
 
+    # above this many changed paths a full status is faster
+    # than a status of each path and its folder
+    max_dirty_paths_for_status_for_paths = 100
+
+    # read the unchanged nodes from the wc.db and only use
+    # status2 for the folders that have changes
+    use_wc_db_status = True
+    # above this many folders with changes status2 of the
+    # whole working copy is faster
+    max_folders_for_wc_db_status = 200
+
+    # working copies with at least this many paths only have
+    # the status of the selected folder updated
+    min_paths_for_folder_status = 20000
+
+    # seconds that the status from the repository, shown in
+    # the remote column, is used before it is fetched again
+    remote_status_ttl = 300
+
+    # the number of log entries in each page of the log history
+    log_page_size = 200
+
+    # the externals are working copies of their own and
+    # this many have their status2 run at the same time
+    max_workers_for_externals_status = 8
+
     def __init__( self, app, prefs_project, ui_components ):
         self.app = app
         self.ui_components = ui_components
@@ -42,34 +78,44 @@ class SvnProject:
         self.__notification_of_files_in_conflict = 0
 
         self.prefs_project = prefs_project
-        self.__client_fg = pysvn.Client()
-        self.__client_fg.exception_style = 1
-        self.__client_fg.commit_info_style = 2
-        self.__client_fg.callback_notify = self.svnCallbackNotify
-        self.__client_fg.callback_get_login = self.ui_components.svnGetLogin
-        self.__client_fg.callback_ssl_server_trust_prompt = self.ui_components.svnSslServerTrustPrompt
-
-        self.__client_bg = pysvn.Client()
-        self.__client_bg.exception_style = 1
-        self.__client_bg.commit_info_style = 2
-        self.__client_bg.callback_notify = self.svnCallbackNotify
-        self.__client_bg.callback_get_login = wb_background_thread.GetReturnFromCallingFunctionOnMainThread( self.app, self.ui_components.svnGetLogin )
-        self.__client_bg.callback_ssl_server_trust_prompt = wb_background_thread.GetReturnFromCallingFunctionOnMainThread( self.app, self.ui_components.svnSslServerTrustPrompt )
+        self.__client_pool = self.ui_components.clientPool()
 
         if prefs_project is not None:
-            self.tree = SvnProjectTreeNode( self, prefs_project.name, pathlib.Path( '.' ) )
-            self.flat_tree = SvnProjectTreeNode( self, prefs_project.name, pathlib.Path( '.' ) )
+            self.__setPathIndex( wb_path_index.PathIndex() )
 
             self.all_file_state = {}
             self.__stale_status = False
+            self.__status_calculated = False
+
+            self.__watcher = None
+
+            # paths changed by the cmd functions
+            self.__all_stale_paths = set()
+
+            # wc.db when the status was calculated
+            self.__status_cache_fingerprint = None
+            # the status loaded from the status cache
+            self.__cached_status = None
 
             self.__num_uncommitted_files = 0
 
+            # folder -> fingerprint when the folder status was updated
+            self.__uses_folder_status = False
+            self.__all_folder_fingerprints = {}
+
+            self.__changed_callback = None
+
+            # path -> remote abbrev from the last status of the repository
+            self.__all_remote_abbrevs = {}
+            self.__remote_status_time = None
+            self.__remote_status_running = False
+            # the all_file_state that the remote abbrevs are merged into
+            self.__remote_merged_file_state = None
+            self.__all_remote_merged_paths = set()
+
     def client( self ):
-        if self.app.isForegroundThread():
-            return self.__client_fg
-        else:
-            return self.__client_bg
+        # each thread has its own client
+        return self.__client_pool.client( self.svnCallbackNotify )
 
     def scmType( self ):
         return 'svn'
@@ -101,14 +147,64 @@ class SvnProject:
     def numUncommittedFiles( self ):
         return self.__num_uncommitted_files
 
-    def updateState( self ):
-        self._debug( 'updateState() is_stale %r' % (self.__stale_status,) )
+    def startWatcher( self, changed_callback ):
+        if self.__watcher is not None:
+            return
 
-        self.__stale_status = False
+        # also called when the remote status arrives
+        self.__changed_callback = changed_callback
+
+        self.__watcher = wb_working_tree_watcher.createWorkingTreeWatcher(
+                            self.app, self.projectPath(),
+                            [pathlib.Path( '.svn/wc.db' )],
+                            changed_callback )
+
+    def stopWatcher( self ):
+        if self.__watcher is not None:
+            self.__watcher.stop()
+            self.__watcher = None
+
+    def takeStalePaths( self ):
+        # the paths changed by the cmd functions since the last call
+        all_paths = self.__all_stale_paths
+        self.__all_stale_paths = set()
+        return all_paths
+
+    # all_paths limits the update to the paths that have been changed
+    def updateState( self, all_paths=None ):
+        # the first updateState() after the status cache is loaded is a full status
+        self.__cached_status = None
+        self.__updateState( all_paths )
+
+        self.__mergeRemoteStatus()
+        self.__startRemoteStatus()
+
+    def __updateState( self, all_paths ):
+        self._debug( 'updateState( %r ) is_stale %r' % (all_paths, self.__stale_status) )
+
+        if all_paths is None and self.__watcher is not None:
+            changes = self.__watcher.takeChanges()
+            if changes.isEmpty() and self.__status_calculated and not self.__stale_status:
+                self._debug( 'updateState() no changes in working copy' )
+                return
+
+            if( self.__status_calculated
+            and not self.__stale_status
+            and not changes.full_scan_needed
+            and not changes.metadata_changed
+            and len(changes.all_dirty_paths) <= self.max_dirty_paths_for_status_for_paths ):
+                # only files in the working copy have changed
+                all_paths = changes.all_dirty_paths
+
+        if( all_paths is not None
+        and self.__status_calculated
+        and self.projectPath().exists()
+        and self.__calculateStatusForPaths( all_paths ) ):
+            return
 
-        # rebuild the tree
-        self.tree = SvnProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ) )
-        self.flat_tree = SvnProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ) )
+        self.__stale_status = False
+        self.__status_calculated = True
+        self.__all_stale_paths = set()
 
         # protect agsint 
         if not self.projectPath().exists():
@@ -118,42 +214,359 @@ class SvnProject:
 
             self.all_file_state = {}
             self.__num_uncommitted_files = 0
+            self.__status_cache_fingerprint = None
 
         else:
             self.__calculateStatus()
 
-        for path in self.all_file_state:
-            self.__updateTree( path, self.all_file_state[ path ].isDir() )
+        self.__updatePathIndex()
+        self.__setUsesFolderStatus()
 
         #self.dumpTree()
 
-    def __calculateStatus( self ):
-        self.all_file_state = {}
-        self.__num_uncommitted_files = 0
+    #
+    #   In a large working copy only the status of the selected folder
+    #   is updated, at depth immediates. The folder status is kept until
+    #   the folder fingerprint changes. updateState() is still used when
+    #   the status of the whole working copy is needed, for a checkin.
+    #
+    #   numUncommittedFiles() is adjusted for the changes in the folders
+    #   that are updated but does not see the changes in other folders.
+    #
+    def usesFolderStatus( self ):
+        return self.__uses_folder_status
+
+    def __setUsesFolderStatus( self ):
+        self.__uses_folder_status = len(self.all_file_state) >= self.min_paths_for_folder_status
+        self.__all_folder_fingerprints = {}
+
+    def updateFolderState( self, folder, all_paths=None ):
+        self._debug( 'updateFolderState( %s, %r )' % (folder, all_paths) )
+
+        self.__fileStatesFromStatusCache()
+
+        if self.__watcher is not None:
+            # the folder fingerprints show the changes, the next
+            # updateState() must calculate the whole status
+            if not self.__watcher.takeChanges().isEmpty():
+                self.__stale_status = True
+
+        # the folders of paths changed by the cmd functions
+        all_folders = {folder}
+        if all_paths is not None:
+            all_folders.update( path.parent for path in all_paths )
+
+        for update_folder in sorted( all_folders ):
+            fingerprint = self.__folderFingerprint( update_folder )
+            if fingerprint is not None and self.__all_folder_fingerprints.get( update_folder ) == fingerprint:
+                continue
+
+            self.__calculateStatusForFolder( update_folder )
+            self.__all_folder_fingerprints[ update_folder ] = fingerprint
+            self.__stale_status = True
+
+        self.__mergeRemoteStatus()
+        self.__startRemoteStatus()
+
+    #
+    #   The out of date status needs the repository, which can be slow,
+    #   so it is fetched by the remote status thread and never by the status
+    #   update. The result is kept for remote_status_ttl seconds and is
+    #   merged into the file states each time the status is updated.
+    #
+    def __startRemoteStatus( self ):
+        if self.__remote_status_running or not self.projectPath().exists():
+            return
+
+        if( self.__remote_status_time is not None
+        and time.monotonic() - self.__remote_status_time < self.remote_status_ttl ):
+            return
+
+        self._debug( '__startRemoteStatus()' )
+        self.__remote_status_running = True
+
+        self.__client_pool.runInRemoteStatusThread( self.__remoteStatus, () )
+
+    def __remoteStatus( self ):
+        try:
+            # the remote status is not reported in the log
+            client = self.__client_pool.client( self.__ignoreCallbackNotify )
+            all_states = client.status2( str(self.projectPath()), update=True, get_all=False )
+
+        except ClientError as e:
+            self.app.runInBackground( self.__remoteStatusReady, (None, e) )
+            return
+
+        all_remote_abbrevs = {}
+        for state in all_states:
+            abbrev = wb_svn_utils.svnReposStatusFormat( state )
+            if abbrev != '':
+                all_remote_abbrevs[ self.pathForWb( state.path ) ] = abbrev
+
+        # merge on the background thread so that it is not
+        # mixed up with an update of the status
+        self.app.runInBackground( self.__remoteStatusReady, (all_remote_abbrevs, None) )
+
+    def __ignoreCallbackNotify( self, arg_dict ):
+        pass
+
+    def __remoteStatusReady( self, all_remote_abbrevs, error ):
+        self.__remote_status_running = False
+        self.__remote_status_time = time.monotonic()
 
-        repo_root = self.projectPath()
+        if error is not None:
+            self.logClientError( error, T_('Cannot get the repository status of project %s') % (self.projectName(),) )
+            return
+
+        self._debug( '__remoteStatusReady() %d paths' % (len(all_remote_abbrevs),) )
+
+        self.__all_remote_abbrevs = all_remote_abbrevs
+        self.__remote_merged_file_state = None
+        self.__mergeRemoteStatus()
+
+        if self.__changed_callback is not None:
+            self.__changed_callback()
+
+    def __mergeRemoteStatus( self ):
+        if self.__remote_merged_file_state is self.all_file_state:
+            return
+
+        # the paths merged before may be out of date no longer
+        all_file_state = None
+        for path in self.__all_remote_merged_paths | set( self.__all_remote_abbrevs ):
+            file_state = self.all_file_state.get( path )
+            if file_state is None:
+                continue
+
+            remote_abbrev = self.__all_remote_abbrevs.get( path, '' )
+            if file_state.getRemoteAbbreviatedStatus() == remote_abbrev:
+                continue
+
+            if all_file_state is None:
+                all_file_state = dict( self.all_file_state )
+
+            new_file_state = WbSvnFileState( self, path )
+            new_file_state._setStatusCacheRecord( file_state._statusCacheRecord() )
+            new_file_state.setRemoteAbbreviatedStatus( remote_abbrev )
+            all_file_state[ path ] = new_file_state
+
+        if all_file_state is not None:
+            # the changed counts do not depend on the remote status
+            # so the path index is still correct
+            self.all_file_state = all_file_state
+
+        self.__remote_merged_file_state = self.all_file_state
+        self.__all_remote_merged_paths = set( self.__all_remote_abbrevs )
 
-        svn_dir = repo_root / '.svn'
+    def __folderFingerprint( self, folder ):
+        # wc.db changes with every svn command and the
+        # entries of the folder change when a file is edited
+        all_entries = []
+        try:
+            with os.scandir( str(self.projectPath() / folder) ) as all_dir_entries:
+                for dir_entry in all_dir_entries:
+                    if dir_entry.name in wb_working_tree_walker.all_scm_metadata_folder_names:
+                        continue
 
-        all_folders = set( [repo_root] )
-        while len(all_folders) > 0:
-            folder = all_folders.pop()
+                    st = dir_entry.stat( follow_symlinks=False )
+                    all_entries.append( (dir_entry.name, st.st_mtime_ns, st.st_size) )
 
-            for filename in folder.iterdir():
-                abs_path = folder / filename
-                repo_relative = abs_path.relative_to( repo_root )
+        except OSError:
+            return None
 
-                if abs_path.is_dir():
-                    if abs_path != svn_dir:
-                        all_folders.add( abs_path )
+        return (self.__statusCacheFingerprint(), hash( frozenset( all_entries ) ))
 
-                        self.all_file_state[ repo_relative ] = WbSvnFileState( self, repo_relative )
-                        self.all_file_state[ repo_relative ].setIsDir()
+    def __calculateStatusForFolder( self, folder ):
+        try:
+            all_states = self.client().status2( self.pathForSvn( folder ), depth=self.svn_depth_immediates )
 
-                else:
-                    self.all_file_state[ repo_relative ] = WbSvnFileState( self, repo_relative )
+        except ClientError:
+            # the folder is not versioned or has been deleted
+            all_states = []
 
-        for state in self.client().status2( str(self.projectPath()) ):
+        # the folder and the paths in it as they are now
+        all_new_file_state = {}
+
+        folder_state = WbSvnFileState( self, folder )
+        folder_state.setIsDir()
+        all_new_file_state[ folder ] = folder_state
+
+        walked = wb_working_tree_walker.scanFolder( str(self.projectPath()), str(folder) )
+        if walked is not None:
+            for name in walked.all_folder_names:
+                all_new_file_state[ folder / name ] = WbSvnFileState( self, folder / name )
+                all_new_file_state[ folder / name ].setIsDir()
+
+            for name in walked.all_file_names:
+                all_new_file_state[ folder / name ] = WbSvnFileState( self, folder / name )
+
+        for state in all_states:
+            filepath = self.pathForWb( state.path )
+            if filepath not in all_new_file_state:
+                # filepath has been deleted
+                all_new_file_state[ filepath ] = WbSvnFileState( self, filepath )
+
+            all_new_file_state[ filepath ].setState( state )
+            if state.kind == pysvn.node_kind.dir:
+                all_new_file_state[ filepath ].setIsDir()
+
+        self._debug( '__calculateStatusForFolder( %s ) %d paths' % (folder, len(all_new_file_state)) )
+
+        all_file_state = dict( self.all_file_state )
+        path_index = self.__path_index.copy()
+        num_uncommitted_files = self.__num_uncommitted_files
+
+        def removeFileState( path ):
+            nonlocal num_uncommitted_files
+            old_file_state = all_file_state.pop( path, None )
+            if old_file_state is not None and old_file_state.canCommit():
+                num_uncommitted_files -= 1
+
+        # remove the paths that have gone or changed between file and folder
+        for name in list( path_index.allChildNames( folder ) ):
+            path = path_index.childPath( folder, name )
+            new_file_state = all_new_file_state.get( path )
+            if new_file_state is None or new_file_state.isDir():
+                removeFileState( path )
+                path_index.removePath( path )
+
+        for name in list( path_index.allSubFolderNames( folder ) ):
+            sub_folder = folder / name
+            new_file_state = all_new_file_state.get( sub_folder )
+            if new_file_state is None or not new_file_state.isDir():
+                for path in self.__allPathsInFolder( path_index, sub_folder ):
+                    removeFileState( path )
+
+                path_index.removeFolder( sub_folder )
+
+        for path, file_state in all_new_file_state.items():
+            removeFileState( path )
+            all_file_state[ path ] = file_state
+            if file_state.canCommit():
+                num_uncommitted_files += 1
+
+            if file_state.isDir():
+                path_index.addFolder( path )
+                path_index.setChanged( path, wb_path_index.stateHasChanges( file_state ) )
+
+            else:
+                path_index.addPath( path, wb_path_index.stateHasChanges( file_state ) )
+
+        self.all_file_state = all_file_state
+        self.__num_uncommitted_files = num_uncommitted_files
+        self.__setPathIndex( path_index )
+
+    def __allPathsInFolder( self, path_index, folder ):
+        yield folder
+
+        for name in path_index.allChildNames( folder ):
+            yield path_index.childPath( folder, name )
+
+        for name in path_index.allSubFolderNames( folder ):
+            yield from self.__allPathsInFolder( path_index, folder / name )
+
+    def __updatePathIndex( self ):
+        # the tree nodes are created from the index as they are needed
+        path_index = wb_path_index.PathIndex()
+        for path, file_state in self.all_file_state.items():
+            if file_state.isDir():
+                # folders are not listed as files
+                path_index.addFolder( path )
+                path_index.setChanged( path, wb_path_index.stateHasChanges( file_state ) )
+
+            else:
+                path_index.addPath( path, wb_path_index.stateHasChanges( file_state ) )
+
+        self.__setPathIndex( path_index )
+
+    #
+    #   Only the changed paths and their folders are given to svn status.
+    #   The results are merged into copies of the file states and path
+    #   index. Returns False when a full status is needed as a folder
+    #   has changed.
+    #
+    def __calculateStatusForPaths( self, all_paths ):
+        all_status_paths = set()
+        for path in all_paths:
+            if self.__path_index.hasFolder( path ) or (self.projectPath() / path).is_dir():
+                return False
+
+            all_status_paths.add( path )
+            if path.parent != pathlib.Path( '.' ):
+                all_status_paths.add( path.parent )
+
+        self._debug( '__calculateStatusForPaths() %d paths' % (len(all_status_paths),) )
+
+        all_file_state = dict( self.all_file_state )
+        path_index = self.__path_index.copy()
+        num_uncommitted_files = self.__num_uncommitted_files
+
+        for path in all_status_paths:
+            old_file_state = all_file_state.get( path )
+            if old_file_state is not None and old_file_state.canCommit():
+                num_uncommitted_files -= 1
+
+            try:
+                all_states = self.client().status2( self.pathForSvn( path ), depth=self.svn_depth_empty )
+
+            except ClientError:
+                # neither versioned nor on disk
+                all_states = []
+
+            abs_path = self.projectPath() / path
+            if len(all_states) == 0 and not os.path.lexists( str(abs_path) ):
+                if old_file_state is not None:
+                    del all_file_state[ path ]
+                    path_index.removePath( path )
+
+                continue
+
+            file_state = WbSvnFileState( self, path )
+            if abs_path.is_dir():
+                file_state.setIsDir()
+
+            for state in all_states:
+                file_state.setState( state )
+                if state.kind == pysvn.node_kind.dir:
+                    file_state.setIsDir()
+
+            all_file_state[ path ] = file_state
+            if file_state.canCommit():
+                num_uncommitted_files += 1
+
+            if file_state.isDir():
+                path_index.addFolder( path )
+                path_index.setChanged( path, wb_path_index.stateHasChanges( file_state ) )
+
+            else:
+                path_index.addPath( path, wb_path_index.stateHasChanges( file_state ) )
+
+        self.all_file_state = all_file_state
+        self.__num_uncommitted_files = num_uncommitted_files
+        self.__setPathIndex( path_index )
+        return True
+
+    def __calculateStatus( self ):
+        if self.use_wc_db_status and self.__calculateStatusFromWcDb():
+            self.__status_cache_fingerprint = self.__statusCacheFingerprint()
+            return
+
+        self.all_file_state = {}
+        self.__num_uncommitted_files = 0
+
+        for walked in wb_working_tree_walker.walkWorkingTree( self.projectPath() ):
+            folder = pathlib.Path( walked.path )
+
+            for name in walked.all_folder_names:
+                repo_relative = folder / name
+                self.all_file_state[ repo_relative ] = WbSvnFileState( self, repo_relative )
+                self.all_file_state[ repo_relative ].setIsDir()
+
+            for name in walked.all_file_names:
+                repo_relative = folder / name
+                self.all_file_state[ repo_relative ] = WbSvnFileState( self, repo_relative )
+
+        def setStatus( state ):
             filepath = self.pathForWb( state.path )
 
             if filepath not in self.all_file_state:
@@ -167,31 +580,273 @@ class SvnProject:
             if state.node_status in (pysvn.wc_status_kind.added, pysvn.wc_status_kind.modified, pysvn.wc_status_kind.deleted):
                 self.__num_uncommitted_files += 1
 
-    def __updateTree( self, path, is_dir ):
-        self._debugUpdateTree( '__updateTree path %r' % (path,) )
-        node = self.tree
+        # the externals are reported as 'X' and their
+        # status is read in parallel after the working copy
+        all_external_paths = []
+        for state in self.client().status2( str(self.projectPath()), ignore_externals=True ):
+            setStatus( state )
+            if state.node_status == pysvn.wc_status_kind.external:
+                all_external_paths.append( state.path )
+
+        for state in self.__statusOfExternals( all_external_paths ):
+            setStatus( state )
+
+        self.__status_cache_fingerprint = self.__statusCacheFingerprint()
+
+    #
+    #   Each external has its status2 run on a pool thread, which has
+    #   its own client, so that the status of the externals takes about
+    #   as long as the slowest of them. The externals found inside an
+    #   external are added to the pool as they are found.
+    #
+    #   The states are yielded on the calling thread as each external
+    #   finishes.
+    #
+    def __statusOfExternals( self, all_external_paths ):
+        if len(all_external_paths) == 0:
+            return
+
+        start_time = time.perf_counter()
+        num_externals = 0
+
+        with concurrent.futures.ThreadPoolExecutor( self.max_workers_for_externals_status ) as executor:
+            all_pending = {}
+            for path in all_external_paths:
+                all_pending[ executor.submit( self.__statusOfExternal, path ) ] = path
+
+            while len(all_pending) > 0:
+                all_done, _ = concurrent.futures.wait( all_pending, return_when=concurrent.futures.FIRST_COMPLETED )
+
+                for future in all_done:
+                    path = all_pending.pop( future )
+                    num_externals += 1
+
+                    try:
+                        all_states, duration = future.result()
 
-        self._debugUpdateTree( '__updateTree path.parts %r' % (path.parts,) )
+                    except pysvn.ClientError as e:
+                        self.logClientError( e, T_('Cannot get the status of external %s') % (path,) )
+                        continue
 
-        if is_dir:
-            parts = path.parts[:]
+                    self._debug( '__statusOfExternals() %s %d states %.3fs' % (path, len(all_states), duration) )
+
+                    for state in all_states:
+                        if state.node_status == pysvn.wc_status_kind.external and state.path != path:
+                            all_pending[ executor.submit( self.__statusOfExternal, state.path ) ] = state.path
+
+                        yield state
+
+        self._debug( '__statusOfExternals() %d externals %.3fs' % (num_externals, time.perf_counter() - start_time) )
+
+    def __statusOfExternal( self, path ):
+        # runs on a pool thread
+        start_time = time.perf_counter()
+
+        client = self.__client_pool.client( self.__ignoreCallbackNotify )
+        all_states = client.status2( path, ignore_externals=True )
+
+        return all_states, time.perf_counter() - start_time
+
+    #
+    #   The nodes that the wc.db shows are unchanged, with the size and
+    #   mtime that svn recorded, get a normal status without asking svn.
+    #   The other paths in a versioned folder, changed, new or missing,
+    #   are candidates and status2 is run on each folder that has them.
+    #
+    #   Returns False when the wc.db cannot be used.
+    #
+    def __calculateStatusFromWcDb( self ):
+        all_nodes = wb_svn_wc_db.readWorkingCopyNodes( self.projectPath() )
+        if all_nodes is None:
+            self._debug( '__calculateStatusFromWcDb() wc.db cannot be used' )
+            return False
+
+        all_file_state = {}
+        # folder relpath -> names that status2 must report on
+        all_candidate_names = {}
+        all_seen_relpaths = set()
+
+        def addCandidate( relpath ):
+            folder_relpath, _, name = relpath.rpartition( '/' )
+            all_candidate_names.setdefault( folder_relpath, set() ).add( name )
+
+        root_node = all_nodes.get( '' )
+        if root_node is None:
+            return False
+
+        root_state = WbSvnFileState( self, pathlib.Path( '.' ) )
+        root_state.setIsDir()
+        all_file_state[ pathlib.Path( '.' ) ] = root_state
+        all_seen_relpaths.add( '' )
+        if root_node.needs_status:
+            all_candidate_names.setdefault( '', set() )
 
         else:
-            parts = path.parts[0:-1]
+            root_state.setState( wb_svn_wc_db.normal_dir_status )
+
+        project_path = str( self.projectPath() )
+        for walked in wb_working_tree_walker.walkWorkingTree( self.projectPath() ):
+            folder = pathlib.Path( walked.path )
+            folder_relpath = wb_svn_wc_db.wcRelpath( walked.path )
+            # the paths in folders that are not versioned have no status
+            is_versioned_folder = folder_relpath in all_nodes
+
+            for name in walked.all_folder_names:
+                repo_relative = folder / name
+                file_state = WbSvnFileState( self, repo_relative )
+                file_state.setIsDir()
+                all_file_state[ repo_relative ] = file_state
+
+                if is_versioned_folder:
+                    relpath = wb_svn_wc_db.joinRelpath( folder_relpath, name )
+                    all_seen_relpaths.add( relpath )
+
+                    node = all_nodes.get( relpath )
+                    if node is None or node.needs_status or node.kind != 'dir':
+                        addCandidate( relpath )
+
+                    else:
+                        file_state.setState( wb_svn_wc_db.normal_dir_status )
+
+            for name in walked.all_file_names:
+                repo_relative = folder / name
+                file_state = WbSvnFileState( self, repo_relative )
+                all_file_state[ repo_relative ] = file_state
+
+                if is_versioned_folder:
+                    relpath = wb_svn_wc_db.joinRelpath( folder_relpath, name )
+                    all_seen_relpaths.add( relpath )
+
+                    node = all_nodes.get( relpath )
+                    if node is None:
+                        addCandidate( relpath )
+                        continue
+
+                    try:
+                        stat = os.lstat( os.path.join( project_path, walked.path, name ) )
+
+                    except FileNotFoundError:
+                        # removed since the folder was walked
+                        addCandidate( relpath )
+                        continue
+
+                    if node.isUnchanged( stat ):
+                        file_state.setState( wb_svn_wc_db.normal_file_status )
+
+                    else:
+                        addCandidate( relpath )
+
+        # missing and deleted nodes
+        for relpath in all_nodes:
+            if relpath not in all_seen_relpaths:
+                addCandidate( relpath )
+
+        self._debug( '__calculateStatusFromWcDb() %d nodes %d folders for status2' % (len(all_nodes), len(all_candidate_names)) )
+
+        if len(all_candidate_names) > self.max_folders_for_wc_db_status:
+            return False
+
+        for folder_relpath, all_names in all_candidate_names.items():
+            folder = pathlib.Path( folder_relpath )
+            all_reported_names = set()
+
+            # only the changed paths are reported
+            for state in self.client().status2( self.pathForSvn( folder ), depth=self.svn_depth_immediates, get_all=False ):
+                filepath = self.pathForWb( state.path )
+                if filepath.parent == folder:
+                    all_reported_names.add( filepath.name )
+
+                if filepath not in all_file_state:
+                    # filepath has been deleted
+                    all_file_state[ filepath ] = WbSvnFileState( self, filepath )
+
+                all_file_state[ filepath ].setState( state )
+                if state.kind == pysvn.node_kind.dir:
+                    all_file_state[ filepath ].setIsDir()
+
+            # versioned candidates that status2 did not report are unchanged,
+            # the others are ignored and have no status like the paths in
+            # folders that are not versioned
+            for name in all_names - all_reported_names:
+                node = all_nodes.get( wb_svn_wc_db.joinRelpath( folder_relpath, name ) )
+                filepath = folder / name
+                if node is not None and filepath in all_file_state:
+                    if all_file_state[ filepath ].isDir():
+                        all_file_state[ filepath ].setState( wb_svn_wc_db.normal_dir_status )
+
+                    else:
+                        all_file_state[ filepath ].setState( wb_svn_wc_db.normal_file_status )
+
+        self.all_file_state = all_file_state
+        self.__num_uncommitted_files = sum( 1 for file_state in all_file_state.values() if file_state.canCommit() )
+        return True
 
-        for index, name in enumerate( parts ):
-            self._debugUpdateTree( '__updateTree name %r at node %r' % (name, node) )
+    #
+    #   The status cache lets the last status be shown at startup.
+    #   updateState() still calculates the status as the working
+    #   copy files may have changed since the cache was saved.
+    #
+    #   The paths are looked up in the CachedStatus until the status
+    #   is updated, which needs the file state of every path.
+    #
+    def __statusCacheFingerprint( self ):
+        return wb_marshal_file.statKey( self.projectPath() / '.svn' / 'wc.db' )
+
+    def __newCachedFileState( self, filepath, record ):
+        file_state = WbSvnFileState( self, filepath )
+        file_state._setStatusCacheRecord( record )
+        return file_state
+
+    def loadStatusCache( self ):
+        fingerprint = self.__statusCacheFingerprint()
+        if fingerprint is None:
+            return False
+
+        status = wb_status_cache.readStatusCache( self.prefs_project, fingerprint )
+        if status is None:
+            return False
+
+        cached_status = wb_status_cache.CachedStatus( status,
+                            wb_status_cache.fileStateRecordInfo( self.__newCachedFileState ),
+                            self.__newCachedFileState, False )
+
+        self._debug( 'loadStatusCache() %r' % (cached_status,) )
+
+        self.__cached_status = cached_status
+        self.all_file_state = cached_status.fileStates()
+        self.__num_uncommitted_files = cached_status.num_can_commit
+        self.__setPathIndex( cached_status )
+        self.__setUsesFolderStatus()
+        return True
+
+    def __fileStatesFromStatusCache( self ):
+        if self.__cached_status is None:
+            return
+
+        self.all_file_state = self.__cached_status.allFileStates()
+        self.__cached_status = None
+        self.__updatePathIndex()
 
-            if not node.hasFolder( name ):
-                node.addFolder( name, SvnProjectTreeNode( self, name, pathlib.Path( *path.parts[0:index+1] ) ) )
+    def saveStatusCache( self ):
+        # a status that is still the one loaded from the cache is already saved
+        if self.__status_cache_fingerprint is None or self.__cached_status is not None:
+            return
+
+        status = wb_status_cache.allPathsByFolder( self.all_file_state, WbSvnFileState._statusCacheRecord )
 
-            node = node.getFolder( name )
+        try:
+            wb_status_cache.writeStatusCache( self.prefs_project, self.__status_cache_fingerprint, status )
 
-        self._debugUpdateTree( '__updateTree addFile %r to node %r' % (path, node) )
-        if not is_dir:
-            node.addFileByName( path )
+        except OSError as e:
+            self.app.log.error( T_('Cannot save the status of project %(name)s - %(error)s') %
+                            {'name': self.projectName()
+                            ,'error': e} )
 
-        self.flat_tree.addFileByPath( path )
+    def __setPathIndex( self, path_index ):
+        self.__path_index = path_index
+
+        self.tree = SvnProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ), path_index )
+        self.flat_tree = SvnProjectTreeNode( self, self.prefs_project.name, pathlib.Path( '.' ), path_index, is_by_path=True )
 
     def dumpTree( self ):
         self.tree._dumpTree( 0 )
@@ -256,29 +911,59 @@ class SvnProject:
         self._debug( 'cmdMkdir()' )
         self.client().mkdir( self.pathForSvn( filename ) )
         self.__stale_status = True
+        self.__all_stale_paths.add( filename )
 
     def cmdAdd( self, filename, depth=None, force=False ):
         self._debug( 'cmdAdd( %r )' % (filename,) )
 
         self.client().add( self.pathForSvn( filename ), depth=depth, force=force )
         self.__stale_status = True
+        self.__all_stale_paths.add( filename )
 
     def cmdRevert( self, filename, depth=None ):
         self._debug( 'cmdRevert( %r, %r )' % (filename, depth) )
 
         self.client().revert( self.pathForSvn( filename ), depth=depth )
         self.__stale_status = True
+        self.__all_stale_paths.add( filename )
 
     def cmdResolved( self, filename ):
         self._debug( 'cmdResolved( %r )' % (filename,) )
 
         self.client().resolved( self.pathForSvn( filename ) )
         self.__stale_status = True
+        self.__all_stale_paths.add( filename )
 
     def cmdDelete( self, filename ):
         self._debug( 'cmdDelete( %r )' % (filename,) )
         self.client().remove( self.pathForSvn( filename ) )
         self.__stale_status = True
+        self.__all_stale_paths.add( filename )
+
+    #
+    #   The Many versions of the cmd functions make one client call
+    #   for all the filenames
+    #
+    def cmdAddMany( self, all_filenames, depth=None, force=False ):
+        self._debug( 'cmdAddMany( %d files )' % (len(all_filenames),) )
+
+        self.client().add( [self.pathForSvn( filename ) for filename in all_filenames], depth=depth, force=force )
+        self.__stale_status = True
+        self.__all_stale_paths.update( all_filenames )
+
+    def cmdRevertMany( self, all_filenames, depth=None ):
+        self._debug( 'cmdRevertMany( %d files, %r )' % (len(all_filenames), depth) )
+
+        self.client().revert( [self.pathForSvn( filename ) for filename in all_filenames], depth=depth )
+        self.__stale_status = True
+        self.__all_stale_paths.update( all_filenames )
+
+    def cmdDeleteMany( self, all_filenames ):
+        self._debug( 'cmdDeleteMany( %d files )' % (len(all_filenames),) )
+
+        self.client().remove( [self.pathForSvn( filename ) for filename in all_filenames] )
+        self.__stale_status = True
+        self.__all_stale_paths.update( all_filenames )
 
     def cmdRename( self, filename, new_filename ):
         filestate = self.getFileState( filename )
@@ -294,7 +979,9 @@ class SvnProject:
             except IOError as e:
                 self.app.log.error( 'Renamed failed - %s' % (e,) )
 
-        self.__stale_index = True
+        self.__stale_status = True
+        self.__all_stale_paths.add( filename )
+        self.__all_stale_paths.add( new_filename )
 
     def cmdDiffFolder( self, folder, head=False ):
         self._debug( 'cmdDiffFolder( %r )' % (folder,) )
@@ -380,6 +1067,8 @@ class SvnProject:
                 recurse=False )
 
         self.__stale_status = True
+        # the repository has changed
+        self.__remote_status_time = None
 
         return 'r%d' % (all_revisions[0].revision.number,)
 
@@ -390,13 +1079,19 @@ class SvnProject:
                 revision=revision,
                 depth=depth )
 
+        # the working copy is no longer out of date
+        self.__remote_status_time = None
+
         return all_revisions
 
-    def cmdCommitLogForFile( self, filename, limit=None, since=None, until=None ):
+    # before_revision continues the log from the revision before it
+    def cmdCommitLogForFile( self, filename, limit=None, since=None, until=None, before_revision=None ):
         if limit is None:
             limit = 0
 
-        if until is not None:
+        if before_revision is not None:
+            rev_start = pysvn.Revision( pysvn.opt_revision_kind.number, before_revision-1 )
+        elif until is not None:
             rev_start = pysvn.Revision( pysvn.opt_revision_kind.date, until )
         else:
             rev_start = self.svn_rev_head
@@ -423,20 +1118,66 @@ class SvnProject:
         all_tag_names = set()
         all_tag_logs = []
 
-        for log in self.client().log( tags_url, discover_changed_paths=True ):
-            for changed_path in log.changed_paths:
-                if( changed_path.copyfrom_revision is not None
-                and changed_path.copyfrom_revision.number >= oldest_revision ):
-                    tag_name = changed_path.path.split( '/' )[-1]
+        for record in self.__tagIndex( tags_url ):
+            for action, path, copyfrom_path, copyfrom_revision in record[4]:
+                if( copyfrom_revision is not None
+                and copyfrom_revision >= oldest_revision ):
+                    tag_name = path.split( '/' )[-1]
                     if tag_name not in all_tag_names:
                         all_tag_names.add( tag_name )
 
+                        log = wb_svn_tag_index.WbSvnTagLog( record )
                         log.is_tag = True
                         log.tag_name = tag_name
+                        log.tag_copyfrom_revision = copyfrom_revision
                         all_tag_logs.append( log )
 
         return all_tag_logs
 
+    #
+    #   The tag index of tags_url is saved so that only the commits
+    #   made since the last time need to be logged
+    #
+    def __tagIndex( self, tags_url ):
+        index = wb_svn_tag_index.readTagIndex( tags_url )
+        if index is None:
+            last_revision = None
+            all_records = []
+            rev_end = self.svn_rev_r0
+
+        else:
+            last_revision, all_records = index
+            rev_end = pysvn.Revision( pysvn.opt_revision_kind.number, last_revision )
+
+        new_last_revision = last_revision
+        all_new_records = []
+        for log in self.client().log( tags_url, revision_end=rev_end, discover_changed_paths=True ):
+            if last_revision is not None and log.revision.number <= last_revision:
+                # already in the index
+                continue
+
+            if new_last_revision is None or log.revision.number > new_last_revision:
+                new_last_revision = log.revision.number
+
+            record = wb_svn_tag_index.tagRecordFromLog( log )
+            if record is not None:
+                all_new_records.append( record )
+
+        self._debug( '__tagIndex( %s ) %d new records' % (tags_url, len(all_new_records)) )
+
+        if new_last_revision != last_revision:
+            all_records = all_new_records + all_records
+
+            try:
+                wb_svn_tag_index.writeTagIndex( tags_url, new_last_revision, all_records )
+
+            except OSError as e:
+                self.app.log.error( T_('Cannot save the tag index of %(url)s - %(error)s') %
+                                {'url': tags_url
+                                ,'error': e} )
+
+        return all_records
+
     def __tagsUrlForFile( self, filename ):
         info = self.cmdInfo( filename )
         return self.expandTagsUrl( self.prefs_project.tags_url, info['URL'] )
@@ -558,18 +1299,33 @@ class SvnProject:
     def getNotificationOfFilesInConflictCount( self ):
         return self.__notification_of_files_in_conflict
 
+#
+#   There is a WbSvnFileState for every file in the working copy
+#   so only the parts of the pysvn status that are used are kept
+#
 class WbSvnFileState:
+    __slots__ = ('__project', '__filepath', '__flags', '__node_status', '__abbrev', '__remote_abbrev')
+
+    __flag_is_dir       = 0x01
+    __flag_has_state    = 0x02
+    __flag_is_versioned = 0x04
+
+    # there are few different status strings, share them
+    __all_abbrevs = {}
+
     def __init__( self, project, filepath ):
         self.__project = project
         self.__filepath = filepath
 
-        self.__is_dir = False
+        self.__flags = 0
 
-        self.__state = None
+        self.__node_status = None
+        self.__abbrev = ''
+        self.__remote_abbrev = ''
 
     def __repr__( self ):
-        return ('<WbSvnFileState: %s %s>' %
-                (self.__filepath, self.__state))
+        return ('<WbSvnFileState: %s %s %r>' %
+                (self.__filepath, self.__node_status, self.__abbrev))
 
     def relativePath( self ):
         return self.__filepath
@@ -578,16 +1334,39 @@ class WbSvnFileState:
         return self.__project.projectPath() / self.__filepath
 
     def setIsDir( self ):
-        self.__is_dir = True
+        self.__flags |= self.__flag_is_dir
 
     def isDir( self ):
-        return self.__is_dir
+        return self.__flags&self.__flag_is_dir != 0
 
     def setState( self, state ):
-        self.__state = state
+        self.__flags |= self.__flag_has_state
+        if state.is_versioned:
+            self.__flags |= self.__flag_is_versioned
+
+        else:
+            self.__flags &= ~self.__flag_is_versioned
+
+        self.__node_status = state.node_status
+
+        abbrev = wb_svn_utils.svnStatusFormat( state )
+        self.__abbrev = self.__all_abbrevs.setdefault( abbrev, abbrev )
+
+    def _statusCacheRecord( self ):
+        # the pysvn enum is saved by name
+        node_status = str( self.__node_status ) if self.__node_status is not None else None
+        return (self.__flags, node_status, self.__abbrev)
+
+    def _setStatusCacheRecord( self, record ):
+        self.__flags, node_status, abbrev = record
+
+        if node_status is not None:
+            self.__node_status = getattr( pysvn.wc_status_kind, node_status )
+
+        self.__abbrev = self.__all_abbrevs.setdefault( abbrev, abbrev )
 
     def getAbbreviatedStatus( self ):
-        return wb_svn_utils.svnStatusFormat( self.__state )
+        return self.__abbrev
 
     def getStagedAbbreviatedStatus( self ):
         # QQQ here for Git compat - bad OO design here
@@ -597,32 +1376,37 @@ class WbSvnFileState:
         # QQQ here for Git compat - bad OO design here
         return self.getAbbreviatedStatus()
 
+    def setRemoteAbbreviatedStatus( self, remote_abbrev ):
+        self.__remote_abbrev = self.__all_abbrevs.setdefault( remote_abbrev, remote_abbrev )
+
+    def getRemoteAbbreviatedStatus( self ):
+        return self.__remote_abbrev
+
     # ------------------------------------------------------------
     def isControlled( self ):
-        return self.__state is not None and self.__state.is_versioned
+        return self.__flags&self.__flag_is_versioned != 0
 
     def isUncontrolled( self ):
-        return self.__state is None or self.__state.node_status == pysvn.wc_status_kind.unversioned
+        return self.__flags&self.__flag_has_state == 0 or self.__node_status == pysvn.wc_status_kind.unversioned
 
     def isIgnored( self ):
-        return self.__state is None or self.__state.node_status == pysvn.wc_status_kind.ignored
+        return self.__flags&self.__flag_has_state == 0 or self.__node_status == pysvn.wc_status_kind.ignored
 
     def canCommit( self ):
-        return (self.__state is not None
-                and self.__state.node_status in (pysvn.wc_status_kind.added, pysvn.wc_status_kind.modified, pysvn.wc_status_kind.deleted))
+        return self.__node_status in (pysvn.wc_status_kind.added, pysvn.wc_status_kind.modified, pysvn.wc_status_kind.deleted)
 
     # --------------------
     def isAdded( self ):
-        return self.__state is not None and self.__state.node_status == pysvn.wc_status_kind.added
+        return self.__node_status == pysvn.wc_status_kind.added
 
     def isModified( self ):
-        return self.__state is not None and self.__state.node_status == pysvn.wc_status_kind.modified
+        return self.__node_status == pysvn.wc_status_kind.modified
 
     def isDeleted( self ):
-        return self.__state is not None and self.__state.node_status == pysvn.wc_status_kind.deleted
+        return self.__node_status == pysvn.wc_status_kind.deleted
 
     def isConflicted( self ):
-        return self.__state is not None and self.__state.node_status == pysvn.wc_status_kind.conflicted
+        return self.__node_status == pysvn.wc_status_kind.conflicted
 
     # ------------------------------------------------------------
     def canDiffHeadVsWorking( self ):
@@ -667,14 +1451,18 @@ class WbSvnFileState:
 
         return all_content_lines
 
+#
+#   SvnProjectTreeNode is a view of one folder in a PathIndex.
+#   The folder nodes are only created when they are looked at.
+#
 class SvnProjectTreeNode:
-    def __init__( self, project, name, path ):
+    def __init__( self, project, name, path, path_index, is_by_path=False ):
         self.project = project
         self.name = name
-        self.is_by_path = False
+        self.is_by_path = is_by_path
         self.__path = path
+        self.__path_index = path_index
         self.__all_folders = {}
-        self.__all_files = {}
 
     def __repr__( self ):
         return '<SvnProjectTreeNode: project %r, path %s>' % (self.project, self.__path)
@@ -682,47 +1470,44 @@ class SvnProjectTreeNode:
     def isByPath( self ):
         return self.is_by_path
 
-    def addFileByName( self, path ):
-        assert path.name != ''
-        self.__all_files[ path.name ] = path
-
-    def addFileByPath( self, path ):
-        assert isinstance( path, pathlib.Path )
-        self.is_by_path = True
-        path = path
-        self.__all_files[ path ] = path
-
     def getAllFileNames( self ):
-        return self.__all_files.keys()
-
-    def addFolder( self, name, node ):
-        assert type(name) == str, 'name %r, node %r' % (name, node)
-        assert isinstance( node, SvnProjectTreeNode )
+        if self.is_by_path:
+            return list( self.__path_index.allPaths() )
 
-        self.__all_folders[ name ] = node
+        return self.__path_index.allChildNames( self.__path )
 
     def getFolder( self, name ):
         assert type(name) == str
+        if name not in self.__all_folders:
+            assert self.hasFolder( name ), 'name %r, node %r' % (name, self)
+            self.__all_folders[ name ] = SvnProjectTreeNode( self.project, name, self.__path / name, self.__path_index )
+
         return self.__all_folders[ name ]
 
     def getAllFolderNodes( self ):
-        return self.__all_folders.values()
+        return [self.getFolder( name ) for name in self.getAllFolderNames()]
 
     def getAllFolderNames( self ):
-        return self.__all_folders.keys()
+        if self.is_by_path:
+            return set()
+
+        return self.__path_index.allSubFolderNames( self.__path )
 
     def hasFolder( self, name ):
         assert type(name) == str
-        return name in self.__all_folders
+        return name in self.getAllFolderNames()
+
+    def numChangedFiles( self ):
+        return self.__path_index.numChangedPaths( self.__path )
 
     def _dumpTree( self, indent ):
         self.project._debug( 'dump: %*s%r' % (indent, '', self) )
 
-        for file in sorted( self.__all_files ):
+        for file in sorted( self.getAllFileNames() ):
             self.project._debug( 'dump %*s   file: %r' % (indent, '', file) )
 
-        for folder in sorted( self.__all_folders ):
-            self.__all_folders[ folder ]._dumpTree( indent+4 )
+        for folder in sorted( self.getAllFolderNames() ):
+            self.getFolder( folder )._dumpTree( indent+4 )
 
     def isNotEqual( self, other ):
         return (self.relativePath() != other.relativePath()
@@ -738,7 +1523,11 @@ class SvnProjectTreeNode:
         return self.project.projectPath() / self.__path
 
     def getStatusEntry( self, name ):
-        path = self.__all_files[ name ]
+        if self.is_by_path:
+            path = name
+
+        else:
+            path = self.__path_index.childPath( self.__path, name )
 
         if path in self.project.all_file_state:
             entry = self.project.all_file_state[ path ]
@@ -0,0 +1,112 @@
+'''
+ ====================================================================
+ Copyright (c) 2016 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_svn_tag_index.py
+
+    keep an index of the commits that made tags in a tags url so
+    that only the commits since the index was saved are logged
+
+'''
+import marshal
+import hashlib
+
+import pysvn
+
+import wb_platform_specific
+import wb_marshal_file
+
+# change when the layout of the saved index changes
+tag_index_version = 1
+tag_index_magic = b'WBTAGIDX'
+
+#
+#   A tag index file is a marshal file of
+#   (header, last_revision, all_records) where the header is
+#
+#       (tag_index_version, marshal.version, tags_url)
+#
+#   last_revision is the newest revision of tags_url that was logged.
+#   all_records are the commits that copied paths into tags_url, newest
+#   first. Each record is
+#
+#       (revision, date, author, message, all_changed_paths)
+#
+#   and each changed path is
+#
+#       (action, path, copyfrom_path, copyfrom_revision)
+#
+def tagIndexFilename( tags_url ):
+    name = '%s.tags' % (hashlib.sha1( tags_url.encode( 'utf-8' ) ).hexdigest(),)
+    return wb_platform_specific.getTagIndexDir() / name
+
+def readTagIndex( tags_url ):
+    # returns (last_revision, all_records) or None when there is no index
+    data = wb_marshal_file.readMarshalFile( tagIndexFilename( tags_url ), tag_index_magic )
+    if data is None:
+        return None
+
+    try:
+        header, last_revision, all_records = data
+
+    except (ValueError, TypeError):
+        return None
+
+    if header != (tag_index_version, marshal.version, tags_url):
+        return None
+
+    return last_revision, all_records
+
+def writeTagIndex( tags_url, last_revision, all_records ):
+    header = (tag_index_version, marshal.version, tags_url)
+    wb_marshal_file.writeMarshalFile( tagIndexFilename( tags_url ), tag_index_magic, (header, last_revision, all_records) )
+
+def tagRecordFromLog( log ):
+    # returns None when the commit did not copy any path
+    all_changed_paths = []
+    has_copy = False
+    for changed_path in log.changed_paths:
+        if changed_path.copyfrom_revision is not None:
+            copyfrom_revision = changed_path.copyfrom_revision.number
+            has_copy = True
+
+        else:
+            copyfrom_revision = None
+
+        all_changed_paths.append( (changed_path.action, changed_path.path, changed_path.copyfrom_path, copyfrom_revision) )
+
+    if not has_copy:
+        return None
+
+    return (log.revision.number, log.date, log.get( 'author', '' ), log.get( 'message', '' ), all_changed_paths)
+
+#
+#   WbSvnTagLog has the parts of a pysvn log that the log history
+#   view uses, made from a tag index record
+#
+class WbSvnTagLog:
+    def __init__( self, record ):
+        revision, self.date, self.author, self.message, all_changed_paths = record
+
+        self.revision = pysvn.Revision( pysvn.opt_revision_kind.number, revision )
+        self.changed_paths = [WbSvnTagChangedPath( *changed_path ) for changed_path in all_changed_paths]
+
+    def __repr__( self ):
+        return '<WbSvnTagLog: r%d>' % (self.revision.number,)
+
+class WbSvnTagChangedPath:
+    def __init__( self, action, path, copyfrom_path, copyfrom_revision ):
+        self.action = action
+        self.path = path
+        self.copyfrom_path = copyfrom_path
+
+        if copyfrom_revision is not None:
+            self.copyfrom_revision = pysvn.Revision( pysvn.opt_revision_kind.number, copyfrom_revision )
+
+        else:
+            self.copyfrom_revision = None
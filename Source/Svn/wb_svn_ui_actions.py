@@ -114,39 +114,6 @@ class SvnMainWindowActions(wb_ui_actions.WbMainWindowActions):
 
         self.setStatusAction( T_('Log for %(filename)s') %
                                     {'filename': filename} )
-        self.progress.start( T_('Logs %(count)d') )
-
-        yield self.switchToBackground
-        try:
-            all_commit_nodes = svn_project.cmdCommitLogForFile( filename, options.getLimit(), options.getSince(), options.getUntil())
-
-        except wb_svn_project.ClientError as e:
-            svn_project.logClientError( e, 'Cannot get commit logs for %s:%s' % (svn_project.projectName(), filename) )
-
-            yield self.switchToForeground
-            return
-
-        if len(all_commit_nodes) > 0:
-            yield self.switchToForeground
-            self.progress.start( T_('Tags %(count)d') )
-
-            yield self.switchToBackground
-            try:
-                all_tag_nodes = svn_project.cmdTagsForFile( filename, all_commit_nodes[-1]['revision'].number )
-                all_commit_nodes.extend( all_tag_nodes )
-
-            except wb_svn_project.ClientError as e:
-                svn_project.logClientError( e, 'Cannot get tags for %s:%s' % (svn_project.projectName(), filename) )
-                # continue to show the logs we have got
-
-        def key( node ):
-            return -node['revision'].number
-
-        all_commit_nodes.sort( key=key )
-
-        yield self.switchToForeground
-        self.progress.end()
-        self.setStatusAction()
 
         log_history_view = self.factory.logHistoryView(
                 self.app,
@@ -154,8 +121,10 @@ class SvnMainWindowActions(wb_ui_actions.WbMainWindowActions):
                         {'project': svn_project.projectName()
                         ,'path': filename} )
 
-        log_history_view.showCommitLogForFile( svn_project, filename, all_commit_nodes )
-        log_history_view.show()
+        # the view is shown when the first page of the log arrives
+        yield from log_history_view.showCommitLogForFile_Bg( svn_project, filename, options )
+
+        self.setStatusAction()
 
     #------------------------------------------------------------
     #
@@ -502,7 +471,8 @@ class SvnMainWindowActions(wb_ui_actions.WbMainWindowActions):
         if tree_node is None:
             return False
 
-        return tree_node.project.numUncommittedFiles() > 0
+        # with folder status the changes in other folders are not known
+        return tree_node.project.usesFolderStatus() or tree_node.project.numUncommittedFiles() > 0
 
     # ------------------------------------------------------------
     def tableActionSvnDiffBaseVsWorking( self ):
@@ -569,29 +539,28 @@ class SvnMainWindowActions(wb_ui_actions.WbMainWindowActions):
 
     @thread_switcher
     def tableActionSvnAdd_Bg( self, checked=None ):
-        def execute_function( svn_project, filename ):
+        def execute_many_function( svn_project, all_filenames ):
             try:
-                svn_project.cmdAdd( filename )
+                svn_project.cmdAddMany( all_filenames )
 
             except wb_svn_project.ClientError as e:
                 svn_project.logClientError( e )
 
-        yield from self._tableActionSvnCmd_Bg( execute_function )
+        yield from self._tableActionSvnCmdMany_Bg( execute_many_function )
 
     @thread_switcher
     def tableActionSvnRevert_Bg( self, checked=None ):
-        def execute_function( svn_project, filename ):
+        def execute_many_function( svn_project, all_filenames ):
             try:
-                svn_project.cmdRevert( filename )
+                svn_project.cmdRevertMany( all_filenames )
 
             except wb_svn_project.ClientError as e:
                 svn_project.logClientError( e )
-                return
 
         def are_you_sure( all_filenames ):
             return wb_common_dialogs.WbAreYouSureRevert( self.main_window, all_filenames )
 
-        yield from self._tableActionSvnCmd_Bg( execute_function, are_you_sure )
+        yield from self._tableActionSvnCmdMany_Bg( execute_many_function, are_you_sure )
 
     @thread_switcher
     def tableActionSvnResolveConflict_Bg( self, checked=None ):
@@ -610,29 +579,33 @@ class SvnMainWindowActions(wb_ui_actions.WbMainWindowActions):
 
     @thread_switcher
     def tableActionSvnDelete_Bg( self, checked=None ):
-        def execute_function( svn_project, filename ):
-            file_state = svn_project.getFileState( filename )
+        def execute_many_function( svn_project, all_filenames ):
+            all_controlled_filenames = []
+            for filename in all_filenames:
+                file_state = svn_project.getFileState( filename )
+
+                if file_state.isControlled():
+                    all_controlled_filenames.append( filename )
+
+                else:
+                    try:
+                        file_state.absolutePath().unlink()
+
+                    except IOError as e:
+                        self.log.error( 'Error deleting %s' % (filename,) )
+                        self.log.error( str(e) )
 
-            if file_state.isControlled():
+            if len(all_controlled_filenames) > 0:
                 try:
-                    svn_project.cmdDelete( filename )
+                    svn_project.cmdDeleteMany( all_controlled_filenames )
 
                 except wb_svn_project.ClientError as e:
                     svn_project.logClientError( e )
-                    return
-            else:
-                try:
-                    file_state.absolutePath().unlink()
-
-                except IOError as e:
-                    self.log.error( 'Error deleting %s' % (filename,) )
-                    self.log.error( str(e) )
-
 
         def are_you_sure( all_filenames ):
             return wb_common_dialogs.WbAreYouSureDelete( self.main_window, all_filenames )
 
-        yield from self._tableActionSvnCmd_Bg( execute_function, are_you_sure )
+        yield from self._tableActionSvnCmdMany_Bg( execute_many_function, are_you_sure )
 
     @thread_switcher
     def tableActionSvnRename_Bg( self, checked=None ):
@@ -657,7 +630,20 @@ class SvnMainWindowActions(wb_ui_actions.WbMainWindowActions):
             return
 
         yield from self.table_view.tableActionViewRepo_Bg( execute_function, are_you_sure_function )
-        yield from self.top_window.updateTableView_Bg()
+
+        # take account of the change to the paths
+        yield from self.top_window.updateTableView_Bg( svn_project.takeStalePaths() )
+
+    @thread_switcher
+    def _tableActionSvnCmdMany_Bg( self, execute_many_function, are_you_sure_function=None ):
+        svn_project = self.selectedSvnProject()
+        if svn_project is None:
+            return
+
+        yield from self.table_view.tableActionViewRepoMany_Bg( execute_many_function, are_you_sure_function )
+
+        # take account of the change to the paths
+        yield from self.top_window.updateTableView_Bg( svn_project.takeStalePaths() )
 
     # ------------------------------------------------------------
     def selectedSvnProjectTreeNode( self ):
@@ -728,7 +714,8 @@ class SvnMainWindowActions(wb_ui_actions.WbMainWindowActions):
 
     commit_key = 'svn-commit-dialog'
 
-    def treeActionSvnCheckin( self, checked ):
+    @thread_switcher
+    def treeActionSvnCheckin_Bg( self, checked ):
         if self.app.hasSingleton( self.commit_key ):
             commit_dialog = self.app.getSingleton( self.commit_key )
             commit_dialog.raise_()
@@ -736,6 +723,17 @@ class SvnMainWindowActions(wb_ui_actions.WbMainWindowActions):
 
         svn_project = self.selectedSvnProject()
 
+        if svn_project.usesFolderStatus():
+            # the checkin needs the status of the whole working copy
+            self.setStatusAction( T_('Update status of %s') % (svn_project.projectName(),) )
+
+            yield self.switchToBackground
+            svn_project.updateState()
+            yield self.switchToForeground
+
+            self.setStatusAction()
+            yield from self.top_window.updateTableView_Bg()
+
         commit_dialog = wb_svn_commit_dialog.WbSvnCommitDialog( self.app, svn_project )
         commit_dialog.commitAccepted.connect( self.__commitAccepted )
         commit_dialog.commitClosed.connect( self.__commitClosed )
@@ -905,6 +903,13 @@ class SvnMainWindowActions(wb_ui_actions.WbMainWindowActions):
         except wb_svn_project.ClientError as e:
             mw.svn_project.logClientError( e )
 
+    def enablerTableSvnLogHistoryLoadMore( self ):
+        return self.main_window.canLoadMoreCommitLog()
+
+    @thread_switcher
+    def tableActionSvnLogHistoryLoadMore_Bg( self, checked=None ):
+        yield from self.main_window.loadMoreCommitLog_Bg()
+
     def enablerTableSvnAnnotateLogHistory( self ):
         mw = self.main_window
 
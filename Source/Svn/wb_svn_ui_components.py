@@ -21,6 +21,7 @@ import wb_svn_commit_dialog
 import wb_svn_info_dialog
 import wb_svn_credential_dialogs
 import wb_svn_annotate
+import wb_svn_client_pool
 
 import pysvn
 
@@ -34,12 +35,20 @@ from wb_background_thread import thread_switcher
 class SvnMainWindowComponents(wb_ui_components.WbMainWindowComponents):
     def __init__( self, factory ):
         self.all_visible_table_columns = None
+        self.__client_pool = None
 
         super().__init__( 'svn', factory )
 
+    def clientPool( self ):
+        # the pysvn clients are shared by all the SvnProjects
+        if self.__client_pool is None:
+            self.__client_pool = wb_svn_client_pool.SvnClientPool( self.app, self.svnGetLogin, self.svnSslServerTrustPrompt )
+
+        return self.__client_pool
+
     def createProject( self, project ):
         tm = self.table_view.table_model
-        self.all_visible_table_columns = (tm.col_status, tm.col_name, tm.col_date)
+        self.all_visible_table_columns = (tm.col_status, tm.col_remote, tm.col_name, tm.col_date)
 
         try:
             return wb_svn_project.SvnProject( self.app, project, self )
@@ -112,7 +121,7 @@ class SvnMainWindowComponents(wb_ui_components.WbMainWindowComponents):
         addMenu( m, T_('Resolve Conflict…'), act.tableActionSvnResolveConflict_Bg, act.enablerTableSvnResolveConflict )
 
         m.addSeparator()
-        addMenu( m, T_('Checkin…'), act.treeActionSvnCheckin, act.enablerSvnCheckin, 'toolbar_images/checkin.png' )
+        addMenu( m, T_('Checkin…'), act.treeActionSvnCheckin_Bg, act.enablerSvnCheckin, 'toolbar_images/checkin.png' )
 
         m.addSeparator()
         addMenu( m, T_('Update'), act.treeActionSvnUpdate_Bg, icon_name='toolbar_images/update.png' )
@@ -145,7 +154,7 @@ class SvnMainWindowComponents(wb_ui_components.WbMainWindowComponents):
         addTool( t, T_('Add'), act.tableActionSvnAdd_Bg, act.enablerTableSvnAdd, 'toolbar_images/add.png' )
         addTool( t, T_('Revert'), act.tableActionSvnRevert_Bg, act.enablerTableSvnRevert, 'toolbar_images/revert.png' )
         t.addSeparator()
-        addTool( t, T_('Checkin'), act.treeActionSvnCheckin, act.enablerSvnCheckin, 'toolbar_images/checkin.png' )
+        addTool( t, T_('Checkin'), act.treeActionSvnCheckin_Bg, act.enablerSvnCheckin, 'toolbar_images/checkin.png' )
         t.addSeparator()
         addTool( t, T_('Update'), act.treeActionSvnUpdate_Bg, icon_name='toolbar_images/update.png' )
 
@@ -267,3 +267,19 @@ def svnStatusFormat( state ):
             lock_state)
 
     return state.strip()
+
+#
+#    format the concise repository status from a status2( update=True )
+#    result, the '*' shows that the path is newer in the repository
+#
+def svnReposStatusFormat( state ):
+    node_code = wc_status_kind_map.get( state.repos_node_status, ' ' )
+    prop_code = wc_status_kind_map.get( state.repos_prop_status, ' ' )
+
+    if node_code == ' ' and prop_code == ' ':
+        return ''
+
+    if node_code == ' ':
+        node_code = '_'
+
+    return ('*%s%s' % (node_code, prop_code)).strip()
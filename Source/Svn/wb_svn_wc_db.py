@@ -0,0 +1,210 @@
+'''
+ ====================================================================
+ Copyright (c) 2016 Barry A Scott.  All rights reserved.
+
+ This software is licensed as described in the file LICENSE.txt,
+ which you should have received as part of this distribution.
+
+ ====================================================================
+
+    wb_svn_wc_db.py
+
+    read the nodes of a working copy from its .svn/wc.db
+    so that status2 is only needed for the nodes that
+    may have changed
+
+'''
+import os
+import sqlite3
+
+import pysvn
+
+# wc.db formats that are understood, 31 is used by svn 1.8 to 1.14
+all_supported_wc_db_formats = (31,)
+
+# seconds to wait for svn to release a lock on the wc.db
+wc_db_timeout = 1.0
+
+#
+#   WcDbNode is what the wc.db records about one path
+#
+#   kind          - 'file', 'dir', 'symlink' or 'unknown'
+#   size          - size of the working file when it was last known unmodified
+#   mtime_us      - mtime in microseconds of the working file at that time
+#   needs_status  - the wc.db shows a change, add, delete, copy, props,
+#                   conflict, lock, switch or external that status2 must report
+#
+class WcDbNode:
+    __slots__ = ('kind', 'size', 'mtime_us', 'needs_status')
+
+    def __init__( self, kind, size, mtime_us, needs_status ):
+        self.kind = kind
+        self.size = size
+        self.mtime_us = mtime_us
+        self.needs_status = needs_status
+
+    def __repr__( self ):
+        return '<WcDbNode: %s size %r mtime %r needs_status %r>' % (self.kind, self.size, self.mtime_us, self.needs_status)
+
+    def isUnchanged( self, st ):
+        # st is the os.lstat of the working file
+        return (self.kind == 'file'
+            and not self.needs_status
+            and self.size == st.st_size
+            and self.mtime_us == st.st_mtime_ns // 1000)
+
+#
+#   NormalStatus has the attributes of a status2 result that
+#   WbSvnFileState.setState uses, for a node that is unchanged
+#
+class NormalStatus:
+    def __init__( self, kind ):
+        self.kind = kind
+        self.is_versioned = True
+        self.node_status = pysvn.wc_status_kind.normal
+        self.text_status = pysvn.wc_status_kind.normal
+        self.prop_status = pysvn.wc_status_kind.none
+        self.is_copied = False
+        self.is_switched = False
+        self.wc_is_locked = False
+        self.lock = None
+
+    def __repr__( self ):
+        return '<NormalStatus: %s>' % (self.kind,)
+
+normal_file_status = NormalStatus( pysvn.node_kind.file )
+normal_dir_status = NormalStatus( pysvn.node_kind.dir )
+
+def wcDbFilename( wc_path ):
+    return wc_path / '.svn' / 'wc.db'
+
+def wcRelpath( path ):
+    # convert a wb_working_tree_walker path into a wc.db local_relpath
+    if path == '.':
+        return ''
+
+    if os.sep != '/':
+        path = path.replace( os.sep, '/' )
+
+    return path
+
+def joinRelpath( folder_relpath, name ):
+    if folder_relpath == '':
+        return name
+
+    return folder_relpath + '/' + name
+
+#
+#   readWorkingCopyNodes returns {local_relpath: WcDbNode} for every
+#   path that svn status would report on in the working copy at wc_path.
+#
+#   It returns None when the wc.db cannot be used and the caller must
+#   fall back to status2. That is when wc_path is not the root of a
+#   working copy, the wc.db format is not understood, svn holds a lock
+#   on the wc.db, the working copy is locked or needs a cleanup or
+#   there are externals.
+#
+def readWorkingCopyNodes( wc_path ):
+    db_filename = wcDbFilename( wc_path )
+    if not db_filename.exists():
+        return None
+
+    try:
+        # read only so that the wc.db cannot be changed
+        connection = sqlite3.connect( '%s?mode=ro' % (db_filename.absolute().as_uri(),), uri=True, timeout=wc_db_timeout )
+
+    except sqlite3.Error:
+        return None
+
+    try:
+        # the reads are made in one transaction so that they see
+        # one state of the wc.db under a shared lock
+        connection.execute( 'BEGIN' )
+        return _readNodes( connection )
+
+    except sqlite3.Error:
+        return None
+
+    finally:
+        connection.close()
+
+def _readNodes( connection ):
+    wc_db_format, = connection.execute( 'PRAGMA user_version' ).fetchone()
+    if wc_db_format not in all_supported_wc_db_formats:
+        return None
+
+    all_wc_ids = connection.execute( 'SELECT id FROM wcroot' ).fetchall()
+    if len(all_wc_ids) != 1:
+        return None
+
+    wc_id, = all_wc_ids[0]
+
+    # svn has work to finish or is running a command
+    for table in ('wc_lock', 'work_queue', 'externals'):
+        if connection.execute( 'SELECT 1 FROM %s LIMIT 1' % (table,) ).fetchone() is not None:
+            return None
+
+    all_base_rows = {}
+    all_working_rows = {}
+    for row in connection.execute( 'SELECT local_relpath, op_depth, presence, kind, repos_id, repos_path,'
+                                   ' translated_size, last_mod_time, file_external'
+                                   ' FROM nodes WHERE wc_id = ?', (wc_id,) ):
+        relpath, op_depth = row[0], row[1]
+        if op_depth == 0:
+            all_base_rows[ relpath ] = row
+
+        else:
+            # only the highest op_depth, the most recent change, matters
+            working_row = all_working_rows.get( relpath )
+            if working_row is None or op_depth > working_row[1]:
+                all_working_rows[ relpath ] = row
+
+    all_locked = set( connection.execute( 'SELECT repos_id, repos_relpath FROM lock' ) )
+
+    all_nodes = {}
+    for relpath, row in all_base_rows.items():
+        _, _, presence, kind, repos_id, repos_path, size, mtime_us, file_external = row
+
+        if relpath in all_working_rows:
+            # added, copied, replaced, moved or deleted
+            continue
+
+        if presence == 'incomplete':
+            all_nodes[ relpath ] = WcDbNode( kind, None, None, True )
+
+        elif presence == 'normal':
+            needs_status = file_external is not None or (repos_id, repos_path) in all_locked or kind not in ('file', 'dir')
+            if not needs_status and relpath != '':
+                needs_status = _isSwitched( relpath, repos_path, all_base_rows )
+
+            all_nodes[ relpath ] = WcDbNode( kind, size, mtime_us, needs_status )
+
+        # not-present, excluded and server-excluded nodes are not reported
+
+    for relpath, row in all_working_rows.items():
+        all_nodes[ relpath ] = WcDbNode( row[3], None, None, True )
+
+    # changed properties and conflicts
+    for relpath, in connection.execute( 'SELECT local_relpath FROM actual_node'
+                                        ' WHERE wc_id = ? AND (properties IS NOT NULL OR conflict_data IS NOT NULL)', (wc_id,) ):
+        node = all_nodes.get( relpath )
+        if node is None:
+            # tree conflict on a path that is not in the working copy
+            all_nodes[ relpath ] = WcDbNode( 'unknown', None, None, True )
+
+        else:
+            node.needs_status = True
+
+    return all_nodes
+
+def _isSwitched( relpath, repos_path, all_base_rows ):
+    parent_relpath, _, name = relpath.rpartition( '/' )
+    parent_row = all_base_rows.get( parent_relpath )
+    if parent_row is None:
+        return True
+
+    parent_repos_path = parent_row[5]
+    if parent_repos_path == '':
+        return repos_path != name
+
+    return repos_path != parent_repos_path + '/' + name